@@ -5,6 +5,7 @@ import logging
 from typing import Any, TypedDict, cast
 
 from .services import async_setup_services
+from .websocket_api import async_setup_websocket_api
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
 from homeassistant.const import CONF_DEVICE, CONF_ID
 from homeassistant.core import HomeAssistant
@@ -13,7 +14,27 @@ from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers import device_registry as dr
 from homeassistant.const import Platform
 
-from .const import DATA_ENOCEAN, DOMAIN, ENOCEAN_DONGLE, PLATFORMS
+from .const import (
+    CONF_CAPTURE_BACKUP_COUNT,
+    CONF_CAPTURE_MAX_BYTES,
+    CONF_CAPTURE_PATH,
+    CONF_POLL_MAX_INTERVAL,
+    CONF_POLL_MIN_INTERVAL,
+    CONF_REPLAY_SPEED,
+    CONF_RX_FLUSH_INTERVAL,
+    CONF_RX_MAX_BATCH,
+    CONF_STATE_WRITE_INTERVAL,
+    CONF_STATS,
+    CONF_TRANSPORT,
+    CONF_TX_DUTY_CYCLE,
+    CONF_TX_DUTY_WINDOW,
+    CONF_TX_MIN_GAP,
+    DATA_ENOCEAN,
+    DOMAIN,
+    ENOCEAN_DONGLE,
+    PLATFORMS,
+    TRANSPORTS,
+)
 from .dongle import EnOceanDongle
 
 from .config_schema import (
@@ -32,7 +53,44 @@ from .config_schema import (
 
 
 CONFIG_SCHEMA = vol.Schema(
-    {DOMAIN: vol.Schema({vol.Required(CONF_DEVICE): cv.string})}, extra=vol.ALLOW_EXTRA
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Required(CONF_DEVICE): cv.string,
+                vol.Optional(CONF_RX_MAX_BATCH): cv.positive_int,
+                vol.Optional(CONF_RX_FLUSH_INTERVAL): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=1)
+                ),
+                vol.Optional(CONF_TRANSPORT): vol.In(TRANSPORTS),
+                vol.Optional(CONF_TX_DUTY_CYCLE): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.1, max=100)
+                ),
+                vol.Optional(CONF_TX_DUTY_WINDOW): vol.All(
+                    vol.Coerce(float), vol.Range(min=1)
+                ),
+                vol.Optional(CONF_TX_MIN_GAP): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=1)
+                ),
+                vol.Optional(CONF_CAPTURE_PATH): cv.string,
+                vol.Optional(CONF_CAPTURE_MAX_BYTES): cv.positive_int,
+                vol.Optional(CONF_CAPTURE_BACKUP_COUNT): cv.positive_int,
+                vol.Optional(CONF_REPLAY_SPEED): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+                vol.Optional(CONF_STATS): cv.boolean,
+                vol.Optional(CONF_POLL_MIN_INTERVAL): vol.All(
+                    vol.Coerce(float), vol.Range(min=10)
+                ),
+                vol.Optional(CONF_POLL_MAX_INTERVAL): vol.All(
+                    vol.Coerce(float), vol.Range(min=10)
+                ),
+                vol.Optional(CONF_STATE_WRITE_INTERVAL): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=60)
+                ),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -42,6 +100,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
     if not hass.data.get(DOMAIN):
         async_setup_services(hass)
+        async_setup_websocket_api(hass)
 
     # support for text-based configuration (legacy)
     if DOMAIN not in config:
@@ -103,7 +162,7 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload ENOcean config entry."""
     enocean_dongle = hass.data[DATA_ENOCEAN][ENOCEAN_DONGLE]
-    enocean_dongle.unload()
+    await enocean_dongle.async_unload()
     hass.data.pop(DATA_ENOCEAN)
     return True
 
@@ -124,5 +183,8 @@ async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry
     # Send secure teach in for secure devices
     if new_device_config.get(CONF_SEC_TI_KEY, []) != []:
         usb_dongle.send_sec_ti(new_device_config.get(CONF_SEC_TI_KEY),new_device_config.get(CONF_RLC),new_device_config.get(CONF_ID))
-        await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
-        hass.async_create_task(hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS))
\ No newline at end of file
+
+    # Reload the platforms with the added device
+    usb_dongle.async_index_devices()
+    await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
+    hass.async_create_task(hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS))
\ No newline at end of file
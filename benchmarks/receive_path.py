@@ -0,0 +1,351 @@
+"""End-to-end benchmark of the EnOcean receive path.
+
+A fake communicator thread injects radio packets into EnOceanDongle.callback
+at a given rate. They go through the receive buffer, the sender routing,
+the EnOceanDevice decoders or the platforms' value_changed,
+and end in the state write. The benchmark reports the packet to state write
+latency percentiles, the CPU time per packet and, with --allocations, the
+memory blocks kept per packet.
+
+It runs against a stub Home Assistant instance and needs the integration's
+requirements (homeassistant, enoceanjob) to be installed:
+
+    python benchmarks/receive_path.py --devices 1000 --rate 200 --duration 30
+    python benchmarks/receive_path.py --json > baseline.json
+    python benchmarks/receive_path.py --baseline baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+INTEGRATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(INTEGRATION_DIR))
+INTEGRATION = os.path.basename(INTEGRATION_DIR)
+
+from enoceanjob.protocol.packet import Packet
+from enoceanjob.utils import combine_hex
+from homeassistant.const import CONF_DEVICE
+
+const = importlib.import_module(f"{INTEGRATION}.const")
+device = importlib.import_module(f"{INTEGRATION}.device")
+dongle_module = importlib.import_module(f"{INTEGRATION}.dongle")
+sensor = importlib.import_module(f"{INTEGRATION}.sensor")
+binary_sensor = importlib.import_module(f"{INTEGRATION}.binary_sensor")
+
+DEFAULT_MIX = "temperature=4,humidity=2,power=2,windowhandle=1,door=1,rocker=1"
+
+
+def _temperature_data(rand):
+    """A5-02-05, temperature 0..40 °C."""
+    return [0xA5, 0x00, 0x00, rand.randrange(256), 0x08]
+
+
+def _humidity_data(rand):
+    """A5-04-01, temperature and humidity."""
+    return [0xA5, 0x00, rand.randrange(251), rand.randrange(251), 0x0A]
+
+
+def _power_data(rand):
+    """A5-12-01, instantaneous power (DT=1, DIV=0)."""
+    watts = rand.randrange(3000)
+    return [0xA5, (watts >> 16) & 0xFF, (watts >> 8) & 0xFF, watts & 0xFF, 0x0C]
+
+
+def _windowhandle_data(rand):
+    """F6-10-00, window handle positions."""
+    return [0xF6, rand.choice((0xF0, 0xC0, 0xE0))]
+
+
+def _door_data(rand):
+    """D5-00-01, contact open or closed."""
+    return [0xD5, rand.choice((0x08, 0x09))]
+
+
+def _rocker_data(rand):
+    """F6-02-02, rocker pressed."""
+    return [0xF6, rand.choice((0x70, 0x50, 0x30, 0x10))]
+
+
+def _temperature_entities(hass, dev_id, name):
+    return sensor.create_sensors(
+        hass, dev_id, name, sensor.SENSOR_TYPE_TEMPERATURE, {sensor.CONF_EEP: "A5-02-05"}
+    )
+
+
+def _humidity_entities(hass, dev_id, name):
+    """Temperature and humidity sensors sharing one device decoding A5-04-01."""
+    config = {sensor.CONF_EEP: "A5-04-01"}
+    return sensor.create_sensors(
+        hass, dev_id, name, sensor.SENSOR_TYPE_TEMPERATURE, config
+    ) + sensor.create_sensors(hass, dev_id, name, sensor.SENSOR_TYPE_HUMIDITY, config)
+
+
+# EEP name: (packet data generator, entities factory, status byte)
+EEP_PROFILES = {
+    "temperature": (_temperature_data, _temperature_entities, 0x00),
+    "humidity": (_humidity_data, _humidity_entities, 0x00),
+    "power": (
+        _power_data,
+        lambda hass, dev_id, name: sensor.create_sensors(hass, dev_id, name, sensor.SENSOR_TYPE_POWER, {}),
+        0x00,
+    ),
+    "windowhandle": (
+        _windowhandle_data,
+        lambda hass, dev_id, name: [sensor.EnOceanWindowHandle(dev_id, name, sensor.SENSOR_DESC_WINDOWHANDLE)],
+        0x20,
+    ),
+    "door": (
+        _door_data,
+        lambda hass, dev_id, name: [sensor.EnOceanDoorDetector(dev_id, name, sensor.SENSOR_DESC_DOORDETECTOR)],
+        0x00,
+    ),
+    "rocker": (
+        _rocker_data,
+        lambda hass, dev_id, name: [binary_sensor.EnOceanBinarySensor(dev_id, name, None)],
+        0x30,
+    ),
+}
+
+
+class StubBus:
+    """Event bus swallowing the fired events."""
+
+    def __init__(self):
+        self.fired = 0
+
+    def fire(self, event_type, event_data=None, *args, **kwargs):
+        self.fired += 1
+
+    async_fire = fire
+
+
+class StubHass:
+    """The parts of HomeAssistant used on the receive path."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.data = {}
+        self.bus = StubBus()
+        self.config = types.SimpleNamespace(units=types.SimpleNamespace(temperature_unit="°C"))
+
+    def async_create_task(self, target, *args, **kwargs):
+        return self.loop.create_task(target)
+
+    def create_task(self, target, *args, **kwargs):
+        self.loop.call_soon_threadsafe(self.loop.create_task, target)
+
+    def add_job(self, target, *args):
+        if asyncio.iscoroutine(target):
+            self.loop.call_soon_threadsafe(self.loop.create_task, target)
+        else:
+            self.loop.call_soon_threadsafe(target, *args)
+
+
+class Recorder:
+    """Measure the latency between packet injection and state writes."""
+
+    def __init__(self):
+        self.injected_at: dict[int, float] = {}
+        self.latencies: list[float] = []
+        self.writes = 0
+
+    def attach(self, entity, sender_id):
+        """Replace the state writes of an entity by a measured stub."""
+
+        def async_write_ha_state():
+            # Compute what Home Assistant would serialize
+            _ = entity.state, entity.extra_state_attributes
+            self.writes += 1
+            injected = self.injected_at.get(sender_id)
+            if injected is not None:
+                self.latencies.append(time.perf_counter() - injected)
+
+        async def async_update_ha_state(force_refresh=False):
+            async_write_ha_state()
+
+        def schedule_update_ha_state(force_refresh=False):
+            entity.hass.loop.call_soon_threadsafe(async_write_ha_state)
+
+        entity.async_write_ha_state = async_write_ha_state
+        entity.async_update_ha_state = async_update_ha_state
+        entity.schedule_update_ha_state = schedule_update_ha_state
+
+
+class FakeCommunicator(threading.Thread):
+    """Inject radio packets into the dongle callback at a fixed rate."""
+
+    def __init__(self, callback, recorder, devices, rate, duration, seed):
+        super().__init__(name="EnOceanBenchCommunicator", daemon=True)
+        self.callback = callback
+        self.recorder = recorder
+        self.devices = devices
+        self.rate = rate
+        self.duration = duration
+        self.rand = random.Random(seed)
+        self.injected = 0
+
+    def run(self):
+        interval = 1 / self.rate if self.rate > 0 else 0
+        started = time.perf_counter()
+        deadline = started + self.duration
+        while (now := time.perf_counter()) < deadline:
+            if interval:
+                due = started + self.injected * interval
+                if due > now:
+                    time.sleep(due - now)
+            dev_id, sender_id, data_generator, status = self.rand.choice(self.devices)
+            data = data_generator(self.rand) + dev_id + [status]
+            optional = [0x03, 0xFF, 0xFF, 0xFF, 0xFF, self.rand.randrange(40, 95), 0x00]
+            # Same parsing as the serial communicators
+            packet = Packet.parse_msg(Packet(0x01, data=data, optional=optional).build())[2]
+            self.recorder.injected_at[sender_id] = time.perf_counter()
+            self.callback(packet)
+            self.injected += 1
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """Parse "eep=weight,..." into a dict."""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in EEP_PROFILES:
+            raise SystemExit(f"Unknown EEP {name}, use one of {', '.join(EEP_PROFILES)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return a percentile of sorted values."""
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run_benchmark(args) -> dict[str, float]:
+    """Run the benchmark and return its results."""
+    loop = asyncio.get_running_loop()
+    hass = StubHass(loop)
+    config_entry = types.SimpleNamespace(
+        entry_id="benchmark",
+        data={CONF_DEVICE: "benchmark", const.CONF_TRANSPORT: const.TRANSPORT_REPLAY},
+    )
+    usb_dongle = dongle_module.EnOceanDongle(hass, config_entry)
+    hass.data[const.DATA_ENOCEAN][const.ENOCEAN_DONGLE] = usb_dongle
+
+    rand = random.Random(args.seed)
+    weights = parse_mix(args.mix)
+    names = rand.choices(list(weights), list(weights.values()), k=args.devices)
+    recorder = Recorder()
+    devices = []
+    entity_count = 0
+    for index, name in enumerate(names):
+        dev_id = [0x05, (index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF]
+        sender_id = combine_hex(dev_id)
+        data_generator, entities_factory, status = EEP_PROFILES[name]
+        for entity in entities_factory(hass, dev_id, f"{name} {index}"):
+            entity.hass = hass
+            entity.entity_id = f"sensor.benchmark_{index}_{entity_count}"
+            recorder.attach(entity, sender_id)
+            await async_register_entity(entity)
+            entity_count += 1
+        devices.append((dev_id, sender_id, data_generator, status))
+
+    if args.allocations:
+        tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot()
+
+    communicator = FakeCommunicator(
+        usb_dongle.callback, recorder, devices, args.rate, args.duration, args.seed
+    )
+    cpu_before = time.process_time()
+    communicator.start()
+    while communicator.is_alive():
+        await asyncio.sleep(0.1)
+    # Let the buffered packets and pending writes drain
+    await asyncio.sleep(max(0.5, usb_dongle._rx_flush_interval * 4))
+    cpu = time.process_time() - cpu_before
+
+    results = {
+        "devices": args.devices,
+        "entities": entity_count,
+        "packets": communicator.injected,
+        "state_writes": recorder.writes,
+        "cpu_us_per_packet": cpu / max(communicator.injected, 1) * 1e6,
+    }
+    latencies = sorted(recorder.latencies)
+    for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        results[f"latency_{name}_ms"] = percentile(latencies, fraction) * 1e3
+
+    if args.allocations:
+        snapshot_after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        blocks = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, "filename"))
+        results["net_blocks_per_packet"] = blocks / max(communicator.injected, 1)
+        results["traced_peak_kib"] = peak / 1024
+
+    usb_dongle.unload()
+    return results
+
+
+async def async_register_entity(entity):
+    """Run the EnOceanEntity part of async_added_to_hass (sender routing).
+
+    The platform classes also restore their last state, which needs a real
+    Home Assistant instance.
+    """
+    await device.EnOceanEntity.async_added_to_hass(entity)
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float) -> list[str]:
+    """Return the metrics regressing by more than tolerance against baseline."""
+    regressions = []
+    for key in ("latency_p95_ms", "latency_p99_ms", "cpu_us_per_packet"):
+        if key in baseline and results[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f"{key}: {results[key]:.3f} > {baseline[key]:.3f}")
+    return regressions
+
+
+def main():
+    """Parse the arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=200, help="packets per second, 0 for max")
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="EEP weights, e.g. temperature=2,power=1")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--allocations", action="store_true", help="trace memory blocks (slower)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare with, exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>24}: {value:.3f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
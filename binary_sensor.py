@@ -16,6 +16,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
 from .device import EnOceanEntity
+from .eep import parse_eep
 
 DEFAULT_NAME = "EnOcean binary sensor"
 DEPENDENCIES = ["enocean"]
@@ -79,15 +80,14 @@ class EnOceanBinarySensor(EnOceanEntity, BinarySensorEntity):
     def value_changed(self, packet):
 
         if packet.data[0] == 0xD5:
-            packet.parse_eep(0x00, 0x01)
-            contact_value = packet.parsed['CO']['value']
+            contact_value = parse_eep(packet, 0x00, 0x01)['CO']['value']
 
             if contact_value == 'open':
                 self._state = 'on'
             elif contact_value == 'closed':
                 self._state = 'off'
 
-            self.schedule_update_ha_state()
+            self.async_schedule_state_write()
 
         if packet.data[0] == 0xF6:
             """Fire an event with the data that have changed.
@@ -109,7 +109,7 @@ class EnOceanBinarySensor(EnOceanEntity, BinarySensorEntity):
             elif packet.data[6] == 0x20:
                 pushed = 0
 
-            self.schedule_update_ha_state()
+            self.async_schedule_state_write()
 
             action = packet.data[1]
             if action == 0x70:
@@ -0,0 +1,190 @@
+"""Raw telegram capture and replay.
+
+Capture files start with CAPTURE_MAGIC followed by one record per received
+ESP3 frame: the receive time in microseconds since the epoch (uint64), the
+frame length (uint16), both little endian, then the raw frame bytes.
+"""
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+from enoceanjob.communicators import Communicator
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"ENOCAP\x01\n"
+RECORD_HEADER = struct.Struct("<QH")
+
+_STOP = object()
+# Seconds stop() waits for the queued frames to be written
+STOP_TIMEOUT = 5.0
+
+
+class TelegramCapture:
+    """Append the received ESP3 frames to a rotating capture file.
+
+    Frames are captured as received, before they are parsed. write() only
+    queues the frame: the file is written by a dedicated
+    thread, so capturing never blocks the communicator or the event loop.
+    When the file would exceed max_bytes it is rotated like a logging
+    RotatingFileHandler (path.1 ... path.<backup_count>).
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        """Initialize the capture."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="EnOceanTelegramCapture", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = STOP_TIMEOUT) -> None:
+        """Write the queued frames and stop the writer thread, blocking up to timeout seconds."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            _LOGGER.warning("Telegram capture to %s not written within %s s", self.path, timeout)
+        self._thread = None
+
+    def write(self, frame) -> None:
+        """Queue a raw ESP3 frame (a bytes-like object)."""
+        self._queue.put((time.time(), bytes(frame)))
+
+    def _run(self) -> None:
+        """Write the queued frames to the capture file."""
+        _LOGGER.info("Capturing telegrams to %s", self.path)
+        file = self._open()
+        try:
+            while (item := self._queue.get()) is not _STOP:
+                timestamp, frame = item
+                record = RECORD_HEADER.pack(int(timestamp * 1e6), len(frame)) + frame
+                if file.tell() + len(record) > self.max_bytes:
+                    file.close()
+                    self._rotate()
+                    file = self._open()
+                file.write(record)
+        except OSError as exception:
+            _LOGGER.error("Telegram capture to %s stopped: %s", self.path, exception)
+        finally:
+            file.close()
+
+    def _open(self):
+        """Open the capture file for appending, writing the magic of a new file."""
+        file = open(self.path, "ab", buffering=65536)  # pylint: disable=consider-using-with
+        if file.tell() == 0:
+            file.write(CAPTURE_MAGIC)
+        return file
+
+    def _rotate(self) -> None:
+        """Shift the backups and move the current file to path.1."""
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def read_capture(path: str):
+    """Yield the (timestamp, frame) records of a capture file.
+
+    The file is read through a memory map, frames are memoryviews only
+    valid until the next record is requested.
+    """
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as log:
+        if log[:len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not an EnOcean capture file")
+        view = memoryview(log)
+        try:
+            offset = len(CAPTURE_MAGIC)
+            end = len(log) - RECORD_HEADER.size
+            while offset <= end:
+                timestamp, length = RECORD_HEADER.unpack_from(log, offset)
+                offset += RECORD_HEADER.size
+                if offset + length > len(log):
+                    _LOGGER.warning("Truncated record at the end of %s", path)
+                    break
+                frame = view[offset:offset + length]
+                try:
+                    yield timestamp / 1e6, frame
+                finally:
+                    frame.release()
+                offset += length
+        finally:
+            view.release()
+
+
+class ReplayCommunicator(Communicator):
+    """Communicator feeding the frames of a capture file to the callback.
+
+    Frames go through the same parsing as the ones of SerialCommunicator.
+    speed is the replay speed factor: 1 replays in real time, N runs N
+    times faster and 0 replays as fast as possible. Transmitted packets are
+    dropped.
+    """
+
+    def __init__(self, path: str, callback=None, speed: float = 1.0):
+        """Initialize the replay communicator."""
+        super().__init__(callback)
+        self.path = path
+        self.speed = speed
+        self.app_version = "replay"
+        self.api_version = "replay"
+        self.app_description = f"Replay of {os.path.basename(path)}"
+        self.replayed = 0
+
+    def get_dongle_info(self):
+        """Nothing to read from a capture file."""
+
+    @property
+    def base_id(self):
+        """Return the base ID, there is no dongle to read it from."""
+        return self._base_id
+
+    @base_id.setter
+    def base_id(self, base_id):
+        """Set the base ID manually."""
+        self._base_id = base_id
+
+    def run(self):
+        """Replay the capture file."""
+        _LOGGER.info("Replaying %s at speed %s", self.path, self.speed or "max")
+        first_timestamp = None
+        started = time.monotonic()
+        for timestamp, frame in read_capture(self.path):
+            if self._stop_flag.is_set():
+                break
+            if self.speed > 0:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                delay = started + (timestamp - first_timestamp) / self.speed - time.monotonic()
+                if delay > 0 and self._stop_flag.wait(delay):
+                    break
+
+            self._buffer.extend(frame)
+            self.parse()
+            self.replayed += 1
+
+            while True:
+                try:
+                    self.transmit.get_nowait()
+                except queue.Empty:
+                    break
+        _LOGGER.info("Replay of %s finished, %d frames", self.path, self.replayed)
@@ -0,0 +1,127 @@
+"""Reassembly of received chained data messages (CDM)."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import logging
+import time
+
+from enoceanjob.protocol.constants import PACKET
+from enoceanjob.protocol.packet import RadioPacket
+
+_LOGGER = logging.getLogger(__name__)
+
+CHAIN_TIMEOUT = 3.0
+MAX_CHAINS = 32
+MAX_CHAIN_LENGTH = 512
+
+# Sender ID (4 bytes) and status closing the data of a radio packet
+_TRAILER = 5
+
+
+class _PartialChain:
+    """Parts of a chain received so far."""
+
+    __slots__ = ("started", "length", "rorg", "payload", "next_index")
+
+    def __init__(self, started: float, length: int, rorg: int):
+        """Initialize the chain."""
+        self.started = started
+        self.length = length
+        self.rorg = rorg
+        self.payload = bytearray()
+        self.next_index = 1
+
+
+class ChainReassembler:
+    """Rebuild the telegrams sent as chains of CDM telegrams.
+
+    CDM data starts with SEQ (2 bits), identifying the chain of a sender,
+    and IDX (6 bits), the index of the part. The first part (IDX 0) then
+    holds LEN (2 bytes), the length of the unchained data, and the data
+    itself, starting with its R-ORG. As in ChainedMSG.create_CDM, LEN
+    counts the R-ORG but not the sender ID and status.
+
+    Chains are keyed by sender and SEQ. Parts must arrive in order, a
+    missing part drops the chain. Chains not completed within timeout
+    seconds are evicted, as is the oldest chain when max_chains are in
+    progress, so a sender can never make the reassembler grow unbounded.
+    """
+
+    def __init__(
+        self,
+        timeout: float = CHAIN_TIMEOUT,
+        max_chains: int = MAX_CHAINS,
+        max_length: int = MAX_CHAIN_LENGTH,
+    ):
+        """Initialize the reassembler."""
+        self.timeout = timeout
+        self.max_chains = max_chains
+        self.max_length = max_length
+        # Chains in start order, the oldest first
+        self._chains: OrderedDict[tuple[int, int], _PartialChain] = OrderedDict()
+        self.completed = 0
+        self.dropped = 0
+
+    def feed(self, packet: RadioPacket) -> RadioPacket | None:
+        """Add a CDM part, return the unchained telegram once complete."""
+        now = time.monotonic()
+        self._evict_expired(now)
+
+        data = packet.data
+        if len(data) < 2 + _TRAILER:
+            return None
+        sequence = data[1] >> 6
+        index = data[1] & 0x3F
+        key = (packet.sender_int, sequence)
+
+        if index == 0:
+            if len(data) < 5 + _TRAILER:
+                return None
+            length = data[2] << 8 | data[3]
+            if not 0 < length <= self.max_length:
+                _LOGGER.debug("Chain of %s of %d bytes, ignored", hex(key[0]), length)
+                self.dropped += 1
+                return None
+            if self._chains.pop(key, None) is not None:
+                self.dropped += 1
+            if len(self._chains) >= self.max_chains:
+                self._chains.popitem(last=False)
+                self.dropped += 1
+            # The R-ORG is kept apart from the payload following it
+            chain = _PartialChain(now, length - 1, data[4])
+            chain.payload += bytes(data[5:-_TRAILER])
+            self._chains[key] = chain
+        else:
+            chain = self._chains.get(key)
+            if chain is None:
+                return None
+            if index != chain.next_index:
+                _LOGGER.debug("Part %d of a chain of %s missing, chain dropped", chain.next_index, hex(key[0]))
+                del self._chains[key]
+                self.dropped += 1
+                return None
+            chain.payload += bytes(data[2:-_TRAILER])
+            chain.next_index += 1
+
+        if len(chain.payload) < chain.length:
+            return None
+        del self._chains[key]
+        self.completed += 1
+        unchained = RadioPacket(
+            PACKET.RADIO_ERP1,
+            data=[chain.rorg, *chain.payload[:chain.length], *data[-_TRAILER:]],
+            optional=list(packet.optional),
+        )
+        unchained.parse()
+        return unchained
+
+    def _evict_expired(self, now: float) -> None:
+        """Drop the chains started more than timeout seconds ago."""
+        chains = self._chains
+        while chains:
+            key, chain = next(iter(chains.items()))
+            if now - chain.started < self.timeout:
+                break
+            _LOGGER.debug("Chain of %s timed out", hex(key[0]))
+            del chains[key]
+            self.dropped += 1
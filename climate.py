@@ -2,6 +2,10 @@
 import voluptuous as vol
 import logging
 import asyncio
+import random
+import time
+from collections.abc import Callable
+from typing import Any
 
 # HA imports
 from homeassistant.core import HomeAssistant
@@ -38,7 +42,6 @@ from homeassistant.const import (
     ATTR_TEMPERATURE,
     CONF_NAME,
     CONF_ID,
-    CONF_DEVICES,
     EVENT_HOMEASSISTANT_START,
     SERVICE_TURN_OFF,
     SERVICE_TURN_ON,
@@ -48,7 +51,7 @@ from homeassistant.const import (
     STATE_UNAVAILABLE
 )
 
-from .config_schema import CONF_DEVICE_TYPE, CONF_SEC_TI_KEY
+from .config_schema import CONF_SEC_TI_KEY
 
 # Climate specific imports
 from homeassistant.components.climate import PLATFORM_SCHEMA, ClimateEntity
@@ -75,11 +78,20 @@ from .climate_schema import(
 
 # Enocean integration specific integrations
 from enoceanjob.utils import combine_hex, to_hex_string
-from enoceanjob.protocol.constants import RORG, DECRYPT_RESULT, PACKET
-from enoceanjob.protocol.packet import SECTeachInPacket, RadioPacket, ChainedMSG, Packet
+from enoceanjob.protocol.constants import RORG
+from enoceanjob.protocol.packet import SECTeachInPacket, RadioPacket, ChainedMSG
 from .device import EnOceanEntity
-from .const import SIGNAL_SEND_MESSAGE, DOMAIN, ENOCEAN_DONGLE
-from .utils import add_one_to_byte_list_num
+from .const import (
+    DOMAIN,
+    ENOCEAN_DONGLE,
+    SIGNAL_SEND_MESSAGE,
+    TX_PRIORITY_COMMAND,
+    TX_PRIORITY_POLL,
+    TX_PRIORITY_SECURE_ACK,
+)
+from .secure import CMAC_SIZE, SecureSession
+from .transmit import DeferredTelegram, telegram_airtime
+from .telemetry import HeaterTelemetry
 from .dongle import EnOceanDongle
 
 _LOGGER = logging.getLogger(__name__)
@@ -88,6 +100,15 @@ _LOGGER = logging.getLogger(__name__)
 CONF_RLC_GW_INIT = [0x00] * 3
 CONF_RLC_SENS_INIT = [0x00] * 3
 
+ACK_TIMEOUT = 1.5
+ACK_RETRIES = 2
+ACK_BACKOFF = 0.5
+# A status echoing the setpoint within this margin acknowledges it
+SETPOINT_TOLERANCE = 0.5
+# REQ of the status messages (MID 8) the heater sends on its own, which the
+# gateway acknowledges; the other ones answer a gateway request
+SPONTANEOUS_STATUS_REQUESTS = (0, 4)
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(CLIMATE_SCHEMA)
 
 
@@ -99,18 +120,12 @@ async def async_setup_platform(hass, config, async_add_entities,
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
     """Add climate entities from configuration flow."""
-    climate_list = []
-    result = config_entry.data
-
     await async_setup_reload_service(hass, DOMAIN, PLATFORM)
 
-    if result == {}:
-        return
-    for device in result[CONF_DEVICES].keys():
-        if result[CONF_DEVICES][device][CONF_DEVICE_TYPE] == 'climate':
-            _LOGGER.info("setup entity-config_entry_data=%s",result[CONF_DEVICES][device])
-            climate = EquationHeater(hass, result[CONF_DEVICES][device])
-            climate_list.append(climate)
+    usb_dongle = hass.data[DOMAIN][ENOCEAN_DONGLE]
+    climate_list = [
+        EquationHeater(hass, device) for device in usb_dongle.device_index.get(PLATFORM, ())
+    ]
 
     #Register entity service for reset RLC
     platform = ep.async_get_current_platform()
@@ -130,6 +145,44 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
     return True
 
 
+def _status(message):
+    """Return the parsed values of a decrypted heater status message (MID 8), None otherwise."""
+    if message.rorg == RORG.SEC_ENCAPS:
+        return None
+    parsed = message.parsed
+    if parsed.get('MID', {}).get('raw_value') != 8:
+        return None
+    return parsed
+
+
+def _is_status_reply(message) -> bool:
+    """Return True for a status message answering a gateway request."""
+    parsed = _status(message)
+    return (
+        parsed is not None
+        and parsed.get('REQ', {}).get('raw_value') not in SPONTANEOUS_STATUS_REQUESTS
+    )
+
+
+def _acknowledges_setpoint(temperature: float) -> Callable[[Any], bool]:
+    """Return a predicate matching the status acknowledging a setpoint.
+
+    A status echoing the setpoint acknowledges it, even one the heater
+    sent on its own. A status without the setpoint has to answer the
+    request.
+    """
+
+    def predicate(message) -> bool:
+        parsed = _status(message)
+        if parsed is None:
+            return False
+        if (setpoint := parsed.get('TSP')) is not None:
+            return abs(setpoint['value'] - temperature) < SETPOINT_TOLERANCE
+        return _is_status_reply(message)
+
+    return predicate
+
+
 class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
     """Representation of a Equation Enocean Heater."""
 
@@ -142,8 +195,12 @@ class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
         self._attr_unique_id = f"{combine_hex(self.dev_id)}-{'heater'}"
         self._attr_name = f"{'Heater'}"
         self._sec_ti_key = config.get(CONF_SEC_TI_KEY)
-        self.RLC_GW = CONF_RLC_GW_INIT
-        self.RLC_RAD = CONF_RLC_SENS_INIT
+        self._session = SecureSession(
+            self._sec_ti_key,
+            rlc_tx=combine_hex(CONF_RLC_GW_INIT),
+            rlc_rx=combine_hex(CONF_RLC_SENS_INIT),
+        )
+        self.telemetry = HeaterTelemetry()
         self.hass = hass
         self._tolerance = config.get(CONF_TOLERANCE)
         self._min_temp = config.get(CONF_MIN_TEMP)
@@ -160,7 +217,6 @@ class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
         self._hvac_action = CURRENT_HVAC_OFF
         self._hvac_list.append(HVAC_MODE_OFF)
         self._hvac_list.append(HVAC_MODE_HEAT)
-        self._telegram_received = asyncio.Condition()
 
         if self._initial_hvac_mode == HVAC_MODE_HEAT:
             self._hvac_mode = HVAC_MODE_HEAT
@@ -176,6 +232,24 @@ class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
         self._saved_target_temp = 5
         self._attributes = {}
 
+    @property
+    def RLC_GW(self):
+        """Return the next rolling code sent to the heater."""
+        return SecureSession.rlc_to_list(self._session.rlc_tx)
+
+    @RLC_GW.setter
+    def RLC_GW(self, rlc):
+        self._session.rlc_tx = combine_hex(rlc)
+
+    @property
+    def RLC_RAD(self):
+        """Return the next rolling code expected from the heater."""
+        return SecureSession.rlc_to_list(self._session.rlc_rx)
+
+    @RLC_RAD.setter
+    def RLC_RAD(self, rlc):
+        self._session.rlc_rx = combine_hex(rlc)
+
     @property
     def should_poll(self):
         """Return the polling state."""
@@ -260,6 +334,7 @@ class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
 
         # Check If we have an old state
         old_state = await self.async_get_last_state()
+        migrate_rlc = False
         if old_state is not None:
             # If we have no initial temperature, restore
             if self._target_temp is None:
@@ -279,13 +354,13 @@ class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
             for x in self.preset_modes:
                 if old_state.attributes.get(x + "_temp") is not None:
                      self._attributes[x + "_temp"] = old_state.attributes.get(x + "_temp")
+            # Rolling codes saved in the attributes by former versions
             if old_state.attributes.get('RLC_GW') is not None:
-                self._attributes['RLC_GW'] = old_state.attributes.get('RLC_GW')
-                self.RLC_GW = self._attributes['RLC_GW']
+                self.RLC_GW = old_state.attributes.get('RLC_GW')
+                migrate_rlc = True
                 _LOGGER.debug("RLC_GW old_state is : %s !", to_hex_string(old_state.attributes.get('RLC_GW')))
             if old_state.attributes.get('RLC_RAD') is not None:
-                self._attributes['RLC_RAD'] = old_state.attributes.get('RLC_RAD')
-                self.RLC_RAD = self._attributes['RLC_RAD']
+                self.RLC_RAD = old_state.attributes.get('RLC_RAD')
                 _LOGGER.debug("RLC_RAD old_state is : %s !", to_hex_string(old_state.attributes.get('RLC_RAD')))
         else:
             # No previous state, try and restore defaults
@@ -293,37 +368,78 @@ class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
                 self._target_temp = self.min_temp
             _LOGGER.warning("No previously saved temperature, setting to %s", self._target_temp)
 
-
-        TMODE = Packet(PACKET.COMMON_COMMAND, data=[0x3E, 0x01])
-        dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, TMODE) #Activate transparent mode
-        #dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, self.secti[0]) #Reinit RLC
-        await asyncio.sleep(1)
+        # The attributes may lag behind the last code sent, jump past it
+        self._session.rlc_tx, self._session.rlc_rx = self.usb_dongle.rlc_store.async_restore(
+            self._rlc_store_id, self._session.rlc_tx, self._session.rlc_rx, jump=migrate_rlc
+        )
+
+        # The dongle enabled the transparent mode during its setup
+        self.usb_dongle.startup.async_schedule(
+            self._async_query_status, f"enocean startup query {self.dev_name}"
+        )
+        self.async_on_remove(
+            self.usb_dongle.polling.async_register(combine_hex(self.dev_id), self._async_poll)
+        )
+        self.async_on_remove(self.usb_dongle.async_register_heater(self.entity_id, self))
+
+    async def _async_query_status(self):
+        """Request the heater status, waiting for the reply.
+
+        As for the setpoints, the timeout includes the time the query is
+        expected to wait in the transmit queue.
+        """
         _LOGGER.debug("RLC_GW: %s !", to_hex_string(self.RLC_GW))
-        self.send_telegram(bytearray(self._sec_ti_key), self.RLC_GW, self.dev_id,0, MID=0, REQ=8) #Request information
-        self.RLC_GW = add_one_to_byte_list_num(self.RLC_GW)
-        self._attributes['RLC_GW'] = self.RLC_GW
+        try:
+            await self.usb_dongle.correlator.async_request(
+                combine_hex(self.dev_id),
+                _is_status_reply,
+                lambda: self.send_telegram(0, priority=TX_PRIORITY_POLL, MID=0, REQ=8),
+                timeout=ACK_TIMEOUT + self.usb_dongle.transmit.estimated_delay,
+            )
+        except asyncio.TimeoutError:
+            _LOGGER.debug("No status from heater %s", self.dev_name)
+
+    async def _async_poll(self) -> bool:
+        """Query the heater status, return True while it is heating."""
+        await self._async_query_status()
+        return self._hvac_mode == HVAC_MODE_HEAT
     
     async def async_will_remove_from_hass(self):
         _LOGGER.debug("Remove entity : %s", self.dev_name)
         self.async_removed_from_registry
 
 
-    def send_telegram(self, Key, RLC, destination, mid, **kwargs):
-        decrypted = RadioPacket.create(rorg=RORG.VLD, rorg_func=0x33, rorg_type=0x00, destination = destination,mid=mid, **kwargs)
-        encrypted = decrypted.encrypt(Key,RLC,SLF_TI=0x8B)
+    def send_telegram(self, mid, priority=TX_PRIORITY_COMMAND, **kwargs):
+        """Queue a telegram to the heater, encrypted when it is transmitted.
+
+        The rolling code is taken at transmission, so the heater receives
+        the rolling codes in order whatever the priority of the telegrams.
+        """
+        decrypted = RadioPacket.create(rorg=RORG.VLD, rorg_func=0x33, rorg_type=0x00, destination=self.dev_id, mid=mid, **kwargs)
+        telegram = DeferredTelegram(
+            lambda: self._encrypt_telegram(decrypted),
+            telegram_airtime(len(decrypted.data) + CMAC_SIZE),
+        )
+        dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, telegram, priority)
+
+    def _encrypt_telegram(self, decrypted: RadioPacket):
+        """Encrypt a telegram with the next rolling code, chaining it if too long."""
+        encrypted = self._session.encrypt(decrypted)
+        self._async_save_rlc()
         if len(encrypted.data) > 15:
           encrypted = ChainedMSG.create_CDM(encrypted,CDM_RORG=RORG.CDM)
-        dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, encrypted)
+        return encrypted
     
     async def async_set_hvac_mode(self, hvac_mode):
         """Set hvac mode."""
+        self.usb_dongle.polling.async_mark_active(combine_hex(self.dev_id))
         if hvac_mode == HVAC_MODE_HEAT:
             self._hvac_mode = HVAC_MODE_HEAT
         elif hvac_mode == HVAC_MODE_COOL:
             self._hvac_mode = HVAC_MODE_COOL
         elif hvac_mode == HVAC_MODE_OFF:
             self._hvac_mode = HVAC_MODE_OFF
-        await self.async_update_ha_state()
+        self.async_schedule_state_write()
 
     async def async_set_preset_mode(self, preset_mode: str):
         """Set new preset mode."""
@@ -341,7 +457,7 @@ class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
             temp = self._attributes.get(self._preset_mode + "_temp", self._target_temp)
             self._target_temp = float(temp)
             await self.async_set_temperature(temperature=temp)
-        self.async_write_ha_state()
+        self.async_schedule_state_write()
         
     def init_presets_temps(self):
         for preset_mode in self.preset_modes:
@@ -355,17 +471,60 @@ class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
             _LOGGER.error("Wrong temperature: %s", temperature)
             return
         self._target_temp = float(temperature)
-        _LOGGER.debug("RLC_GW: %s !", to_hex_string(self.RLC_GW))
-        self.send_telegram(bytearray(self._sec_ti_key), self.RLC_GW, self.dev_id,2, MID=2, TSP=temperature)
-        self.RLC_GW = add_one_to_byte_list_num(self.RLC_GW)
-        self._attributes['RLC_GW'] = self.RLC_GW
+        self.usb_dongle.polling.async_mark_active(combine_hex(self.dev_id))
+        if self._preset_mode != PRESET_NONE:
+            self._attributes[self._preset_mode + "_temp"] = self._target_temp
+        self.async_schedule_state_write()
+        if not await self._async_send_setpoint_acked(temperature):
+            _LOGGER.warning("No acknowledge from heater %s", self.dev_name)
+
+    async def async_set_heater(self, temperature=None, preset_mode=None) -> bool:
+        """Apply a preset and/or a setpoint, return True once acknowledged.
+
+        Used by the set_heaters service: the setpoint telegram is sent even
+        when the preset does not change the target temperature.
+        """
+        if preset_mode is not None:
+            if self._preset_mode == PRESET_NONE:
+                self._saved_target_temp = self._target_temp
+            self._preset_mode = preset_mode
+            if temperature is None:
+                if preset_mode == PRESET_NONE:
+                    temperature = self._saved_target_temp
+                else:
+                    temperature = self._attributes.get(preset_mode + "_temp", self._target_temp)
+        self._target_temp = float(temperature)
         if self._preset_mode != PRESET_NONE:
             self._attributes[self._preset_mode + "_temp"] = self._target_temp
-        self.async_write_ha_state()
-        await self.async_update_ha_state()
-        async with self._telegram_received:
-            await asyncio.wait_for(self._telegram_received.wait(), timeout=1.0)
-            _LOGGER.debug("Acknowledge received !")
+        self.usb_dongle.polling.async_mark_active(combine_hex(self.dev_id))
+        self.async_schedule_state_write()
+        return await self._async_send_setpoint_acked(self._target_temp)
+
+    async def _async_send_setpoint_acked(self, temperature) -> bool:
+        """Send a setpoint until the heater acknowledges it, backing off between attempts.
+
+        The acknowledge timeout includes the time the telegram is expected
+        to wait in the transmit queue, so queued batches are not resent.
+        """
+        for attempt in range(ACK_RETRIES + 1):
+            try:
+                await self.usb_dongle.correlator.async_request(
+                    combine_hex(self.dev_id),
+                    _acknowledges_setpoint(float(temperature)),
+                    lambda: self._send_setpoint(temperature),
+                    timeout=ACK_TIMEOUT + self.usb_dongle.transmit.estimated_delay,
+                )
+                _LOGGER.debug("Acknowledge received !")
+                return True
+            except asyncio.TimeoutError:
+                if attempt < ACK_RETRIES:
+                    await asyncio.sleep(ACK_BACKOFF * 2**attempt * random.uniform(1, 1.5))
+        return False
+
+    def _send_setpoint(self, temperature):
+        """Send the setpoint telegram with the next RLC."""
+        _LOGGER.debug("RLC_GW: %s !", to_hex_string(self.RLC_GW))
+        self.send_telegram(2, MID=2, TSP=temperature)
 
     def value_changed(self, packet):
         #Async task for parsing message from the heater
@@ -376,36 +535,62 @@ class EquationHeater(EnOceanEntity, ClimateEntity, RestoreEntity):
         
         if packet.rorg == RORG.SEC_ENCAPS:
            _LOGGER.debug("RLC_RAD: %s !", to_hex_string(self.RLC_RAD))
-           Decode_packet = packet.decrypt(bytearray(self._sec_ti_key), self.RLC_RAD, SLF_TI=0x8B)
-           self.RLC_RAD = add_one_to_byte_list_num(Decode_packet[2]) if Decode_packet[1] == DECRYPT_RESULT.OK else self.RLC_RAD
-           self._attributes['RLC_RAD'] = self.RLC_RAD
+           stats = self.usb_dongle.stats
+           if stats is None:
+               decrypted = self._session.decrypt(packet)
+           else:
+               started = time.perf_counter()
+               decrypted = self._session.decrypt(packet)
+               stats.decrypt.observe(time.perf_counter() - started)
+           self._async_save_rlc()
+           self._attributes['rlc_resyncs'] = self._session.resyncs
+           self._attributes['rlc_max_skip'] = self._session.max_skip
+           if decrypted is None:
+               _LOGGER.warning("Secure telegram of %s rejected, rolling code out of window", self.dev_name)
            
-           if Decode_packet[1] == DECRYPT_RESULT.OK:
+           if decrypted is not None:
+               self.usb_dongle.polling.async_seen(combine_hex(self.dev_id))
                
-               Decode_packet[0].select_eep(0x33, 0x00)
-               Decode_packet[0].parse_eep()
-
-               if Decode_packet[0].parsed['MID']['raw_value'] == 8:
-                    async with self._telegram_received:
-                            self._telegram_received.notify()
-                    self._cur_temp = Decode_packet[0].parsed['INT']['value']
-                    if Decode_packet[0].parsed['HTF']['raw_value'] == 1:
+               decrypted.select_eep(0x33, 0x00)
+               decrypted.parse_eep()
+               self.usb_dongle.correlator.async_feed(combine_hex(self.dev_id), decrypted)
+
+               if decrypted.parsed['MID']['raw_value'] == 8:
+                    self._cur_temp = decrypted.parsed['INT']['value']
+                    if decrypted.parsed['HTF']['raw_value'] == 1:
                         _LOGGER.debug("Heater is active !")
                         self._hvac_mode = HVAC_MODE_HEAT
                     else:
                         _LOGGER.debug("Heater is idle !")
                         self._hvac_mode = HVAC_MODE_OFF
+                    self.telemetry.record(
+                        time.time(),
+                        self._cur_temp,
+                        self._target_temp,
+                        decrypted.parsed['HTF']['raw_value'] == 1,
+                    )
                
-               if (Decode_packet[0].parsed['MID']['raw_value'] == 8 and (Decode_packet[0].parsed['REQ']['raw_value'] == 0 or Decode_packet[0].parsed['REQ']['raw_value'] == 4)) or Decode_packet[0].parsed['MID']['raw_value'] > 8:
-                     self.send_telegram(bytearray(self._sec_ti_key), self.RLC_GW, self.dev_id,0, MID=0, REQ=15)
-                     self.RLC_GW = add_one_to_byte_list_num(self.RLC_GW)
-                     self._attributes['RLC_GW'] = self.RLC_GW
+               if (decrypted.parsed['MID']['raw_value'] == 8 and decrypted.parsed['REQ']['raw_value'] in SPONTANEOUS_STATUS_REQUESTS) or decrypted.parsed['MID']['raw_value'] > 8:
+                     self.send_telegram(0, priority=TX_PRIORITY_SECURE_ACK, MID=0, REQ=15)
                
-               self.async_write_ha_state()
-               await self.async_update_ha_state()
+               self.async_schedule_state_write()
 
     async def async_reset_rlc(self, rlc: list):
         _LOGGER.debug("set RLC !")
         self.usb_dongle.send_sec_ti(self._sec_ti_key,self.RLC_GW, self.dev_id)
         self.RLC_RAD = self.RLC_GW
+        self.usb_dongle.rlc_store.async_reset(
+            self._rlc_store_id, self._session.rlc_tx, self._session.rlc_rx
+        )
+
+    @property
+    def _rlc_store_id(self) -> str:
+        """Return the key of the heater in the rolling code store."""
+        return f"{combine_hex(self.dev_id):08X}"
+
+    def _async_save_rlc(self):
+        """Record the rolling codes of the session in the store."""
+        self.usb_dongle.rlc_store.async_update(
+            self._rlc_store_id, self._session.rlc_tx, self._session.rlc_rx
+        )
         
\ No newline at end of file
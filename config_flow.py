@@ -3,17 +3,25 @@
 import voluptuous as vol
 import logging
 import copy
+import os
 import re
 from typing import Any, TypedDict, cast
 from homeassistant import config_entries
 from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
 from datetime import timedelta, datetime
-from homeassistant.const import CONF_DEVICE, CONF_DEVICES, CONF_ID
+from homeassistant.const import CONF_DEVICE, CONF_DEVICES, CONF_ID, Platform
 from enoceanjob.utils import to_hex_string
 
 from . import dongle
-from .const import DOMAIN, ERROR_INVALID_DONGLE_PATH, LOGGER, PLATFORMS
+from .const import (
+    CONF_TRANSPORT,
+    DOMAIN,
+    ERROR_INVALID_DONGLE_PATH,
+    LOGGER,
+    PLATFORMS,
+    TRANSPORT_REPLAY,
+)
 
 from .config_schema import (
     CONF_NAME,
@@ -27,7 +35,12 @@ from .config_schema import (
     CONF_RLC,
     CONF_ADDED_DEVICE,
     CONF_DEVICE_TYPE,
+    CONF_EEP,
+    CONF_SENSOR_TYPE,
+    SENSOR_TYPE_TEMPERATURE,
+    SENSOR_TYPES,
 )
+from .eep import A5_LINEAR_EEPS
 
 PLATFORMS_DICT = {ptf:ptf for ptf in PLATFORMS}
 
@@ -117,6 +130,9 @@ class EnOceanFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     async def validate_enocean_conf(self, user_input) -> bool:
         """Return True if the user_input contains a valid dongle path."""
         dongle_path = user_input[CONF_DEVICE]
+        if user_input.get(CONF_TRANSPORT) == TRANSPORT_REPLAY:
+            # The path of a replayed dongle is a capture file
+            return await self.hass.async_add_executor_job(os.path.isfile, dongle_path)
         path_is_valid = await self.hass.async_add_executor_job(
             dongle.validate_path, dongle_path
         )
@@ -166,8 +182,15 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             if climate_step_valid(self, user_input):
                 user_input[CONF_ID] = eval(user_input[CONF_ID])
-                user_input.update({CONF_SEC_TI_KEY: list(bytearray.fromhex("869FAB7D296C9E48CEBFF34DF637358A"))})
-                user_input.update({CONF_RLC: [0x00] * 3})
+                if user_input[CONF_DEVICE_TYPE] == Platform.CLIMATE:
+                    user_input.pop(CONF_SENSOR_TYPE, None)
+                    user_input.pop(CONF_EEP, None)
+                    user_input.update({CONF_SEC_TI_KEY: list(bytearray.fromhex("869FAB7D296C9E48CEBFF34DF637358A"))})
+                    user_input.update({CONF_RLC: [0x00] * 3})
+                elif eep := user_input.get(CONF_EEP, "").strip().upper():
+                    user_input[CONF_EEP] = eep
+                else:
+                    user_input.pop(CONF_EEP, None)
                 enocean_id = to_hex_string(user_input[CONF_ID])
                 
                 self._data[CONF_DEVICES][enocean_id] = user_input
@@ -190,11 +213,17 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Required(CONF_DEVICE_TYPE, default=PLATFORMS[-1]): vol.In(PLATFORMS),
                 vol.Optional(CONF_MAX_TEMP, default=DEFAULT_MAX_TEMP): int,
                 vol.Optional(CONF_MIN_TEMP, default=DEFAULT_MIN_TEMP): int,
-                vol.Optional(CONF_NAME, default=DEFAULT_NAME): str}),
+                vol.Optional(CONF_NAME, default=DEFAULT_NAME): str,
+                vol.Optional(CONF_SENSOR_TYPE, default=SENSOR_TYPE_TEMPERATURE): vol.In(SENSOR_TYPES),
+                vol.Optional(CONF_EEP, default=""): str}),
             errors=self._errors
         )
 
 def climate_step_valid(self, user_input):
+    eep = user_input.get(CONF_EEP, "").strip().upper()
+    if user_input.get(CONF_DEVICE_TYPE) == Platform.SENSOR and eep and eep not in A5_LINEAR_EEPS:
+        self._errors[CONF_EEP] = "invalid_eep"
+        return False
     return True
 
     # async def async_step_init(self, user_input={}):
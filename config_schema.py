@@ -42,6 +42,24 @@ CONF_RLC = 'sec_ti_rlc'
 CONF_DEVICE_TYPE = 'device_type'
 CONF_DEVICE_TYPES = ['climate', 'sensor']
 CONF_ADDED_DEVICE = 'added_device'
+CONF_SENSOR_TYPE = 'sensor_type'
+CONF_EEP = 'eep'
+
+SENSOR_TYPE_HUMIDITY = "humidity"
+SENSOR_TYPE_POWER = "powersensor"
+SENSOR_TYPE_TEMPERATURE = "temperature"
+SENSOR_TYPE_WINDOWHANDLE = "windowhandle"
+SENSOR_TYPE_DOORDETECTOR = "doordetector"
+SENSOR_TYPE_DBM = "dbmlevel"
+# Created along with the power sensors
+SENSOR_TYPE_ENERGY = "energy"
+SENSOR_TYPES = [
+    SENSOR_TYPE_TEMPERATURE,
+    SENSOR_TYPE_HUMIDITY,
+    SENSOR_TYPE_POWER,
+    SENSOR_TYPE_WINDOWHANDLE,
+    SENSOR_TYPE_DOORDETECTOR,
+]
 SUPPORT_FLAGS = (SUPPORT_TARGET_TEMPERATURE)
 
 CLIMATE_SCHEMA = {
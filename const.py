@@ -9,9 +9,47 @@ ENOCEAN_DONGLE = "dongle"
 
 ERROR_INVALID_DONGLE_PATH = "invalid_dongle_path"
 
-SIGNAL_RECEIVE_MESSAGE = "enocean.receive_message"
 SIGNAL_SEND_MESSAGE = "enocean.send_message"
 
+# Dongle options (YAML import / config entry data)
+CONF_RX_MAX_BATCH = "rx_max_batch"
+CONF_RX_FLUSH_INTERVAL = "rx_flush_interval"
+CONF_TRANSPORT = "transport"
+CONF_TX_DUTY_CYCLE = "tx_duty_cycle"
+CONF_TX_DUTY_WINDOW = "tx_duty_window"
+CONF_TX_MIN_GAP = "tx_min_gap"
+CONF_CAPTURE_PATH = "capture_path"
+CONF_CAPTURE_MAX_BYTES = "capture_max_bytes"
+CONF_CAPTURE_BACKUP_COUNT = "capture_backup_count"
+CONF_REPLAY_SPEED = "replay_speed"
+CONF_STATS = "stats"
+CONF_POLL_MIN_INTERVAL = "poll_min_interval"
+CONF_POLL_MAX_INTERVAL = "poll_max_interval"
+CONF_STATE_WRITE_INTERVAL = "state_write_interval"
+
+TRANSPORT_SERIAL = "serial"
+TRANSPORT_ASYNCIO = "asyncio"
+# Replays the capture file given as device path
+TRANSPORT_REPLAY = "replay"
+TRANSPORTS = [TRANSPORT_SERIAL, TRANSPORT_ASYNCIO, TRANSPORT_REPLAY]
+
+DEFAULT_RX_MAX_BATCH = 64
+DEFAULT_RX_FLUSH_INTERVAL = 0.02
+RX_BUFFER_SIZE = 2048
+DEFAULT_TX_DUTY_CYCLE = 1.0
+DEFAULT_TX_DUTY_WINDOW = 60.0
+DEFAULT_TX_MIN_GAP = 0.05
+DEFAULT_CAPTURE_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_CAPTURE_BACKUP_COUNT = 3
+DEFAULT_REPLAY_SPEED = 1.0
+# Seconds between two state writes of an entity, 0 writes once per loop iteration
+DEFAULT_STATE_WRITE_INTERVAL = 0.0
+
+# Transmit priorities, lower is sent first
+TX_PRIORITY_SECURE_ACK = 0
+TX_PRIORITY_COMMAND = 1
+TX_PRIORITY_POLL = 2
+
 LOGGER = logging.getLogger(__package__)
 
 # PLATFORMS = [
@@ -0,0 +1,129 @@
+"""Request/response correlation for EnOcean telegrams."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_REPLY_TIMEOUT = 1.0
+
+
+class ReplyCorrelator:
+    """Match received telegrams with the replies callers are waiting for.
+
+    A caller registers the reply it expects from a sender with a predicate
+    and gets a future resolved by the first matching telegram. Expected
+    replies of a sender are matched in registration order and a telegram
+    resolves at most one of them. The future fails with asyncio.TimeoutError
+    when no reply arrives in time; cancelling it withdraws the expectation.
+
+    The dongle feeds every routed radio packet. Entities decoding secure
+    telegrams feed the decrypted message themselves, so predicates have to
+    tell both kinds of messages apart.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the correlator."""
+        self.hass = hass
+        self._pending: dict[int, list[tuple[Callable[[Any], bool], asyncio.Future]]] = {}
+
+    @property
+    def pending(self) -> bool:
+        """Return True when replies are expected."""
+        return bool(self._pending)
+
+    @callback
+    def async_expect(
+        self,
+        sender_id: int,
+        predicate: Callable[[Any], bool],
+        timeout: float = DEFAULT_REPLY_TIMEOUT,
+    ) -> asyncio.Future:
+        """Return a future resolved with the next message of sender_id matching predicate."""
+        loop = self.hass.loop
+        future = loop.create_future()
+        expectation = (predicate, future)
+        self._pending.setdefault(sender_id, []).append(expectation)
+
+        @callback
+        def _async_timeout():
+            if not future.done():
+                future.set_exception(asyncio.TimeoutError())
+
+        timer = loop.call_later(timeout, _async_timeout)
+
+        @callback
+        def _async_done(_future):
+            timer.cancel()
+            expectations = self._pending.get(sender_id)
+            if expectations is None:
+                return
+            if expectation in expectations:
+                expectations.remove(expectation)
+            if not expectations:
+                del self._pending[sender_id]
+
+        future.add_done_callback(_async_done)
+        return future
+
+    @callback
+    def async_feed(self, sender_id: int, message) -> bool:
+        """Resolve the oldest expected reply of sender_id matched by message."""
+        expectations = self._pending.get(sender_id)
+        if not expectations:
+            return False
+        for predicate, future in expectations:
+            if future.done():
+                continue
+            try:
+                matched = predicate(message)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error while matching reply %s", message)
+                continue
+            if matched:
+                future.set_result(message)
+                return True
+        return False
+
+    async def async_request(
+        self,
+        sender_id: int,
+        predicate: Callable[[Any], bool],
+        send: Callable[[], None],
+        *,
+        timeout: float = DEFAULT_REPLY_TIMEOUT,
+        retries: int = 0,
+    ):
+        """Call send and return the reply of sender_id matched by predicate.
+
+        send is called again, up to retries times, when no reply arrives
+        within timeout. asyncio.TimeoutError is raised when all attempts
+        failed.
+        """
+        for attempt in range(retries + 1):
+            future = self.async_expect(sender_id, predicate, timeout)
+            send()
+            try:
+                return await future
+            except asyncio.TimeoutError:
+                if attempt == retries:
+                    raise
+                _LOGGER.debug(
+                    "No reply from %s, retrying (%d/%d)",
+                    hex(sender_id),
+                    attempt + 1,
+                    retries,
+                )
+
+    @callback
+    def async_cancel_all(self) -> None:
+        """Cancel all the expected replies."""
+        for expectations in list(self._pending.values()):
+            for _predicate, future in list(expectations):
+                future.cancel()
+        self._pending.clear()
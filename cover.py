@@ -25,7 +25,7 @@ from homeassistant.helpers.dispatcher import dispatcher_send
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
-from .const import SIGNAL_SEND_MESSAGE
+from .const import SIGNAL_SEND_MESSAGE, TX_PRIORITY_COMMAND, TX_PRIORITY_POLL
 from .device import EnOceanEntity
 
 _LOGGER = logging.getLogger(__name__)
@@ -72,6 +72,11 @@ class EnOceanCoverCommand(Enum):
     QUERY_POSITION = 3
 
 
+def _is_position_reply(packet) -> bool:
+    """Return True for a D2-05-00 reply position and angle telegram (CMD 4)."""
+    return packet.data[0] == RORG.VLD and len(packet.data) >= 10 and packet.data[4] & 0x0F == 4
+
+
 class EnOceanCover(EnOceanEntity, CoverEntity):
     """Representation of an EnOcean Cover (EEP D2-05-00)."""
 
@@ -215,10 +220,14 @@ class EnOceanCover(EnOceanEntity, CoverEntity):
         else:
             self._is_closed = False
 
-        self.schedule_update_ha_state()
+        self.async_schedule_state_write()
 
     def send_telegram(self, command: EnOceanCoverCommand, position: int = 0):
-        """Send an EnOcean telegram with the respective command."""
+        """Send an EnOcean telegram with the respective command.
+
+        A position or stop command still waiting in the transmit queue is
+        replaced by the new one, only the latest movement is sent.
+        """
         packet = RadioPacket.create(
             rorg=RORG.VLD,
             rorg_func=0x05,
@@ -228,7 +237,26 @@ class EnOceanCover(EnOceanEntity, CoverEntity):
             command=command.value,
             POS=position,
         )
-        dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, packet)
+        if command == EnOceanCoverCommand.QUERY_POSITION:
+            priority = TX_PRIORITY_POLL
+            coalesce_key = (combine_hex(self.dev_id), "query")
+        else:
+            priority = TX_PRIORITY_COMMAND
+            coalesce_key = (combine_hex(self.dev_id), "movement")
+        dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, packet, priority, coalesce_key)
+
+    async def async_query_position(self):
+        """Query the current position and wait for the position reply.
+
+        The reply itself is handled by value_changed. Raise
+        asyncio.TimeoutError when the cover does not answer.
+        """
+        await self.usb_dongle.correlator.async_request(
+            combine_hex(self.dev_id),
+            _is_position_reply,
+            lambda: self.send_telegram(EnOceanCoverCommand.QUERY_POSITION),
+            timeout=WATCHDOG_TIMEOUT,
+        )
 
     def start_or_feed_watchdog(self):
         """Start or feed the 'movement stop' watchdog."""
@@ -258,19 +286,21 @@ class EnOceanCover(EnOceanEntity, CoverEntity):
                 return
 
             if self._watchdog_seconds_remaining <= 0:
-                self.send_telegram(EnOceanCoverCommand.QUERY_POSITION)
+                try:
+                    await self.async_query_position()
+                except asyncio.TimeoutError:
+                    self._watchdog_queries_remaining -= 1
+
+                    if self._watchdog_queries_remaining == 0:
+                        _LOGGER.debug(
+                            "'Movement stop' watchdog max query limit reached. Disabling watchdog and setting state to 'unknown'"
+                        )
+                        self._position = None
+                        self._is_closed = None
+                        self._is_opening = False
+                        self._is_closing = False
+                        return
                 self._watchdog_seconds_remaining = WATCHDOG_TIMEOUT
-                self._watchdog_queries_remaining -= 1
-
-                if self._watchdog_queries_remaining == 0:
-                    _LOGGER.debug(
-                        "'Movement stop' watchdog max query limit reached. Disabling watchdog and setting state to 'unknown'"
-                    )
-                    self._position = None
-                    self._is_closed = None
-                    self._is_opening = False
-                    self._is_closing = False
-                    return
                 continue
 
             self._watchdog_seconds_remaining -= WATCHDOG_INTERVAL
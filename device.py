@@ -1,17 +1,24 @@
 """Representation of an EnOcean device."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Iterable
 import logging
+import time
+from typing import Any
 
 from enoceanjob.protocol.packet import Packet, RadioPacket
 from enoceanjob.protocol.constants import RORG
 from enoceanjob.utils import combine_hex, to_hex_string
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 
-from homeassistant.helpers.dispatcher import async_dispatcher_connect, dispatcher_send
+from homeassistant.helpers.dispatcher import dispatcher_send
 from homeassistant.helpers.entity import Entity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.restore_state import RestoreEntity
 
-from .const import SIGNAL_RECEIVE_MESSAGE, SIGNAL_SEND_MESSAGE
+from .const import DATA_ENOCEAN, ENOCEAN_DONGLE, SIGNAL_SEND_MESSAGE, TX_PRIORITY_COMMAND
 
 from .config_schema import (
     CONF_NAME,
@@ -30,6 +37,125 @@ from .config_schema import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# Shared EnOceanDevice objects, by sender ID, in hass.data[DATA_ENOCEAN]
+DATA_DEVICES = "devices"
+
+
+class EnOceanDevice:
+    """A sender whose telegrams are decoded once for all its entities.
+
+    The device subscribes to the telegrams of its sender while at least one
+    of its entities is added. Each telegram updates the state shared by the
+    entities (last seen time, signal strength, packet count and, once
+    enabled by track_signal, the recent signal strengths), is decoded once
+    by decode into a typed result, and the result is pushed by
+    async_dispatch to the entities returned by entities_for.
+
+    Entities of a device are grouped under one Home Assistant device,
+    identified by the sender ID.
+    """
+
+    def __init__(self, dev_id, dev_name: str, eep: str | None = None):
+        """Initialize the device."""
+        self.dev_id = dev_id
+        self.dev_name = dev_name
+        self.eep = eep
+        self.sender_id = combine_hex(dev_id)
+        # Reception time (seconds since the epoch) and dBm of the last telegram
+        self.last_seen: float | None = None
+        self.rssi: int | None = None
+        self.packets = 0
+        # Reception time and dBm of the last telegrams, when tracked
+        self.signal_window: deque[tuple[float, int]] | None = None
+        self._entities: list = []
+        self._unsubscribe: Callable[[], None] | None = None
+        self._stats = None
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the info of the Home Assistant device of the sender."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, f"{self.sender_id:08X}")},
+            name=self.dev_name,
+            manufacturer="EnOcean",
+            model=self.eep or "EnOcean device",
+        )
+
+    def track_signal(self, size: int) -> None:
+        """Keep the reception time and dBm of the last size telegrams."""
+        if self.signal_window is None or self.signal_window.maxlen < size:
+            self.signal_window = deque(self.signal_window or (), maxlen=size)
+
+    @callback
+    def async_attach(self, usb_dongle, entity) -> Callable[[], None]:
+        """Push the decoded telegrams to an added entity, return a callable detaching it."""
+        if not self._entities:
+            self._stats = usb_dongle.stats
+            self._unsubscribe = usb_dongle.async_register_device(
+                self.sender_id, self._async_message_received
+            )
+        self._entities.append(entity)
+
+        @callback
+        def async_detach():
+            self._entities.remove(entity)
+            if not self._entities and self._unsubscribe is not None:
+                self._unsubscribe()
+                self._unsubscribe = None
+
+        return async_detach
+
+    @callback
+    def _async_message_received(self, packet: RadioPacket) -> None:
+        """Update the shared state, decode the telegram and dispatch it."""
+        self.last_seen = now = time.time()
+        self.rssi = dbm = packet.dBm
+        self.packets += 1
+        if self.signal_window is not None:
+            self.signal_window.append((now, dbm))
+        if (reading := self.decode(packet)) is not None:
+            self.async_dispatch(reading)
+
+    def decode(self, packet: RadioPacket) -> Any:
+        """Return the decoded telegram, None to ignore it."""
+        return None
+
+    def entities_for(self, reading: Any) -> Iterable:
+        """Return the entities updated by a decoded telegram."""
+        return self._entities
+
+    @callback
+    def async_dispatch(self, reading: Any) -> None:
+        """Push a decoded telegram to its entities."""
+        stats = self._stats
+        for entity in self.entities_for(reading):
+            if stats is None:
+                entity.async_device_updated(reading)
+                continue
+            started = time.perf_counter()
+            entity.async_device_updated(reading)
+            stats.observe_value_changed(entity.entity_id, time.perf_counter() - started)
+
+
+@callback
+def async_get_device(
+    hass: HomeAssistant, device_class: type[EnOceanDevice], dev_id, dev_name: str, **kwargs
+) -> EnOceanDevice:
+    """Return the device of a sender, created on first use.
+
+    Entities configured separately for the same sender share its device,
+    unless they need different kinds of devices.
+    """
+    devices = hass.data.setdefault(DATA_ENOCEAN, {}).setdefault(DATA_DEVICES, {})
+    sender_id = combine_hex(dev_id)
+    device = devices.get(sender_id)
+    if type(device) is not device_class:
+        if device is not None:
+            _LOGGER.warning("%s is configured as several kinds of devices", dev_name)
+            return device_class(dev_id, dev_name, **kwargs)
+        device = devices[sender_id] = device_class(dev_id, dev_name, **kwargs)
+    return device
+
 
 class EnOceanEntity(Entity):
     """Parent class for all entities associated with the EnOcean component."""
@@ -37,6 +163,10 @@ class EnOceanEntity(Entity):
     _attr_has_entity_name = True
     _attr_should_poll = False
 
+    # Pending coalesced state write
+    _state_write_handle = None
+    _last_state_write = 0.0
+
     def __init__(self, dev_id, dev_name="EnOcean device"):
         """Initialize the device."""
         self.dev_id = dev_id
@@ -56,31 +186,80 @@ class EnOceanEntity(Entity):
 
     async def async_added_to_hass(self):
         """Register callbacks."""
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_RECEIVE_MESSAGE, self._message_received_callback
-            )
+        self.usb_dongle = self.hass.data[DATA_ENOCEAN][ENOCEAN_DONGLE]
+        self.async_on_remove(self._async_subscribe())
+        self.async_on_remove(self._async_cancel_state_write)
+
+    @callback
+    def _async_subscribe(self):
+        """Subscribe to the packets of the device, return a callable unsubscribing.
+
+        Entities fed by an object decoding the packets for them override it.
+        """
+        return self.usb_dongle.async_register_device(
+            combine_hex(self.dev_id), self._message_received_callback
+        )
+
+    @callback
+    def async_schedule_state_write(self) -> None:
+        """Write the state once the updates of the current burst are done.
+
+        The entity is only marked dirty: its state is written once, on the
+        next loop iteration, whatever the number of updates until then. With
+        the state_write_interval dongle option, writes are also spaced by at
+        least that many seconds.
+        """
+        if self._state_write_handle is not None:
+            return
+        delay = self.usb_dongle.state_write_interval - (
+            time.monotonic() - self._last_state_write
         )
+        if delay > 0:
+            self._state_write_handle = self.hass.loop.call_later(
+                delay, self._async_flush_state_write
+            )
+        else:
+            self._state_write_handle = self.hass.loop.call_soon(
+                self._async_flush_state_write
+            )
+
+    @callback
+    def _async_flush_state_write(self) -> None:
+        """Write the state of the entity marked dirty."""
+        self._state_write_handle = None
+        self._last_state_write = time.monotonic()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_state_write(self) -> None:
+        """Drop the pending state write of a removed entity."""
+        if self._state_write_handle is not None:
+            self._state_write_handle.cancel()
+            self._state_write_handle = None
 
     def _message_received_callback(self, packet: RadioPacket):
-        """Handle incoming packets."""
-        
-        if packet.sender_int == combine_hex(self.dev_id):# and packet.rorg != RORG.SEC_ENCAPS:
-            self.received_signal_strength(packet.dBm)
+        """Handle incoming packets, the dongle only routes the ones sent by this device."""
+        stats = self.usb_dongle.stats
+        if stats is None:
             self.value_changed(packet)
+            return
+        started = time.perf_counter()
+        self.value_changed(packet)
+        stats.observe_value_changed(self.entity_id, time.perf_counter() - started)
 
     def value_changed(self, packet):
         """Update the internal state of the device when a packet arrives."""
         #To be overrided by platforms
 
-    def received_signal_strength(self, dbm:int =0):
-        """Update signal strength"""
+    def send_command(self, data, optional, packet_type, priority=TX_PRIORITY_COMMAND, coalesce_key=None):
+        """Send a command via the EnOcean dongle.
 
-    def send_command(self, data, optional, packet_type):
-        """Send a command via the EnOcean dongle."""
+        A command queued with the coalesce_key of a command not sent yet
+        replaces it.
+        """
 
         packet = Packet(packet_type, data=data, optional=optional)
-        dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, packet)
+        dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, packet, priority, coalesce_key)
 
 class EquationHeaterEntity(EnOceanEntity, RestoreEntity):
 
@@ -1,47 +1,231 @@
 """This shall be the representation of an EnOcean dongle."""
 import glob
 import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
 from os.path import basename, normpath
 
 from enoceanjob.communicators import SerialCommunicator
 from homeassistant.helpers.reload import async_setup_reload_service
-from enoceanjob.protocol.packet import RadioPacket, SECTeachInPacket
+from enoceanjob.protocol.constants import PACKET, RORG
+from enoceanjob.protocol.packet import Packet, RadioPacket, SECTeachInPacket
 from enoceanjob.utils import combine_hex
 import serial
 
-from homeassistant.helpers.dispatcher import async_dispatcher_connect, dispatcher_send
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant import core
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.const import CONF_DEVICE
+from homeassistant.const import CONF_DEVICE, CONF_DEVICES, EVENT_HOMEASSISTANT_STOP
 
-from .const import SIGNAL_RECEIVE_MESSAGE, SIGNAL_SEND_MESSAGE, DOMAIN
+from .const import (
+    CONF_CAPTURE_BACKUP_COUNT,
+    CONF_CAPTURE_MAX_BYTES,
+    CONF_CAPTURE_PATH,
+    CONF_POLL_MAX_INTERVAL,
+    CONF_POLL_MIN_INTERVAL,
+    CONF_REPLAY_SPEED,
+    CONF_RX_FLUSH_INTERVAL,
+    CONF_RX_MAX_BATCH,
+    CONF_STATE_WRITE_INTERVAL,
+    CONF_STATS,
+    CONF_TRANSPORT,
+    CONF_TX_DUTY_CYCLE,
+    CONF_TX_DUTY_WINDOW,
+    CONF_TX_MIN_GAP,
+    DEFAULT_CAPTURE_BACKUP_COUNT,
+    DEFAULT_CAPTURE_MAX_BYTES,
+    DEFAULT_REPLAY_SPEED,
+    DEFAULT_RX_FLUSH_INTERVAL,
+    DEFAULT_RX_MAX_BATCH,
+    DEFAULT_STATE_WRITE_INTERVAL,
+    DEFAULT_TX_DUTY_CYCLE,
+    DEFAULT_TX_DUTY_WINDOW,
+    DEFAULT_TX_MIN_GAP,
+    DOMAIN,
+    RX_BUFFER_SIZE,
+    SIGNAL_SEND_MESSAGE,
+    TRANSPORT_ASYNCIO,
+    TRANSPORT_REPLAY,
+    TRANSPORT_SERIAL,
+    TX_PRIORITY_COMMAND,
+)
+from .capture import ReplayCommunicator, TelegramCapture
+from .config_schema import CONF_DEVICE_TYPE
+from .chaining import ChainReassembler
+from .correlation import ReplyCorrelator
+from .eep import attach_parse_cache
+from .esp3 import AsyncSerialCommunicator
+from .polling import (
+    DEFAULT_POLL_MAX_INTERVAL,
+    DEFAULT_POLL_MIN_INTERVAL,
+    PollingScheduler,
+    poll_spacing,
+)
+from .rlc_store import RLCStore
+from .schedule import PresetScheduler
+from .startup import StartupScheduler
+from .stats import DongleStats
+from .transmit import TransmitScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
+# Common command enabling the transparent mode used by secure devices
+CO_WR_TRANSPARENT_MODE = 0x3E
+TRANSPARENT_MODE_ON = 0x01
+
+# Pending event loop wakeups for the receive buffer
+_RX_WAKEUP_TIMER = 1
+_RX_WAKEUP_NOW = 2
+
 class EnOceanDongle:
     """Representation of an EnOcean dongle.
 
     The dongle is responsible for receiving the ENOcean frames,
     creating devices if needed, and dispatching messages to platforms.
+
+    Radio packets are routed by sender ID: entities subscribe to the
+    packets of their own device with async_register_device, so every
+    telegram only reaches its subscribers. Listeners interested in all
+    the traffic (sniffers, teach-in helpers...) use async_register_wildcard.
+
+    The communicator thread does not call into the event loop for every
+    packet: packets are pushed into a bounded FIFO buffer which is drained
+    on the loop in batches of at most rx_max_batch packets, at the latest
+    rx_flush_interval seconds after the first buffered packet. A single
+    FIFO is used, so the packets of a sender are always delivered in the
+    order they were received. When the buffer overflows, the oldest packets
+    are dropped: this may leave gaps in a sender's packets but never
+    reorders them.
+
+    With the "asyncio" transport, the serial port is read on the event loop
+    by AsyncSerialCommunicator and packets are routed straight away, with
+    neither the communicator thread nor the receive buffer.
+
+    Outgoing telegrams go through a TransmitScheduler which paces them,
+    serves secure acks before user commands and polls, and replaces
+    superseded commands still waiting in the queue.
+
+    Callers waiting for the reply of a device register it on the
+    ReplyCorrelator, which is fed with every routed packet.
+
+    The rolling codes of the secure devices are persisted by the RLCStore.
+    Transparent mode is enabled once the communicator is started, and the
+    initial device queries go through the StartupScheduler. Periodic
+    status queries go through the PollingScheduler, and the weekly preset
+    schedules of the heaters are run by the PresetScheduler.
+
+    When capture_path is set, every frame received by the asyncio transport
+    is appended, as received, to a capture file which the "replay"
+    transport can feed back through the callback.
+
+    Entities coalesce their state writes, writing at most once every
+    state_write_interval seconds (once per loop iteration when 0).
+
+    When the "stats" option is enabled, stats holds the DongleStats of the
+    hot paths, shown by diagnostic sensors; it is None otherwise.
     """
-    
 
     def __init__(self, hass: core.HomeAssistant, config_entry: ConfigEntry):
         """Initialize the EnOcean dongle."""
         self.config_entry = config_entry
-        self._communicator = SerialCommunicator(
-            port=config_entry.data[CONF_DEVICE], callback=self.callback
-        )
+        transport = config_entry.data.get(CONF_TRANSPORT, TRANSPORT_SERIAL)
+        if transport == TRANSPORT_ASYNCIO:
+            self._communicator = AsyncSerialCommunicator(
+                port=config_entry.data[CONF_DEVICE], callback=self.async_callback
+            )
+        elif transport == TRANSPORT_REPLAY:
+            self._communicator = ReplayCommunicator(
+                config_entry.data[CONF_DEVICE],
+                callback=self.callback,
+                speed=config_entry.data.get(CONF_REPLAY_SPEED, DEFAULT_REPLAY_SPEED),
+            )
+        else:
+            self._communicator = SerialCommunicator(
+                port=config_entry.data[CONF_DEVICE], callback=self.callback
+            )
         self.serial_path = config_entry.data[CONF_DEVICE]
         self.identifier = basename(normpath(config_entry.data[CONF_DEVICE]))
         self.hass = hass
         self.dispatcher_disconnect_handle = None
+        self._device_listeners: dict[int, tuple] = {}
+        self._wildcard_listeners: tuple = ()
+        self.heaters: dict[str, Any] = {}
+        self.device_index: dict[str, list[dict[str, Any]]] = {}
+        self.async_index_devices()
+        self.schedule = PresetScheduler(hass, self.heaters)
+        self._rx_max_batch = config_entry.data.get(CONF_RX_MAX_BATCH, DEFAULT_RX_MAX_BATCH)
+        self._rx_flush_interval = config_entry.data.get(
+            CONF_RX_FLUSH_INTERVAL, DEFAULT_RX_FLUSH_INTERVAL
+        )
+        self._rx_buffer: deque = deque(maxlen=RX_BUFFER_SIZE)
+        self._rx_lock = threading.Lock()
+        self._rx_wakeup = None
+        self._rx_timer = None
+        self._rx_dropped = 0
+        self._rx_dropped_reported = 0
+        self._rx_buffered_at = 0.0
+        self.stats = DongleStats() if config_entry.data.get(CONF_STATS, False) else None
+        self.state_write_interval = config_entry.data.get(
+            CONF_STATE_WRITE_INTERVAL, DEFAULT_STATE_WRITE_INTERVAL
+        )
+        duty_cycle = config_entry.data.get(CONF_TX_DUTY_CYCLE, DEFAULT_TX_DUTY_CYCLE)
+        self.transmit = TransmitScheduler(
+            hass,
+            self._transmit,
+            duty_cycle=duty_cycle,
+            window=config_entry.data.get(CONF_TX_DUTY_WINDOW, DEFAULT_TX_DUTY_WINDOW),
+            min_gap=config_entry.data.get(CONF_TX_MIN_GAP, DEFAULT_TX_MIN_GAP),
+            stats=self.stats,
+        )
+        self.correlator = ReplyCorrelator(hass)
+        self.chains = ChainReassembler()
+        self.rlc_store = RLCStore(hass)
+        self.startup = StartupScheduler(hass)
+        self.polling = PollingScheduler(
+            hass,
+            spacing=poll_spacing(duty_cycle),
+            min_interval=config_entry.data.get(CONF_POLL_MIN_INTERVAL, DEFAULT_POLL_MIN_INTERVAL),
+            max_interval=config_entry.data.get(CONF_POLL_MAX_INTERVAL, DEFAULT_POLL_MAX_INTERVAL),
+        )
+        self._capture = None
+        self._unsub_capture_stop = None
+        capture_path = config_entry.data.get(CONF_CAPTURE_PATH)
+        if capture_path and transport != TRANSPORT_ASYNCIO:
+            # The other transports only hand over parsed packets
+            _LOGGER.warning("Telegram capture needs the %s transport, disabled", TRANSPORT_ASYNCIO)
+        elif capture_path:
+            self._capture = TelegramCapture(
+                capture_path,
+                config_entry.data.get(CONF_CAPTURE_MAX_BYTES, DEFAULT_CAPTURE_MAX_BYTES),
+                config_entry.data.get(CONF_CAPTURE_BACKUP_COUNT, DEFAULT_CAPTURE_BACKUP_COUNT),
+            )
+            self._communicator.frame_listener = self._capture.write
         hass.data.setdefault(DOMAIN, {})[self.config_entry.entry_id] = self
     
     async def async_setup(self):
         """Finish the setup of the bridge and supported platforms."""
-        self._communicator.start()
-        self._communicator.get_dongle_info()
+        await self.rlc_store.async_load()
+        await self.schedule.async_load()
+        if self._capture is not None:
+            self._capture.start()
+            self._unsub_capture_stop = self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP, self._async_stop_capture
+            )
+        if isinstance(self._communicator, AsyncSerialCommunicator):
+            await self._communicator.async_start(self.hass.loop)
+            await self._communicator.async_get_dongle_info()
+            await self._communicator.async_send_command(
+                [CO_WR_TRANSPARENT_MODE, TRANSPARENT_MODE_ON]
+            )
+        else:
+            self._communicator.start()
+            self._communicator.get_dongle_info()
+            self._communicator.send(
+                Packet(PACKET.COMMON_COMMAND, data=[CO_WR_TRANSPARENT_MODE, TRANSPARENT_MODE_ON])
+            )
         self.dispatcher_disconnect_handle = async_dispatcher_connect(
             self.hass, SIGNAL_SEND_MESSAGE, self._send_message_callback
         )
@@ -51,24 +235,122 @@ class EnOceanDongle:
         if self.dispatcher_disconnect_handle:
             self.dispatcher_disconnect_handle()
             self.dispatcher_disconnect_handle = None
+        self.startup.async_cancel()
+        self.polling.async_stop()
+        self.schedule.async_stop()
+        self.transmit.async_stop()
+        self.correlator.async_cancel_all()
         self._communicator.stop()
+        if self._rx_timer:
+            self._rx_timer.cancel()
+            self._rx_timer = None
+
+    async def async_unload(self):
+        """Disconnect the callbacks and write the tail of the capture."""
+        self.unload()
+        if self._unsub_capture_stop is not None:
+            self._unsub_capture_stop()
+        await self._async_stop_capture()
+
+    async def _async_stop_capture(self, _event=None):
+        """Stop the capture once its queued frames are written."""
+        self._unsub_capture_stop = None
+        if self._capture is not None:
+            await self.hass.async_add_executor_job(self._capture.stop)
 
-    def _send_message_callback(self, command):
-        """Send a command through the EnOcean dongle."""
+    @core.callback
+    def _send_message_callback(self, command, priority=TX_PRIORITY_COMMAND, coalesce_key=None):
+        """Queue a command for the EnOcean dongle."""
+        self.transmit.async_enqueue(command, priority, coalesce_key)
+
+    def _transmit(self, command):
+        """Send a command (or a list of chained commands) through the EnOcean dongle."""
         if isinstance(command, list):
             self._communicator.send_list(command)
         else:
             self._communicator.send(command)
 
-    def send_message(self, command):
+    @core.callback
+    def send_message(self, command, priority=TX_PRIORITY_COMMAND, coalesce_key=None):
         """Send a command through the EnOcean dongle (public)."""
-        self._communicator.send(command)
+        self.transmit.async_enqueue(command, priority, coalesce_key)
 
+    @core.callback
     def send_sec_ti(self, Key, RLC, destination):
         SEC_TI_TELEGRAM = SECTeachInPacket.create_SECTI_chain(Key=Key, RLC=RLC, SLF=0x8B, destination=destination)
+        # Sent at once: the secure telegrams still queued are encrypted when
+        # transmitted, with rolling codes following the one taught in
         self._communicator.send_list(SEC_TI_TELEGRAM[0])
 
 
+    @core.callback
+    def async_register_device(self, sender_id: int, listener) -> Callable[[], None]:
+        """Route the radio packets sent by sender_id to listener.
+
+        Return a callable removing the subscription.
+        """
+        # Listener tuples are replaced on change so routing never copies them
+        self._device_listeners[sender_id] = self._device_listeners.get(sender_id, ()) + (listener,)
+
+        @core.callback
+        def async_unregister():
+            listeners = tuple(
+                registered
+                for registered in self._device_listeners.get(sender_id, ())
+                if registered is not listener
+            )
+            if listeners:
+                self._device_listeners[sender_id] = listeners
+            else:
+                self._device_listeners.pop(sender_id, None)
+
+        return async_unregister
+
+    @core.callback
+    def async_register_wildcard(self, listener) -> Callable[[], None]:
+        """Route every received radio packet to listener.
+
+        Return a callable removing the subscription.
+        """
+        self._wildcard_listeners = self._wildcard_listeners + (listener,)
+
+        @core.callback
+        def async_unregister():
+            self._wildcard_listeners = tuple(
+                registered
+                for registered in self._wildcard_listeners
+                if registered is not listener
+            )
+
+        return async_unregister
+
+    @core.callback
+    def async_index_devices(self) -> None:
+        """Group the devices of the config entry by device type.
+
+        Built once, and again when the options flow adds a device, so the
+        platforms only read their own devices.
+        """
+        index: dict[str, list[dict[str, Any]]] = {}
+        for device in self.config_entry.data.get(CONF_DEVICES, {}).values():
+            index.setdefault(device.get(CONF_DEVICE_TYPE), []).append(device)
+        self.device_index = index
+
+    @core.callback
+    def async_register_heater(self, entity_id: str, heater) -> Callable[[], None]:
+        """Make a heater entity available to the set_heaters service.
+
+        Return a callable removing it.
+        """
+        self.heaters[entity_id] = heater
+
+        @core.callback
+        def async_unregister():
+            if self.heaters.get(entity_id) is heater:
+                del self.heaters[entity_id]
+
+        return async_unregister
+
     @property
     def communicator(self):
         """Set the communicator."""
@@ -80,10 +362,125 @@ class EnOceanDongle:
         This is the callback function called by python-enocan whenever there
         is an incoming packet.
         """
+        stats = self.stats
+        if stats is not None:
+            stats.frames += 1
+
+        if not isinstance(packet, RadioPacket):
+            return
+        _LOGGER.debug("Received radio packet: %s", packet)
 
+        with self._rx_lock:
+            if len(self._rx_buffer) == RX_BUFFER_SIZE:
+                # The deque drops the oldest packet on append
+                self._rx_dropped += 1
+            self._rx_buffer.append(packet)
+            if stats is not None and not self._rx_buffered_at:
+                self._rx_buffered_at = time.perf_counter()
+            if self._rx_wakeup == _RX_WAKEUP_NOW:
+                return
+            if len(self._rx_buffer) >= self._rx_max_batch:
+                self._rx_wakeup = _RX_WAKEUP_NOW
+                wakeup = self._async_drain_rx_buffer
+            elif self._rx_wakeup is None:
+                self._rx_wakeup = _RX_WAKEUP_TIMER
+                wakeup = self._async_schedule_rx_drain
+            else:
+                return
+        self.hass.loop.call_soon_threadsafe(wakeup)
+
+    @core.callback
+    def async_callback(self, packet):
+        """Handle a packet received by the asyncio communicator, on the event loop."""
+        if self.stats is not None:
+            self.stats.frames += 1
         if isinstance(packet, RadioPacket):
             _LOGGER.debug("Received radio packet: %s", packet)
-            dispatcher_send(self.hass, SIGNAL_RECEIVE_MESSAGE, packet)
+            if self.stats is None:
+                self._async_route_packet(packet)
+                return
+            started = time.perf_counter()
+            self._async_route_packet(packet)
+            self.stats.dispatch.observe(time.perf_counter() - started)
+
+    @core.callback
+    def _async_schedule_rx_drain(self):
+        """Drain the receive buffer once the flush interval is over."""
+        if self._rx_flush_interval <= 0:
+            self._async_drain_rx_buffer()
+            return
+        self._rx_timer = self.hass.loop.call_later(
+            self._rx_flush_interval, self._async_drain_rx_buffer
+        )
+
+    @core.callback
+    def _async_drain_rx_buffer(self):
+        """Route a batch of buffered packets on the event loop."""
+        if self._rx_timer is not None:
+            # A full batch is drained before the flush interval is over
+            self._rx_timer.cancel()
+            self._rx_timer = None
+        with self._rx_lock:
+            buffer = self._rx_buffer
+            batch = [buffer.popleft() for _ in range(min(len(buffer), self._rx_max_batch))]
+            pending = bool(buffer)
+            self._rx_wakeup = _RX_WAKEUP_NOW if pending else None
+            dropped = self._rx_dropped
+            buffered_at = self._rx_buffered_at
+            # The remaining packets were buffered now at the latest
+            self._rx_buffered_at = time.perf_counter() if pending and buffered_at else 0.0
+
+        stats = self.stats
+        if stats is not None and buffered_at:
+            stats.rx_wait.observe(time.perf_counter() - buffered_at)
+
+        if dropped != self._rx_dropped_reported:
+            _LOGGER.warning(
+                "Receive buffer full, %d packets dropped so far",
+                dropped,
+            )
+            self._rx_dropped_reported = dropped
+
+        if stats is None:
+            for packet in batch:
+                self._async_route_packet(packet)
+        else:
+            for packet in batch:
+                started = time.perf_counter()
+                self._async_route_packet(packet)
+                stats.dispatch.observe(time.perf_counter() - started)
+
+        if pending:
+            # Let other loop tasks run before the next batch
+            self.hass.loop.call_soon(self._async_drain_rx_buffer)
+
+    @core.callback
+    def _async_route_packet(self, packet: RadioPacket):
+        """Hand a radio packet to the wildcard listeners and to its sender's listeners.
+
+        Chained telegrams (CDM) are reassembled first: listeners only get
+        the complete telegrams. The packet gets a parse cache so its
+        listeners decode each EEP once.
+        """
+        if packet.rorg == RORG.CDM:
+            if (packet := self.chains.feed(packet)) is None:
+                return
+        attach_parse_cache(packet)
+        for listener in self._wildcard_listeners:
+            self._async_call_listener(listener, packet)
+        sender_id = packet.sender_int
+        for listener in self._device_listeners.get(sender_id, ()):
+            self._async_call_listener(listener, packet)
+        if self.correlator.pending:
+            self.correlator.async_feed(sender_id, packet)
+
+    @staticmethod
+    def _async_call_listener(listener, packet: RadioPacket):
+        """Call a listener, keeping a faulty one from breaking the routing."""
+        try:
+            listener(packet)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error while handling packet %s", packet)
 
 
 def detect():
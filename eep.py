@@ -0,0 +1,176 @@
+"""EEP decoding shared by the entities of a sender."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+
+from enoceanjob.protocol.packet import Packet
+
+EMPTY_PARSED: Mapping = MappingProxyType({})
+
+VALUE_TEMPERATURE = "temperature"
+VALUE_HUMIDITY = "humidity"
+
+
+def attach_parse_cache(packet: Packet) -> None:
+    """Give a packet an empty parse cache, done by the dongle before routing it."""
+    packet.eep_cache = {}
+
+
+def is_teach_in(packet: Packet) -> bool:
+    """Return True for a 4BS teach-in telegram, whose data bytes hold no values.
+
+    The LRN bit (DB0.3) of a 4BS telegram is cleared in teach-in telegrams.
+    """
+    return not packet.data[4] & 0x08
+
+
+def parse_eep(
+    packet: Packet,
+    rorg_func: int,
+    rorg_type: int,
+    direction: int | None = None,
+    command: int | None = None,
+) -> Mapping[str, Mapping]:
+    """Return the values of packet decoded with an EEP, as a read-only mapping.
+
+    Contrary to Packet.parse_eep, the packet is left untouched: the values
+    are cached on the packet by (rorg, func, type, direction, command), so
+    every entity handling the same telegram with the same EEP shares one
+    decoding. An empty mapping is returned when the profile is unknown.
+    """
+    key = (packet.rorg, rorg_func, rorg_type, direction, command)
+    cache = getattr(packet, "eep_cache", None)
+    if cache is not None and (parsed := cache.get(key)) is not None:
+        return parsed
+
+    eep = packet.eep
+    profile = eep.find_profile(
+        packet._bit_data, packet.rorg, rorg_func, rorg_type, direction, command
+    )
+    if profile is None:
+        parsed = EMPTY_PARSED
+    else:
+        _provides, values = eep.get_values(profile, packet._bit_data, packet._bit_status)
+        parsed = MappingProxyType(
+            {name: MappingProxyType(value) for name, value in values.items()}
+        )
+    if cache is not None:
+        cache[key] = parsed
+    return parsed
+
+
+@dataclass(frozen=True)
+class LinearValue:
+    """A value of an A5 (4BS) EEP linearly scaled from its raw value.
+
+    The raw value is the data byte at index (data[1] is DB3, data[3] is
+    DB1), or for 10 bits values the two low bits of that byte followed by
+    the next byte. Raw values range_min to range_max map to scale_min to
+    scale_max, rounded to decimals.
+    """
+
+    index: int
+    range_min: int
+    range_max: int
+    scale_min: float
+    scale_max: float
+    bits: int = 8
+    decimals: int = 1
+
+
+def _temperature(scale_min: float, scale_max: float) -> LinearValue:
+    """Return the 8 bits temperature of A5-02, raw 255 to 0."""
+    return LinearValue(3, 255, 0, scale_min, scale_max)
+
+
+def _temperature_10bits(scale_min: float, scale_max: float) -> LinearValue:
+    """Return a 10 bits temperature, raw 1023 to 0."""
+    return LinearValue(2, 1023, 0, scale_min, scale_max, bits=10)
+
+
+_HUMIDITY_250 = LinearValue(2, 0, 250, 0, 100)
+_ROOM_PANEL_TEMPERATURE = LinearValue(3, 255, 0, 0, 40)
+_ROOM_PANEL_HUMIDITY_TEMPERATURE = LinearValue(3, 0, 250, 0, 40)
+
+# Linear scaled values of the A5 EEPs, by EEP then value name
+A5_LINEAR_EEPS: dict[str, dict[str, LinearValue]] = {
+    **{
+        f"A5-02-{eep_type:02X}": {VALUE_TEMPERATURE: _temperature(low, low + 40)}
+        for eep_type, low in zip(range(0x01, 0x0C), range(-40, 61, 10))
+    },
+    **{
+        f"A5-02-{eep_type:02X}": {VALUE_TEMPERATURE: _temperature(low, low + 80)}
+        for eep_type, low in zip(range(0x10, 0x1C), range(-60, 51, 10))
+    },
+    "A5-02-20": {VALUE_TEMPERATURE: _temperature_10bits(-10, 41.2)},
+    "A5-02-30": {VALUE_TEMPERATURE: _temperature_10bits(-40, 62.3)},
+    "A5-04-01": {
+        VALUE_TEMPERATURE: LinearValue(3, 0, 250, 0, 40),
+        VALUE_HUMIDITY: _HUMIDITY_250,
+    },
+    "A5-04-02": {
+        VALUE_TEMPERATURE: LinearValue(3, 0, 250, -20, 60),
+        VALUE_HUMIDITY: _HUMIDITY_250,
+    },
+    "A5-04-03": {
+        VALUE_TEMPERATURE: LinearValue(2, 0, 1023, -20, 60, bits=10),
+        VALUE_HUMIDITY: LinearValue(1, 0, 255, 0, 100),
+    },
+    **{
+        f"A5-10-{eep_type:02X}": {VALUE_TEMPERATURE: _ROOM_PANEL_TEMPERATURE}
+        for eep_type in range(0x01, 0x0E)
+    },
+    **{
+        f"A5-10-{eep_type:02X}": {
+            VALUE_TEMPERATURE: _ROOM_PANEL_HUMIDITY_TEMPERATURE,
+            VALUE_HUMIDITY: _HUMIDITY_250,
+        }
+        for eep_type in range(0x10, 0x15)
+    },
+    **{
+        f"A5-10-{eep_type:02X}": {VALUE_TEMPERATURE: _temperature_10bits(-10, 41.2)}
+        for eep_type in range(0x15, 0x18)
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def compile_lut(value: LinearValue) -> tuple[float, ...]:
+    """Return the decoded value of every raw value (256 or 1024 entries).
+
+    Tables are shared by all the sensors decoding the same value.
+    """
+    ratio = (value.scale_max - value.scale_min) / (value.range_max - value.range_min)
+    return tuple(
+        round(value.scale_min + ratio * (raw - value.range_min), value.decimals)
+        for raw in range(1 << value.bits)
+    )
+
+
+class LinearDecoder:
+    """Decode a linear scaled value from the data of a 4BS telegram."""
+
+    __slots__ = ("value", "_lut", "_index", "_high_mask")
+
+    def __init__(self, value: LinearValue):
+        """Compile the lookup table of value."""
+        self.value = value
+        self._lut = compile_lut(value)
+        self._index = value.index
+        self._high_mask = (1 << (value.bits - 8)) - 1 if value.bits > 8 else 0
+
+    def __call__(self, data) -> float:
+        """Return the decoded value."""
+        if self._high_mask:
+            return self._lut[(data[self._index] & self._high_mask) << 8 | data[self._index + 1]]
+        return self._lut[data[self._index]]
+
+
+def linear_decoder(eep: str, name: str) -> LinearDecoder | None:
+    """Return the decoder of a value of an A5 EEP, None when it has no such value."""
+    if (value := A5_LINEAR_EEPS.get(eep.upper(), {}).get(name)) is None:
+        return None
+    return LinearDecoder(value)
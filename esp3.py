@@ -0,0 +1,256 @@
+"""Asyncio serial transport for EnOcean dongles (ESP3 protocol)."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import datetime
+import logging
+import queue
+
+from enoceanjob.protocol.constants import PACKET, PARSE_RESULT, RETURN_CODE
+from enoceanjob.protocol.packet import Packet, ResponsePacket, UTETeachInPacket
+import serial_asyncio
+
+_LOGGER = logging.getLogger(__name__)
+
+BAUDRATE = 57600
+
+ESP3_SYNC_BYTE = 0x55
+# Sync byte, data length (2), optional length, packet type and header CRC
+ESP3_HEADER_LENGTH = 6
+
+CO_RD_VERSION = 0x03
+CO_RD_IDBASE = 0x08
+
+RESPONSE_TIMEOUT = 1.0
+
+
+def _crc8_table(polynomial: int = 0x07) -> bytes:
+    """Return the lookup table of the ESP3 CRC8 (x^8 + x^2 + x + 1)."""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ polynomial) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data) -> int:
+    """Return the ESP3 CRC8 of a bytes-like object."""
+    crc = 0
+    table = CRC8_TABLE
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc
+
+
+class ESP3FrameParser:
+    """Incremental ESP3 frame parser.
+
+    Received bytes are appended to a single reusable buffer and inspected
+    through memoryviews, so no copy is made until a frame is complete.
+    Frames with a bad header or data CRC are skipped by resynchronising
+    on the next sync byte.
+    """
+
+    def __init__(self, frame_callback: Callable[[memoryview], None]):
+        """Initialize the parser.
+
+        The memoryview given to frame_callback is only valid during the call.
+        """
+        self._buffer = bytearray()
+        self._frame_callback = frame_callback
+        self.crc_errors = 0
+
+    def feed(self, data: bytes) -> None:
+        """Parse the received bytes, calling frame_callback for every complete frame."""
+        buffer = self._buffer
+        buffer += data
+        end = len(buffer)
+        position = 0
+        view = memoryview(buffer)
+        try:
+            while True:
+                start = buffer.find(ESP3_SYNC_BYTE, position)
+                if start < 0:
+                    position = end
+                    break
+                if end - start < ESP3_HEADER_LENGTH:
+                    position = start
+                    break
+                if crc8(view[start + 1:start + 5]) != buffer[start + 5]:
+                    self.crc_errors += 1
+                    position = start + 1
+                    continue
+
+                data_length = (buffer[start + 1] << 8) | buffer[start + 2]
+                frame_end = start + ESP3_HEADER_LENGTH + data_length + buffer[start + 3] + 1
+                if frame_end > end:
+                    position = start
+                    break
+                if crc8(view[start + ESP3_HEADER_LENGTH:frame_end - 1]) != buffer[frame_end - 1]:
+                    self.crc_errors += 1
+                    position = start + 1
+                    continue
+
+                frame = view[start:frame_end]
+                try:
+                    self._frame_callback(frame)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Error while handling ESP3 frame")
+                finally:
+                    frame.release()
+                position = frame_end
+        finally:
+            view.release()
+        del buffer[:position]
+
+
+def packet_from_frame(frame: memoryview) -> Packet | None:
+    """Build the packet object of a CRC checked ESP3 frame, None if it is invalid.
+
+    The frame goes through Packet.parse_msg, so every packet type (secure
+    teach-in, chained messages...) gets the class enoceanjob gives it.
+    """
+    status, _rest, packet = Packet.parse_msg(frame.tolist())
+    if status != PARSE_RESULT.OK:
+        return None
+    return packet
+
+
+class AsyncSerialCommunicator(asyncio.Protocol):
+    """EnOcean communicator running on the event loop.
+
+    Alternative to enoceanjob's threaded SerialCommunicator: the serial port
+    is read by an asyncio protocol and every parsed packet is handed to the
+    callback directly on the event loop, without thread or queue hop.
+    """
+
+    def __init__(self, port: str, callback: Callable[[Packet], None] | None = None, teach_in: bool = True):
+        """Initialize the communicator."""
+        self.port = port
+        # Swapped by the teach-in service, see swap_communicator_callback
+        self.callback = callback
+        # Called with every CRC checked frame, before it is parsed
+        self.frame_listener: Callable[[memoryview], None] | None = None
+        self.teach_in = teach_in
+        self._transport: asyncio.Transport | None = None
+        self._parser = ESP3FrameParser(self._frame_received)
+        self._response: asyncio.Future | None = None
+        self._command_lock = asyncio.Lock()
+        self._base_id = None
+        self.app_version = None
+        self.api_version = None
+        self.app_description = None
+        # Only filled while no callback is set, see the teach-in service
+        self.receive: queue.Queue = queue.Queue()
+
+    async def async_start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Open the serial port."""
+        await serial_asyncio.create_serial_connection(
+            loop, lambda: self, url=self.port, baudrate=BAUDRATE
+        )
+
+    def stop(self) -> None:
+        """Close the serial port."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def connection_made(self, transport) -> None:
+        """Store the serial transport."""
+        _LOGGER.info("Asyncio serial communicator started on %s", self.port)
+        self._transport = transport
+
+    def connection_lost(self, exc) -> None:
+        """Log the loss of the serial port."""
+        if exc is not None:
+            _LOGGER.error("Serial port %s lost: %s", self.port, exc)
+        self._transport = None
+        if self._response is not None and not self._response.done():
+            # The pending command gets no response
+            self._response.set_result(None)
+
+    def data_received(self, data: bytes) -> None:
+        """Feed the received bytes to the ESP3 parser."""
+        self._parser.feed(data)
+
+    def _frame_received(self, frame: memoryview) -> None:
+        """Dispatch a complete ESP3 frame."""
+        if self.frame_listener is not None:
+            self.frame_listener(frame)
+        if (packet := packet_from_frame(frame)) is None:
+            return
+        packet.received = datetime.datetime.now()
+
+        if packet.packet_type == PACKET.RESPONSE and self._response is not None:
+            if not self._response.done():
+                self._response.set_result(packet)
+            return
+
+        if isinstance(packet, UTETeachInPacket) and self.teach_in:
+            _LOGGER.info("Sending response to UTE teach-in")
+            self.send(packet.create_response_packet(self.base_id))
+
+        if self.callback is None:
+            self.receive.put(packet)
+        else:
+            self.callback(packet)
+
+    def send(self, packet: Packet) -> bool:
+        """Write a packet to the serial port."""
+        if not isinstance(packet, Packet):
+            _LOGGER.error("Object to send must be an instance of Packet")
+            return False
+        if self._transport is None:
+            _LOGGER.error("Cannot send packet, serial port %s is closed", self.port)
+            return False
+        self._transport.write(bytes(packet.build()))
+        return True
+
+    def send_list(self, packets: list[Packet]) -> bool:
+        """Write a list of packets (e.g. chained telegrams) to the serial port."""
+        return all([self.send(packet) for packet in packets])
+
+    async def async_send_command(self, data: list[int]) -> ResponsePacket | None:
+        """Send a common command and return the dongle's response."""
+        async with self._command_lock:
+            self._response = asyncio.get_running_loop().create_future()
+            try:
+                if not self.send(Packet(PACKET.COMMON_COMMAND, data=data)):
+                    return None
+                # Only the timeout is handled, cancellation goes to the caller
+                response = await asyncio.wait_for(self._response, RESPONSE_TIMEOUT)
+            except asyncio.TimeoutError:
+                response = None
+            finally:
+                self._response = None
+            if response is None:
+                _LOGGER.warning("No response to common command %s", hex(data[0]))
+            return response
+
+    async def async_get_dongle_info(self) -> None:
+        """Read the versions, description and base ID of the dongle."""
+        response = await self.async_send_command([CO_RD_VERSION])
+        if response is not None and response.data[0] == RETURN_CODE.OK and len(response.data) >= 33:
+            self.app_version = ".".join(str(byte) for byte in response.data[1:5])
+            self.api_version = ".".join(str(byte) for byte in response.data[5:9])
+            self.app_description = bytes(response.data[17:33]).split(b"\x00", 1)[0].decode("ascii", "replace")
+
+        response = await self.async_send_command([CO_RD_IDBASE])
+        if response is not None and response.data[0] == RETURN_CODE.OK and len(response.data) >= 5:
+            self._base_id = response.data[1:5]
+
+    @property
+    def base_id(self):
+        """Return the base ID read from the dongle at startup."""
+        return self._base_id
+
+    @base_id.setter
+    def base_id(self, base_id):
+        """Set the base ID manually."""
+        self._base_id = base_id
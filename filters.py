@@ -0,0 +1,78 @@
+"""Filters deciding which decoded values produce a state write."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+# Decisions of StateFilter.check
+FILTER_SKIP = 0
+FILTER_PUBLISH = 1
+FILTER_HEARTBEAT = 2
+FILTER_DEFER = 3
+
+
+@dataclass(frozen=True)
+class FilterConfig:
+    """Settings of a state filter, 0 disables a setting.
+
+    A numeric value is significant when it moved by at least deadband, and
+    by at least deadband_relative (a fraction) of the published value.
+    Significant values are published at most once every min_interval
+    seconds. An unchanged value is published again after heartbeat seconds.
+    """
+
+    deadband: float = 0.0
+    deadband_relative: float = 0.0
+    min_interval: float = 0.0
+    heartbeat: float = 0.0
+
+
+class StateFilter:
+    """Compare the decoded values of an entity with the last published one."""
+
+    __slots__ = ("config", "_published", "_published_at")
+
+    def __init__(self, config: FilterConfig):
+        """Initialize the filter."""
+        self.config = config
+        self._published = None
+        self._published_at: float | None = None
+
+    def _significant(self, value) -> bool:
+        """Return True when value differs enough from the published one."""
+        published = self._published
+        if value == published:
+            return False
+        if not isinstance(value, (int, float)) or not isinstance(published, (int, float)):
+            return True
+        change = abs(value - published)
+        return (
+            change >= self.config.deadband
+            and change >= self.config.deadband_relative * abs(published)
+        )
+
+    def check(self, value, now: float) -> int:
+        """Return what to do with a decoded value.
+
+        FILTER_PUBLISH and FILTER_HEARTBEAT write the state (the latter an
+        unchanged one), FILTER_DEFER writes it once the min_interval is
+        over, FILTER_SKIP does not write it.
+        """
+        if self._published_at is None:
+            return FILTER_PUBLISH
+        elapsed = now - self._published_at
+        if self._significant(value):
+            return FILTER_PUBLISH if elapsed >= self.config.min_interval else FILTER_DEFER
+        if self.config.heartbeat and elapsed >= self.config.heartbeat:
+            return FILTER_HEARTBEAT
+        return FILTER_SKIP
+
+    def remaining(self, now: float) -> float:
+        """Return the seconds until the min_interval is over."""
+        if self._published_at is None:
+            return 0.0
+        return max(self._published_at + self.config.min_interval - now, 0.0)
+
+    def published(self, value, now: float) -> None:
+        """Record the value written."""
+        self._published = value
+        self._published_at = now
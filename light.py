@@ -91,7 +91,9 @@ class EnOceanLight(EnOceanEntity, LightEntity):
         command = [0xA5, 0x02, bval, 0x01, 0x09]
         command.extend(self._sender_id)
         command.extend([0x00])
-        self.send_command(command, [], 0x01)
+        self.send_command(
+            command, [], 0x01, coalesce_key=(combine_hex(self._sender_id), "dim")
+        )
         self._on_state = True
 
     def turn_off(self, **kwargs):
@@ -99,7 +101,9 @@ class EnOceanLight(EnOceanEntity, LightEntity):
         command = [0xA5, 0x02, 0x00, 0x01, 0x09]
         command.extend(self._sender_id)
         command.extend([0x00])
-        self.send_command(command, [], 0x01)
+        self.send_command(
+            command, [], 0x01, coalesce_key=(combine_hex(self._sender_id), "dim")
+        )
         self._on_state = False
 
     def value_changed(self, packet):
@@ -112,4 +116,4 @@ class EnOceanLight(EnOceanEntity, LightEntity):
             val = packet.data[2]
             self._brightness = math.floor(val / 100.0 * 256.0)
             self._on_state = bool(val != 0)
-            self.schedule_update_ha_state()
+            self.async_schedule_state_write()
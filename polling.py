@@ -0,0 +1,194 @@
+"""Adaptive status polling of the EnOcean devices."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+import heapq
+import itertools
+import logging
+import random
+import time
+
+from homeassistant.core import HomeAssistant, callback
+
+from .transmit import telegram_airtime
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_POLL_MIN_INTERVAL = 120.0
+DEFAULT_POLL_MAX_INTERVAL = 900.0
+# Share of the transmit airtime budget polls may use
+POLL_BUDGET_SHARE = 0.5
+MIN_POLL_SPACING = 0.5
+# Data bytes of a secure status request
+POLL_TELEGRAM_LENGTH = 16
+
+
+def poll_spacing(duty_cycle: float) -> float:
+    """Return the seconds between polls keeping them within their airtime share."""
+    return telegram_airtime(POLL_TELEGRAM_LENGTH) / (duty_cycle / 100 * POLL_BUDGET_SHARE)
+
+
+class _PolledDevice:
+    """Polling state of a device."""
+
+    __slots__ = ("query", "interval", "due", "generation", "task")
+
+    def __init__(self, query: Callable[[], Awaitable[bool]], interval: float, due: float):
+        """Initialize the polling state."""
+        self.query = query
+        self.interval = interval
+        self.due = due
+        self.generation = 0
+        self.task: asyncio.Task | None = None
+
+
+class PollingScheduler:
+    """Poll the registered devices at intervals adapting to their activity.
+
+    A query returns True when the device is active (e.g. a heater heating):
+    its next poll is then min_interval seconds later, otherwise the interval
+    doubles up to max_interval. async_mark_active brings an idle device back
+    to min_interval, and async_seen postpones the poll of a device which
+    just reported its state by itself.
+
+    Polls are taken from a single heap in due order and separated by at
+    least spacing seconds, which keeps the polls of the whole fleet within
+    their share of the airtime budget. First polls get a random phase so
+    the devices do not all poll at the same time.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        *,
+        spacing: float,
+        min_interval: float = DEFAULT_POLL_MIN_INTERVAL,
+        max_interval: float = DEFAULT_POLL_MAX_INTERVAL,
+    ):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.spacing = max(spacing, MIN_POLL_SPACING)
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self._devices: dict[Hashable, _PolledDevice] = {}
+        self._heap: list[tuple[float, int, Hashable, int]] = []
+        self._sequence = itertools.count()
+        self._last_poll = 0.0
+        self._timer = None
+        self.polls = 0
+
+    @callback
+    def async_register(
+        self, key: Hashable, query: Callable[[], Awaitable[bool]]
+    ) -> Callable[[], None]:
+        """Poll a device with query, return a callable removing it."""
+        device = _PolledDevice(
+            query,
+            self.min_interval,
+            time.monotonic() + random.uniform(0, self.min_interval),
+        )
+        self._devices[key] = device
+        self._async_push(key, device)
+
+        @callback
+        def async_unregister():
+            if self._devices.get(key) is device:
+                del self._devices[key]
+                if device.task is not None:
+                    device.task.cancel()
+
+        return async_unregister
+
+    @callback
+    def async_mark_active(self, key: Hashable) -> None:
+        """Poll a device at the shortest interval again."""
+        if (device := self._devices.get(key)) is None:
+            return
+        device.interval = self.min_interval
+        due = time.monotonic() + self.min_interval
+        if due < device.due:
+            device.due = due
+            self._async_push(key, device)
+
+    @callback
+    def async_seen(self, key: Hashable) -> None:
+        """Postpone the poll of a device which just reported its state."""
+        if (device := self._devices.get(key)) is None:
+            return
+        device.due = time.monotonic() + device.interval
+        self._async_push(key, device)
+
+    @callback
+    def _async_push(self, key: Hashable, device: _PolledDevice) -> None:
+        """(Re)schedule the poll of a device, older heap entries become stale."""
+        device.generation += 1
+        heapq.heappush(self._heap, (device.due, next(self._sequence), key, device.generation))
+        if self._timer is None or self._heap[0][2] == key:
+            self._async_arm()
+
+    @callback
+    def _async_arm(self) -> None:
+        """Arm the timer for the next due poll."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._heap:
+            return
+        when = max(self._heap[0][0], self._last_poll + self.spacing)
+        self._timer = self.hass.loop.call_later(
+            max(when - time.monotonic(), 0), self._async_poll_next
+        )
+
+    @callback
+    def _async_poll_next(self) -> None:
+        """Start the poll of the next due device."""
+        self._timer = None
+        heap = self._heap
+        now = time.monotonic()
+        while heap:
+            due, _sequence, key, generation = heap[0]
+            device = self._devices.get(key)
+            if device is None or device.generation != generation:
+                heapq.heappop(heap)
+                continue
+            if due > now:
+                break
+            heapq.heappop(heap)
+            self._last_poll = now
+            # Rescheduled now, the query outcome may shorten the interval
+            device.due = now + device.interval
+            self._async_push(key, device)
+            if device.task is None:
+                self.polls += 1
+                device.task = self.hass.async_create_task(self._async_query(key, device))
+            break
+        self._async_arm()
+
+    async def _async_query(self, key: Hashable, device: _PolledDevice) -> None:
+        """Run the query of a device and adapt its interval."""
+        try:
+            active = await device.query()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error while polling %s", key)
+            active = False
+        finally:
+            device.task = None
+        if self._devices.get(key) is not device:
+            return
+        if active:
+            self.async_mark_active(key)
+        else:
+            device.interval = min(device.interval * 2, self.max_interval)
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop polling."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for device in self._devices.values():
+            if device.task is not None:
+                device.task.cancel()
+        self._devices.clear()
+        self._heap.clear()
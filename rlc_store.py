@@ -0,0 +1,98 @@
+"""Persistent rolling codes of the secure devices."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.rlc"
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+# Transmit rolling codes reserved ahead of use
+RLC_RESERVATION = 32
+# A new block is reserved when fewer codes are left
+RLC_RESERVATION_LOW = RLC_RESERVATION // 2
+RLC_MASK = 0xFFFFFF
+
+
+class RLCStore:
+    """Keep the rolling codes of the secure devices in the .storage folder.
+
+    Transmit rolling codes are reserved by blocks: the store saves the end
+    of the reserved block, written right away, before the codes of the
+    previous block run out. After a restart, the gateway starts from the
+    end of the block, past any code it may have sent before a crash.
+
+    Receive rolling codes are saved with a delay, batching the updates of
+    all devices in one write. A receive code restored behind is caught up
+    by the decryption window.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the store."""
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._devices: dict[str, dict[str, int]] = {}
+        self._reservation_pending = False
+
+    async def async_load(self) -> None:
+        """Load the saved rolling codes."""
+        if (data := await self._store.async_load()) is not None:
+            self._devices = data["devices"]
+
+    @callback
+    def async_restore(
+        self, device_id: str, rlc_tx: int, rlc_rx: int, jump: bool = False
+    ) -> tuple[int, int]:
+        """Return the transmit and receive rolling codes a device starts from.
+
+        Saved rolling codes take precedence over the given ones, which are
+        only used for a device the store does not know yet. Set jump when
+        the given transmit code may lag behind the last one sent.
+        """
+        if (saved := self._devices.get(device_id)) is not None:
+            rlc_tx, rlc_rx = saved["rlc_tx_reserved"], saved["rlc_rx"]
+        elif jump:
+            rlc_tx = (rlc_tx + RLC_RESERVATION) & RLC_MASK
+        self.async_update(device_id, rlc_tx, rlc_rx)
+        return rlc_tx, rlc_rx
+
+    @callback
+    def async_update(self, device_id: str, rlc_tx: int, rlc_rx: int) -> None:
+        """Record the next transmit and receive rolling codes of a device."""
+        saved = self._devices.get(device_id)
+        if saved is None or not (
+            RLC_RESERVATION_LOW
+            <= (saved["rlc_tx_reserved"] - rlc_tx) & RLC_MASK
+            <= RLC_RESERVATION
+        ):
+            self._devices[device_id] = {
+                "rlc_tx_reserved": (rlc_tx + RLC_RESERVATION) & RLC_MASK,
+                "rlc_rx": rlc_rx,
+            }
+            self._reservation_pending = True
+        elif saved["rlc_rx"] != rlc_rx:
+            saved["rlc_rx"] = rlc_rx
+        else:
+            return
+        self._store.async_delay_save(
+            self._data_to_save, 0 if self._reservation_pending else SAVE_DELAY
+        )
+
+    @callback
+    def async_reset(self, device_id: str, rlc_tx: int, rlc_rx: int) -> None:
+        """Forget the reservation of a device whose rolling codes were reset."""
+        self._devices.pop(device_id, None)
+        self.async_update(device_id, rlc_tx, rlc_rx)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to save."""
+        self._reservation_pending = False
+        return {"devices": self._devices}
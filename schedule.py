@@ -0,0 +1,219 @@
+"""Weekly preset schedules of the heaters."""
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections.abc import Callable
+from datetime import datetime, time as dt_time, timedelta
+import heapq
+import itertools
+import logging
+from typing import Any
+
+from homeassistant.const import WEEKDAYS
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.schedules"
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+ATTR_DAYS = "days"
+ATTR_AT = "at"
+ATTR_PRESET = "preset"
+ATTR_ENTITIES = "entities"
+ATTR_TRANSITIONS = "transitions"
+
+_SECONDS_PER_DAY = 86400
+
+
+def _week_offset(weekday: int, at: dt_time) -> int:
+    """Return the seconds from monday 00:00 to a weekday time."""
+    return weekday * _SECONDS_PER_DAY + at.hour * 3600 + at.minute * 60 + at.second
+
+
+class _Timetable:
+    """Transitions of a schedule sorted by time of the week."""
+
+    __slots__ = ("offsets", "transitions")
+
+    def __init__(self, transitions: list[dict[str, Any]]):
+        """Precompute the weekly transitions."""
+        week = []
+        for transition in transitions:
+            at = dt_time.fromisoformat(transition[ATTR_AT])
+            for day in transition[ATTR_DAYS]:
+                weekday = WEEKDAYS.index(day)
+                week.append((_week_offset(weekday, at), weekday, at, transition[ATTR_PRESET]))
+        week.sort(key=lambda item: item[0])
+        self.offsets = [item[0] for item in week]
+        self.transitions = [item[1:] for item in week]
+
+    def next_transition(self, now: datetime) -> tuple[datetime, str] | None:
+        """Return the local time and preset of the first transition after now."""
+        if not self.offsets:
+            return None
+        offset = _week_offset(now.weekday(), now.time())
+        index = bisect_right(self.offsets, offset)
+        week_start = now.date() - timedelta(days=now.weekday())
+        if index == len(self.offsets):
+            index = 0
+            week_start += timedelta(weeks=1)
+        weekday, at, preset = self.transitions[index]
+        return (
+            datetime.combine(week_start + timedelta(days=weekday), at, tzinfo=now.tzinfo),
+            preset,
+        )
+
+
+class PresetScheduler:
+    """Switch the heater presets along weekly schedules.
+
+    A schedule maps transitions (weekdays, time of day, preset) to a list of
+    heaters: a single heater or a group. A heater follows one schedule at
+    a time, the last one it was added to. Schedules are kept in the
+    .storage folder.
+
+    The next transition of every heater is precomputed into a single heap,
+    so one timer, armed for the earliest transition, serves the whole
+    fleet. Transitions are applied through async_set_preset_mode, like a
+    preset chosen by the user; the transmit scheduler paces the telegrams
+    of heaters switching at the same time.
+    """
+
+    def __init__(self, hass: HomeAssistant, heaters: dict[str, Any]):
+        """Initialize the scheduler with the heaters registered on the dongle."""
+        self.hass = hass
+        self._heaters = heaters
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._schedules: dict[str, dict[str, Any]] = {}
+        self._timetables: dict[str, _Timetable] = {}
+        # Schedule followed by each heater
+        self._entities: dict[str, str] = {}
+        self._heap: list[tuple[datetime, int, str, int, str]] = []
+        self._generations: dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._unsub_timer: Callable[[], None] | None = None
+        self.transitions = 0
+
+    async def async_load(self) -> None:
+        """Load the saved schedules and plan their next transitions."""
+        if (data := await self._store.async_load()) is not None:
+            for name, schedule in data["schedules"].items():
+                self._async_set(name, schedule[ATTR_ENTITIES], schedule[ATTR_TRANSITIONS])
+        self._async_arm()
+
+    @callback
+    def async_set_schedule(
+        self, name: str, entity_ids: list[str], transitions: list[dict[str, Any]]
+    ) -> None:
+        """Create or replace a schedule."""
+        self.async_remove_schedule(name, save=False)
+        self._async_set(name, entity_ids, transitions)
+        self._async_arm()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_remove_schedule(self, name: str, save: bool = True) -> None:
+        """Remove a schedule, its heaters keep their current preset."""
+        if (schedule := self._schedules.pop(name, None)) is None:
+            return
+        del self._timetables[name]
+        for entity_id in schedule[ATTR_ENTITIES]:
+            if self._entities.get(entity_id) == name:
+                del self._entities[entity_id]
+                # Heap entries of the heater become stale
+                self._generations[entity_id] = self._generations.get(entity_id, 0) + 1
+        if save:
+            self._async_arm()
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _async_set(
+        self, name: str, entity_ids: list[str], transitions: list[dict[str, Any]]
+    ) -> None:
+        """Store a schedule and push the next transition of its heaters."""
+        entity_ids = list(dict.fromkeys(entity_ids))
+        for entity_id in entity_ids:
+            # A heater follows the last schedule it was added to
+            if (previous := self._entities.get(entity_id)) is not None:
+                self._schedules[previous][ATTR_ENTITIES].remove(entity_id)
+        self._schedules[name] = {
+            ATTR_ENTITIES: entity_ids,
+            ATTR_TRANSITIONS: [dict(transition) for transition in transitions],
+        }
+        self._timetables[name] = _Timetable(transitions)
+        now = dt_util.now()
+        for entity_id in entity_ids:
+            self._entities[entity_id] = name
+            self._async_push(entity_id, now)
+
+    @callback
+    def _async_push(self, entity_id: str, now: datetime) -> None:
+        """Plan the next transition of a heater, older heap entries become stale."""
+        generation = self._generations.get(entity_id, 0) + 1
+        self._generations[entity_id] = generation
+        planned = self._timetables[self._entities[entity_id]].next_transition(now)
+        if planned is not None:
+            heapq.heappush(
+                self._heap,
+                (
+                    dt_util.as_utc(planned[0]),
+                    next(self._sequence),
+                    entity_id,
+                    generation,
+                    planned[1],
+                ),
+            )
+
+    @callback
+    def _async_arm(self) -> None:
+        """Arm the timer for the earliest transition."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        heap = self._heap
+        while heap and self._generations.get(heap[0][2]) != heap[0][3]:
+            heapq.heappop(heap)
+        if heap:
+            self._unsub_timer = async_track_point_in_utc_time(
+                self.hass, self._async_run_transitions, heap[0][0]
+            )
+
+    @callback
+    def _async_run_transitions(self, _now: datetime) -> None:
+        """Apply the transitions due and plan the next ones."""
+        self._unsub_timer = None
+        heap = self._heap
+        now_utc = dt_util.utcnow()
+        local_now = dt_util.as_local(now_utc)
+        while heap and heap[0][0] <= now_utc:
+            _when, _sequence, entity_id, generation, preset = heapq.heappop(heap)
+            if self._generations.get(entity_id) != generation:
+                continue
+            name = self._entities[entity_id]
+            self._async_push(entity_id, local_now)
+            if (heater := self._heaters.get(entity_id)) is None:
+                _LOGGER.debug("Heater %s of schedule %s not available", entity_id, name)
+                continue
+            self.transitions += 1
+            _LOGGER.debug("Schedule %s: %s switches to %s", name, entity_id, preset)
+            self.hass.async_create_task(heater.async_set_preset_mode(preset))
+        self._async_arm()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop the timer."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to save."""
+        return {"schedules": self._schedules}
@@ -0,0 +1,116 @@
+"""Secure telegram sessions (VAES encryption, truncated AES-CMAC)."""
+from __future__ import annotations
+
+import logging
+
+from enoceanjob.protocol.constants import DECRYPT_RESULT, PACKET, RORG
+from enoceanjob.protocol.packet import Packet, RadioPacket
+
+from .cipher import BLOCK_SIZE, CMAC_SIZE, RLC_MASK, RLC_SIZE, SecureCipher
+
+_LOGGER = logging.getLogger(__name__)
+
+# RLC_ALGO 24 bits, RLC not transmitted, MAC_ALGO 3 bytes AES128-CMAC, VAES
+SLF_VAES_CMAC3 = 0x8B
+# Rolling codes tried from the expected one when decrypting
+RLC_WINDOW = 128
+# Sender ID (4 bytes) and status closing the data of a radio packet
+_TRAILER = 5
+
+
+class SecureSession:
+    """Encrypt and decrypt the secure telegrams exchanged with one device.
+
+    The AES operations go through the SecureCipher of the device key, built
+    once, and the rolling codes are fixed width integer counters.
+
+    A received telegram is authenticated by comparing its truncated CMAC
+    with the one of the expected rolling code, then of the rolling codes
+    of the window ahead, and decrypted only with the matching one.
+    Telegrams are encrypted and decrypted without enoceanjob, unless their
+    payload is longer than one AES block: enoceanjob handles those, called
+    once per telegram.
+    """
+
+    def __init__(self, key, rlc_tx: int = 0, rlc_rx: int = 0, window: int = RLC_WINDOW):
+        """Initialize the session with the 16 bytes device key."""
+        self._key = bytearray(key)
+        self._cipher = SecureCipher(bytes(self._key))
+        self.rlc_tx = rlc_tx
+        self.rlc_rx = rlc_rx
+        self.window = window
+        # Receive rolling code bookkeeping
+        self.last_skip = 0
+        self.max_skip = 0
+        self.resyncs = 0
+        self.rejected = 0
+
+    @staticmethod
+    def rlc_to_list(rlc: int) -> list[int]:
+        """Return a rolling code as a list of bytes."""
+        return list(rlc.to_bytes(RLC_SIZE, "big"))
+
+    def encrypt(self, packet: RadioPacket) -> Packet:
+        """Encrypt a radio packet with the next transmit rolling code."""
+        rlc = self.rlc_tx
+        self.rlc_tx = (rlc + 1) & RLC_MASK
+        # R-ORG and payload are encrypted, sender ID and status are kept
+        plain = bytes(packet.data[:-_TRAILER])
+        if len(plain) > BLOCK_SIZE:
+            return packet.encrypt(self._key, self.rlc_to_list(rlc), SLF_TI=SLF_VAES_CMAC3)
+        encrypted = self._cipher.vaes(plain, rlc)
+        return Packet(
+            PACKET.RADIO_ERP1,
+            data=[
+                RORG.SEC_ENCAPS,
+                *encrypted,
+                *self._cipher.mac(encrypted, rlc),
+                *packet.data[-_TRAILER:],
+            ],
+            optional=list(packet.optional),
+        )
+
+    def _accept(self, rlc: int) -> None:
+        """Move the receive rolling code past an authenticated one."""
+        skipped = (rlc - self.rlc_rx) & RLC_MASK
+        if skipped:
+            _LOGGER.info("Rolling code resynchronized, %d telegrams missed", skipped)
+            self.resyncs += 1
+        self.last_skip = skipped
+        self.max_skip = max(self.max_skip, skipped)
+        self.rlc_rx = (rlc + 1) & RLC_MASK
+
+    def decrypt(self, packet: RadioPacket) -> RadioPacket | None:
+        """Authenticate and decrypt a secure packet, None when it is rejected.
+
+        The rolling codes rlc_rx to rlc_rx + window - 1 are tried, comparing
+        only the truncated CMAC, so telegrams missed in between do not
+        desynchronize the session. The receive rolling code moves past the
+        one authenticating the telegram: a replayed telegram, whose rolling
+        code is behind, is rejected.
+        """
+        encrypted = bytes(packet.data[1:-_TRAILER - CMAC_SIZE])
+        mac = bytes(packet.data[-_TRAILER - CMAC_SIZE:-_TRAILER])
+        rlc = None
+        if encrypted:
+            rlc = self._cipher.find_rlc(encrypted, mac, self.rlc_rx, self.window)
+        if rlc is None:
+            self.rejected += 1
+            return None
+
+        if len(encrypted) > BLOCK_SIZE:
+            decrypted, result, _rlc = packet.decrypt(
+                self._key, self.rlc_to_list(rlc), SLF_TI=SLF_VAES_CMAC3
+            )
+            if result != DECRYPT_RESULT.OK:
+                self.rejected += 1
+                return None
+        else:
+            decrypted = RadioPacket(
+                PACKET.RADIO_ERP1,
+                data=[*self._cipher.vaes(encrypted, rlc), *packet.data[-_TRAILER:]],
+                optional=list(packet.optional),
+            )
+            decrypted.parse()
+        self._accept(rlc)
+        return decrypted
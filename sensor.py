@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 import logging
+import time
 from collections.abc import Callable
-from dataclasses import dataclass
+from typing import NamedTuple
+from dataclasses import dataclass, replace
+from datetime import timedelta
 
 from enoceanjob.utils import combine_hex
 import voluptuous as vol
@@ -20,25 +23,57 @@ from homeassistant.const import (
     CONF_ID,
     CONF_NAME,
     PERCENTAGE,
+    ENERGY_KILO_WATT_HOUR,
     POWER_WATT,
     STATE_CLOSED,
     STATE_OPEN,
     TEMP_CELSIUS,
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+    TIME_MILLISECONDS,
     CONF_DEVICE,
-    CONF_DEVICES,
-    EntityCategory
+    EntityCategory,
+    Platform,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
-from .config_schema import CONF_DEVICE_TYPE, CONF_SEC_TI_KEY
-from .const import DOMAIN
-from .device import EnOceanEntity
+from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType, StateType
+from .config_schema import (
+    CONF_EEP,
+    CONF_SENSOR_TYPE,
+    SENSOR_TYPE_DBM,
+    SENSOR_TYPE_DOORDETECTOR,
+    SENSOR_TYPE_ENERGY,
+    SENSOR_TYPE_HUMIDITY,
+    SENSOR_TYPE_POWER,
+    SENSOR_TYPE_TEMPERATURE,
+    SENSOR_TYPE_WINDOWHANDLE,
+)
+from .const import DATA_ENOCEAN, DOMAIN, ENOCEAN_DONGLE
+from .device import EnOceanDevice, EnOceanEntity, async_get_device
+from .eep import (
+    A5_LINEAR_EEPS,
+    VALUE_HUMIDITY,
+    VALUE_TEMPERATURE,
+    LinearDecoder,
+    LinearValue,
+    is_teach_in,
+    linear_decoder,
+    parse_eep,
+)
+from .filters import (
+    FILTER_DEFER,
+    FILTER_HEARTBEAT,
+    FILTER_SKIP,
+    FilterConfig,
+    StateFilter,
+)
+from .stats import DongleStats, Histogram
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -46,15 +81,29 @@ CONF_MAX_TEMP = "max_temp"
 CONF_MIN_TEMP = "min_temp"
 CONF_RANGE_FROM = "range_from"
 CONF_RANGE_TO = "range_to"
+CONF_DEADBAND = "deadband"
+CONF_DEADBAND_PERCENT = "deadband_percent"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_HEARTBEAT = "heartbeat"
+CONF_CHANNELS = "channels"
 
-DEFAULT_NAME = "EnOcean sensor"
+# State attribute of the energy sensors fed by cumulative readings
+ATTR_CUMULATIVE = "cumulative"
 
-SENSOR_TYPE_HUMIDITY = "humidity"
-SENSOR_TYPE_POWER = "powersensor"
-SENSOR_TYPE_TEMPERATURE = "temperature"
-SENSOR_TYPE_WINDOWHANDLE = "windowhandle"
-SENSOR_TYPE_DOORDETECTOR = "doordetector"
-SENSOR_TYPE_DBM = "dbmlevel"
+DEFAULT_NAME = "EnOcean sensor"
+DEFAULT_MIN_TEMP = 0
+DEFAULT_MAX_TEMP = 40
+DEFAULT_RANGE_FROM = 255
+DEFAULT_RANGE_TO = 0
+# EEP of the temperature sensors added by the options flow without one,
+# the same scales as the YAML defaults
+DEFAULT_TEMPERATURE_EEP = "A5-02-05"
+
+# Packets aggregated by the signal strength sensors
+SIGNAL_WINDOW = 100
+SIGNAL_PUBLISH_INTERVAL = timedelta(minutes=5)
+# Longer gaps between power readings are not integrated
+MAX_INTEGRATION_GAP = 600
 
 @dataclass
 class EnOceanSensorEntityDescriptionMixin:
@@ -69,6 +118,9 @@ class EnOceanSensorEntityDescription(
 ):
     """Describes EnOcean sensor entity."""
 
+    # Default filter of the sensor type, see filters.FilterConfig
+    state_filter: FilterConfig = FilterConfig()
+
 
 SENSOR_DESC_DBM = EnOceanSensorEntityDescription(
     key=SENSOR_TYPE_DBM,
@@ -89,6 +141,7 @@ SENSOR_DESC_TEMPERATURE = EnOceanSensorEntityDescription(
     device_class=SensorDeviceClass.TEMPERATURE,
     state_class=SensorStateClass.MEASUREMENT,
     unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_TEMPERATURE}",
+    state_filter=FilterConfig(deadband=0.2, heartbeat=3600),
 )
 
 SENSOR_DESC_HUMIDITY = EnOceanSensorEntityDescription(
@@ -99,6 +152,7 @@ SENSOR_DESC_HUMIDITY = EnOceanSensorEntityDescription(
     device_class=SensorDeviceClass.HUMIDITY,
     state_class=SensorStateClass.MEASUREMENT,
     unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_HUMIDITY}",
+    state_filter=FilterConfig(deadband=1, heartbeat=3600),
 )
 
 SENSOR_DESC_POWER = EnOceanSensorEntityDescription(
@@ -109,6 +163,18 @@ SENSOR_DESC_POWER = EnOceanSensorEntityDescription(
     device_class=SensorDeviceClass.POWER,
     state_class=SensorStateClass.MEASUREMENT,
     unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_POWER}",
+    state_filter=FilterConfig(deadband=1, deadband_relative=0.05, min_interval=10, heartbeat=300),
+)
+
+SENSOR_DESC_ENERGY = EnOceanSensorEntityDescription(
+    key=SENSOR_TYPE_ENERGY,
+    name="Energy",
+    native_unit_of_measurement=ENERGY_KILO_WATT_HOUR,
+    icon="mdi:lightning-bolt",
+    device_class=SensorDeviceClass.ENERGY,
+    state_class=SensorStateClass.TOTAL_INCREASING,
+    unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_ENERGY}",
+    state_filter=FilterConfig(deadband=0.01, min_interval=60, heartbeat=3600),
 )
 
 SENSOR_DESC_WINDOWHANDLE = EnOceanSensorEntityDescription(
@@ -125,53 +191,169 @@ SENSOR_DESC_DOORDETECTOR = EnOceanSensorEntityDescription(
     unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_DOORDETECTOR}",
 )
 
+
+@dataclass
+class EnOceanStatsSensorEntityDescriptionMixin:
+    """Mixin for required keys."""
+
+    value_fn: Callable[[DongleStats], StateType]
+
+
+@dataclass
+class EnOceanStatsSensorEntityDescription(
+    SensorEntityDescription, EnOceanStatsSensorEntityDescriptionMixin
+):
+    """Describes an EnOcean dongle statistics sensor entity."""
+
+    attributes_fn: Callable[[DongleStats], dict] | None = None
+
+
+def _p95_ms(histogram: Histogram) -> float | None:
+    """Return the 95th percentile of a histogram in milliseconds."""
+    if (p95 := histogram.percentile(0.95)) is None:
+        return None
+    return round(p95 * 1e3, 3)
+
+
+def _histogram_description(key: str, name: str) -> EnOceanStatsSensorEntityDescription:
+    """Describe the sensor of the DongleStats histogram named key."""
+    return EnOceanStatsSensorEntityDescription(
+        key=key,
+        name=name,
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        icon="mdi:timer-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda stats: _p95_ms(getattr(stats, key)),
+        attributes_fn=lambda stats: getattr(stats, key).summary,
+    )
+
+
+STATS_SENSOR_DESCS = (
+    EnOceanStatsSensorEntityDescription(
+        key="frames",
+        name="Frames received",
+        icon="mdi:counter",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda stats: stats.frames,
+    ),
+    EnOceanStatsSensorEntityDescription(
+        key="packet_rate",
+        name="Packet rate",
+        native_unit_of_measurement="packets/s",
+        icon="mdi:speedometer",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda stats: round(stats.update_packet_rate(), 2),
+    ),
+    _histogram_description("rx_wait", "Receive buffer wait p95"),
+    _histogram_description("dispatch", "Dispatch p95"),
+    EnOceanStatsSensorEntityDescription(
+        key="value_changed",
+        name="Entity update p95",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        icon="mdi:timer-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda stats: _p95_ms(stats.value_changed),
+        attributes_fn=lambda stats: {
+            **stats.value_changed.summary,
+            "slowest_entity": stats.slowest_entity,
+        },
+    ),
+    _histogram_description("decrypt", "Decryption p95"),
+    _histogram_description("tx_wait", "Transmit queue wait p95"),
+)
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
         vol.Required(CONF_ID): vol.All(cv.ensure_list, [vol.Coerce(int)]),
         vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
         vol.Optional(CONF_DEVICE_CLASS, default=SENSOR_TYPE_POWER): cv.string,
-        vol.Optional(CONF_MAX_TEMP, default=40): vol.Coerce(int),
-        vol.Optional(CONF_MIN_TEMP, default=0): vol.Coerce(int),
-        vol.Optional(CONF_RANGE_FROM, default=255): cv.positive_int,
-        vol.Optional(CONF_RANGE_TO, default=0): cv.positive_int,
+        vol.Optional(CONF_MAX_TEMP, default=DEFAULT_MAX_TEMP): vol.Coerce(int),
+        vol.Optional(CONF_MIN_TEMP, default=DEFAULT_MIN_TEMP): vol.Coerce(int),
+        vol.Optional(CONF_RANGE_FROM, default=DEFAULT_RANGE_FROM): cv.positive_int,
+        vol.Optional(CONF_RANGE_TO, default=DEFAULT_RANGE_TO): cv.positive_int,
+        vol.Optional(CONF_EEP): vol.All(vol.Upper, vol.In(A5_LINEAR_EEPS)),
+        vol.Optional(CONF_DEADBAND): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_DEADBAND_PERCENT): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+        vol.Optional(CONF_MIN_INTERVAL): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_HEARTBEAT): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_CHANNELS): vol.All(
+            cv.ensure_list, [vol.All(vol.Coerce(int), vol.Range(min=0, max=15))]
+        ),
     }
 )
 
 
-def setup_platform(
-    hass: HomeAssistant,
-    config: ConfigType,
-    add_entities: AddEntitiesCallback,
-    discovery_info: DiscoveryInfoType | None = None,
-) -> None:
-    """Set up an EnOcean sensor device."""
-    dev_id = config[CONF_ID]
-    dev_name = config[CONF_NAME]
-    sensor_type = config[CONF_DEVICE_CLASS]
+def _filter_overrides(config: ConfigType) -> dict[str, float]:
+    """Return the FilterConfig settings given in the configuration of a sensor."""
+    overrides = {}
+    if CONF_DEADBAND in config:
+        overrides["deadband"] = config[CONF_DEADBAND]
+    if CONF_DEADBAND_PERCENT in config:
+        overrides["deadband_relative"] = config[CONF_DEADBAND_PERCENT] / 100
+    if CONF_MIN_INTERVAL in config:
+        overrides["min_interval"] = config[CONF_MIN_INTERVAL]
+    if CONF_HEARTBEAT in config:
+        overrides["heartbeat"] = config[CONF_HEARTBEAT]
+    return overrides
+
 
+def create_sensors(
+    hass: HomeAssistant,
+    dev_id,
+    dev_name,
+    sensor_type: str,
+    config,
+    async_add_entities: AddEntitiesCallback | None = None,
+) -> list[EnOceanSensor]:
+    """Return the entities of a sensor, configured in YAML or by the options flow.
+
+    Temperature and humidity sensors of the same sender share one
+    EnOceanSensorDevice, decoding each telegram once for both. Meters
+    without configured channels add the sensors of the other channels
+    later with async_add_entities.
+    """
+    eep = config.get(CONF_EEP) or None
     entities: list[EnOceanSensor] = []
     if sensor_type == SENSOR_TYPE_TEMPERATURE:
-        temp_min = config[CONF_MIN_TEMP]
-        temp_max = config[CONF_MAX_TEMP]
-        range_from = config[CONF_RANGE_FROM]
-        range_to = config[CONF_RANGE_TO]
         entities = [
             EnOceanTemperatureSensor(
                 dev_id,
                 dev_name,
                 SENSOR_DESC_TEMPERATURE,
-                scale_min=temp_min,
-                scale_max=temp_max,
-                range_from=range_from,
-                range_to=range_to,
+                device=async_get_device(hass, EnOceanSensorDevice, dev_id, dev_name, eep=eep),
+                scale_min=config.get(CONF_MIN_TEMP, DEFAULT_MIN_TEMP),
+                scale_max=config.get(CONF_MAX_TEMP, DEFAULT_MAX_TEMP),
+                range_from=config.get(CONF_RANGE_FROM, DEFAULT_RANGE_FROM),
+                range_to=config.get(CONF_RANGE_TO, DEFAULT_RANGE_TO),
+                eep=eep,
             )
         ]
 
     elif sensor_type == SENSOR_TYPE_HUMIDITY:
-        entities = [EnOceanHumiditySensor(dev_id, dev_name, SENSOR_DESC_HUMIDITY)]
+        entities = [
+            EnOceanHumiditySensor(
+                dev_id,
+                dev_name,
+                SENSOR_DESC_HUMIDITY,
+                device=async_get_device(hass, EnOceanSensorDevice, dev_id, dev_name, eep=eep),
+                eep=eep,
+            )
+        ]
 
     elif sensor_type == SENSOR_TYPE_POWER:
-        entities = [EnOceanPowerSensor(dev_id, dev_name, SENSOR_DESC_POWER)]
+        overrides = _filter_overrides(config)
+        meter = EnOceanMeter(
+            dev_id,
+            dev_name,
+            config.get(CONF_CHANNELS),
+            power_filter=replace(SENSOR_DESC_POWER.state_filter, **overrides) if overrides else None,
+            async_add_entities=async_add_entities,
+        )
+        return [*meter.power_sensors.values(), *meter.energy_sensors.values()]
 
     elif sensor_type == SENSOR_TYPE_WINDOWHANDLE:
         entities = [EnOceanWindowHandle(dev_id, dev_name, SENSOR_DESC_WINDOWHANDLE)]
@@ -179,29 +361,72 @@ def setup_platform(
     elif sensor_type == SENSOR_TYPE_DOORDETECTOR:
         entities = [EnOceanDoorDetector(dev_id, dev_name, SENSOR_DESC_DOORDETECTOR)]
 
+    if overrides := _filter_overrides(config):
+        for entity in entities:
+            entity.set_state_filter(replace(entity.entity_description.state_filter, **overrides))
+    return entities
+
+
+async def async_setup_platform(
+    hass: HomeAssistant,
+    config: ConfigType,
+    async_add_entities: AddEntitiesCallback,
+    discovery_info: DiscoveryInfoType | None = None,
+) -> None:
+    """Set up an EnOcean sensor device."""
+    entities = create_sensors(
+        hass,
+        config[CONF_ID],
+        config[CONF_NAME],
+        config[CONF_DEVICE_CLASS],
+        config,
+        async_add_entities,
+    )
     if entities:
-        add_entities(entities)
+        async_add_entities(entities)
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
-    config_entities_list = []
-    result = config_entry.data
-
-    if result == {}:
-        return
-    for device in result[CONF_DEVICES].keys():
-        if result[CONF_DEVICES][device][CONF_DEVICE_TYPE] == 'climate':
-            _LOGGER.info("setup entity-config_entry_data=%s",result[CONF_DEVICES][device])
-            config_entity_signal = EnOceanSignalSensor(result[CONF_DEVICES][device])
-            config_entities_list.append(config_entity_signal)
-
-    if len(config_entities_list) != 0:
-        async_add_entities(config_entities_list, True)
-        _LOGGER.debug("sensor:async_setup_platform exit - created [%d] entitites", len(config_entities_list))
-    else:
-        _LOGGER.error("sensor:async_setup_platform exit - no climate entities found")
-    return True
+    """Add the sensors of the devices of the config entry, all at once.
 
+    Climate devices get a signal strength sensor. Sensor devices get the
+    sensor of their sensor_type; temperature sensors without an EEP are
+    decoded as DEFAULT_TEMPERATURE_EEP.
+    """
+    usb_dongle = hass.data[DATA_ENOCEAN][ENOCEAN_DONGLE]
+    entities: list[SensorEntity] = []
+    if usb_dongle.stats is not None:
+        entities.extend(
+            EnOceanDongleStatsSensor(usb_dongle.stats, config_entry.data[CONF_DEVICE], description)
+            for description in STATS_SENSOR_DESCS
+        )
+
+    for device in usb_dongle.device_index.get(Platform.CLIMATE, ()):
+        dev_id, dev_name = device.get(CONF_ID), device.get(CONF_NAME)
+        entities.append(
+            EnOceanSignalSensor(
+                dev_id,
+                dev_name,
+                device=async_get_device(hass, EnOceanDevice, dev_id, dev_name),
+            )
+        )
+
+    for device in usb_dongle.device_index.get(Platform.SENSOR, ()):
+        sensor_type = device.get(CONF_SENSOR_TYPE, SENSOR_TYPE_TEMPERATURE)
+        config = dict(device)
+        if sensor_type == SENSOR_TYPE_TEMPERATURE and not config.get(CONF_EEP):
+            config[CONF_EEP] = DEFAULT_TEMPERATURE_EEP
+        sensors = create_sensors(
+            hass, device[CONF_ID], device[CONF_NAME], sensor_type, config, async_add_entities
+        )
+        if not sensors:
+            _LOGGER.warning("Unsupported sensor type %s of %s", sensor_type, device[CONF_NAME])
+        entities.extend(sensors)
+
+    # The statistics sensors read their value before being added
+    async_add_entities(entities, usb_dongle.stats is not None)
+    _LOGGER.debug("sensor:async_setup_entry exit - created [%d] entities", len(entities))
+    return True
 
 
 class EnOceanSensor(EnOceanEntity, RestoreEntity, SensorEntity):
@@ -213,70 +438,393 @@ class EnOceanSensor(EnOceanEntity, RestoreEntity, SensorEntity):
         self.entity_description = description
         self._attr_name = f"{description.name}"
         self._attr_unique_id = description.unique_id(dev_id)
+        self._filter = StateFilter(description.state_filter)
+        self._deferred_write = None
+
+    def set_state_filter(self, config: FilterConfig) -> None:
+        """Replace the default filter of the sensor type."""
+        self._filter = StateFilter(config)
 
     async def async_added_to_hass(self):
         """Call when entity about to be added to hass."""
         # If not None, we got an initial value.
         await super().async_added_to_hass()
+        self.async_on_remove(self._async_cancel_deferred_write)
         if self._attr_native_value is not None:
             return
 
         if (state := await self.async_get_last_state()) is not None:
             self._attr_native_value = state.state
 
+    @callback
+    def _async_set_native_value(self, value) -> None:
+        """Update the value of the sensor, writing the state if the filter lets it."""
+        self._attr_native_value = value
+        now = time.monotonic()
+        decision = self._filter.check(value, now)
+        if decision == FILTER_SKIP:
+            return
+        if decision == FILTER_DEFER:
+            if self._deferred_write is None:
+                self._deferred_write = self.hass.loop.call_later(
+                    self._filter.remaining(now), self._async_publish_deferred
+                )
+            return
+        # A heartbeat writes an unchanged state, which has to be forced
+        self._attr_force_update = decision == FILTER_HEARTBEAT
+        self._async_publish(now)
+
+    @callback
+    def _async_publish_deferred(self) -> None:
+        """Write the latest value held back by the min_interval."""
+        self._deferred_write = None
+        self._attr_force_update = False
+        self._async_publish(time.monotonic())
+
+    @callback
+    def _async_publish(self, now: float) -> None:
+        """Write the current value."""
+        self._async_cancel_deferred_write()
+        self._filter.published(self._attr_native_value, now)
+        self.async_schedule_state_write()
+
+    @callback
+    def _async_cancel_deferred_write(self) -> None:
+        """Drop the pending deferred write."""
+        if self._deferred_write is not None:
+            self._deferred_write.cancel()
+            self._deferred_write = None
+
     def value_changed(self, packet):
         """Update the internal state of the sensor."""
 
-    def received_signal_strength(self, dbm:int =0):
-        """Get signal strength"""
-
 
 class EnOceanSignalSensor(EnOceanSensor):
-    """Representation of an EnOcean signal stregth sensor for a device"""
-    
-    def __init__(self, config):
-        super().__init__(config.get(CONF_ID), config.get(CONF_NAME), SENSOR_DESC_DBM)
+    """Representation of an EnOcean signal stregth sensor for a device.
+
+    The sensor reads the signal strength the EnOceanDevice of its sender
+    keeps for the last SIGNAL_WINDOW packets, instead of subscribing to
+    the packets itself. The window is published every
+    SIGNAL_PUBLISH_INTERVAL, when packets were received since the last
+    one: the state is the average, the attributes hold the min, max and
+    last strength, the packet rate over the window and the last seen time.
+    """
 
-    def received_signal_strength(self, dbm:int =0):
-        self._attr_native_value = dbm
-        self.schedule_update_ha_state()
+    def __init__(self, dev_id, dev_name, *, device: EnOceanDevice):
+        """Initialize the sensor."""
+        super().__init__(dev_id, dev_name, SENSOR_DESC_DBM)
+        self._device = device
+        device.track_signal(SIGNAL_WINDOW)
+        self._published_packets = 0
 
-class EnOceanPowerSensor(EnOceanSensor):
-    """Representation of an EnOcean power sensor.
+    async def async_added_to_hass(self):
+        """Publish the aggregated signal strength at a fixed cadence."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_publish_window, SIGNAL_PUBLISH_INTERVAL)
+        )
+
+    @callback
+    def _async_subscribe(self):
+        """Get the signal strength from the device."""
+        return self._device.async_attach(self.usb_dongle, self)
+
+    @callback
+    def async_device_updated(self, reading) -> None:
+        """Ignore the decoded telegrams, the window is read when published."""
+
+    @callback
+    def _async_publish_window(self, _now=None) -> None:
+        """Write the aggregates of the window."""
+        device = self._device
+        if device.packets == self._published_packets or not device.signal_window:
+            return
+        self._published_packets = device.packets
+        received = [received for received, _ in device.signal_window]
+        window = [dbm for _, dbm in device.signal_window]
+        span = received[-1] - received[0]
+        self._attr_native_value = round(sum(window) / len(window))
+        self._attr_extra_state_attributes = {
+            "min": min(window),
+            "max": max(window),
+            "last": device.rssi,
+            "samples": len(window),
+            "packets_per_hour": round((len(received) - 1) * 3600 / span, 1) if span else None,
+            "last_seen": dt_util.utc_from_timestamp(device.last_seen).isoformat(),
+        }
+        self.async_schedule_state_write()
+
+class MeterReading(NamedTuple):
+    """A decoded A5-12-01 telegram."""
+
+    channel: int
+    # Current value (W) when True, cumulative value (kWh) otherwise
+    current: bool
+    value: float
+
+
+class EnOceanMeter(EnOceanDevice):
+    """An electricity meter whose telegrams feed several entities.
 
     EEPs (EnOcean Equipment Profiles):
     - A5-12-01 (Automated Meter Reading, Electricity)
+
+    Every telegram is decoded once and its value routed to the power or
+    energy sensor of its channel (the TI field: tariff or channel).
+
+    Without configured channels, the meter starts with the sensors of
+    channel 0 and adds the sensors of another channel (16 at most) when
+    it first reports it, through async_add_entities. With configured
+    channels, the readings of the other channels are ignored, with a
+    warning once per channel.
     """
 
-    def value_changed(self, packet):
-        """Update the internal state of the sensor."""
-        if packet.rorg != 0xA5:
+    def __init__(
+        self,
+        dev_id,
+        dev_name,
+        channels: list[int] | None = None,
+        *,
+        power_filter: FilterConfig | None = None,
+        async_add_entities: AddEntitiesCallback | None = None,
+    ):
+        """Create the sensors of the meter."""
+        super().__init__(dev_id, dev_name, "A5-12-01")
+        self._power_filter = power_filter
+        self._async_add_entities = None if channels else async_add_entities
+        self._ignored_channels: set[int] = set()
+        self.power_sensors: dict[int, EnOceanPowerSensor] = {}
+        self.energy_sensors: dict[int, EnOceanEnergySensor] = {}
+        for channel in channels or [0]:
+            self._create_channel(channel)
+
+    def _create_channel(self, channel: int) -> list[EnOceanMeterSensor]:
+        """Create the power and energy sensors of a channel."""
+        power = self.power_sensors[channel] = EnOceanPowerSensor(
+            self.dev_id, self.dev_name, SENSOR_DESC_POWER, device=self, channel=channel
+        )
+        if self._power_filter is not None:
+            power.set_state_filter(self._power_filter)
+        # The energy sensors keep their own filter
+        energy = self.energy_sensors[channel] = EnOceanEnergySensor(
+            self.dev_id, self.dev_name, SENSOR_DESC_ENERGY, device=self, channel=channel
+        )
+        return [power, energy]
+
+    @callback
+    def _async_new_channel(self, channel: int) -> None:
+        """Add the sensors of a channel reported for the first time, or warn once."""
+        if self._async_add_entities is not None:
+            _LOGGER.info("%s reports channel %d, adding its sensors", self.dev_name, channel)
+            self._async_add_entities(self._create_channel(channel))
+        elif channel not in self._ignored_channels:
+            self._ignored_channels.add(channel)
+            _LOGGER.warning(
+                "%s reports channel %d, not in its channels: its readings are ignored",
+                self.dev_name,
+                channel,
+            )
+
+    def decode(self, packet) -> MeterReading | None:
+        """Decode a meter reading."""
+        if packet.rorg != 0xA5 or is_teach_in(packet):
+            return None
+        parsed = parse_eep(packet, 0x12, 0x01)
+        if not parsed:
+            return None
+        return MeterReading(
+            parsed["TI"]["raw_value"],
+            parsed["DT"]["raw_value"] == 1,
+            parsed["MR"]["raw_value"] / (10 ** parsed["DIV"]["raw_value"]),
+        )
+
+    def entities_for(self, reading: MeterReading) -> list[EnOceanMeterSensor]:
+        """Return the attached sensors of the channel of a reading."""
+        if reading.channel not in self.energy_sensors:
+            self._async_new_channel(reading.channel)
+            return []
+        sensors = []
+        if reading.current and (power := self.power_sensors.get(reading.channel)) is not None:
+            sensors.append(power)
+        if (energy := self.energy_sensors.get(reading.channel)) is not None:
+            sensors.append(energy)
+        return [sensor for sensor in sensors if sensor in self._entities]
+
+
+class SensorReading(NamedTuple):
+    """A decoded telegram of a temperature and/or humidity sensor."""
+
+    temperature: float | None
+    humidity: float | None
+
+
+class EnOceanSensorDevice(EnOceanDevice):
+    """A temperature and humidity sensor (A5-02, A5-04, A5-10).
+
+    The entities of the device add the decoder of their value: each value
+    is decoded once per telegram, whatever the number of entities.
+    """
+
+    def __init__(self, dev_id, dev_name, eep: str | None = None):
+        """Initialize the device."""
+        super().__init__(dev_id, dev_name, eep)
+        self._decoders: dict[str, LinearDecoder] = {}
+
+    def add_decoder(self, name: str, decoder: LinearDecoder) -> None:
+        """Decode the value name with decoder, unless it is decoded already."""
+        if self._decoders.setdefault(name, decoder).value != decoder.value:
+            _LOGGER.warning(
+                "%s: the %s sensors have different EEPs or scales, the first one is used",
+                self.dev_name,
+                name,
+            )
+
+    def decode(self, packet) -> SensorReading | None:
+        """Decode the values of the entities."""
+        if packet.rorg != 0xA5 or is_teach_in(packet):
+            return None
+        data = packet.data
+        decoders = self._decoders
+        temperature = decoders.get(VALUE_TEMPERATURE)
+        humidity = decoders.get(VALUE_HUMIDITY)
+        return SensorReading(
+            temperature(data) if temperature is not None else None,
+            humidity(data) if humidity is not None else None,
+        )
+
+
+class EnOceanDeviceSensor(EnOceanSensor):
+    """A sensor fed by the EnOceanDevice of its sender."""
+
+    def __init__(
+        self,
+        dev_id,
+        dev_name,
+        description: EnOceanSensorEntityDescription,
+        *,
+        device: EnOceanDevice,
+    ):
+        """Initialize the sensor."""
+        super().__init__(dev_id, dev_name, description)
+        self._device = device
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info of the sender."""
+        return self._device.device_info
+
+    @callback
+    def _async_subscribe(self):
+        """Get the telegrams decoded by the device."""
+        return self._device.async_attach(self.usb_dongle, self)
+
+    @callback
+    def async_device_updated(self, reading) -> None:
+        """Update the sensor from a decoded telegram."""
+
+
+class EnOceanMeterSensor(EnOceanDeviceSensor):
+    """A sensor of one channel of an EnOceanMeter."""
+
+    def __init__(
+        self,
+        dev_id,
+        dev_name,
+        description: EnOceanSensorEntityDescription,
+        *,
+        device: EnOceanMeter,
+        channel: int,
+    ):
+        """Initialize the sensor of a channel, channel 0 keeps the plain name."""
+        super().__init__(dev_id, dev_name, description, device=device)
+        self.channel = channel
+        if channel:
+            self._attr_name = f"{description.name} {channel}"
+            self._attr_unique_id = f"{description.unique_id(dev_id)}-{channel}"
+
+
+class EnOceanPowerSensor(EnOceanMeterSensor):
+    """Representation of an EnOcean power sensor."""
+
+    @callback
+    def async_device_updated(self, reading: MeterReading) -> None:
+        """Update the current power, in W."""
+        self._async_set_native_value(reading.value)
+
+
+class EnOceanEnergySensor(EnOceanMeterSensor):
+    """Energy counter of a meter channel, in kWh.
+
+    The cumulative readings of the meter are used when it sends them.
+    Otherwise the power readings are integrated (trapezoidal rule), gaps
+    longer than MAX_INTEGRATION_GAP being skipped. Whether the meter sent
+    cumulative readings is kept as a state attribute, so the power
+    readings are not integrated on top of them after a restart.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the energy sensor."""
+        super().__init__(*args, **kwargs)
+        self._total = 0.0
+        self._cumulative = False
+        self._last_power: float | None = None
+        self._last_power_at = 0.0
+
+    async def async_added_to_hass(self):
+        """Restore the counter."""
+        await super().async_added_to_hass()
+        try:
+            self._total = float(self._attr_native_value)
+        except (TypeError, ValueError):
+            self._total = 0.0
+        if (state := await self.async_get_last_state()) is not None:
+            self._cumulative = bool(state.attributes.get(ATTR_CUMULATIVE, False))
+        self._attr_extra_state_attributes = {ATTR_CUMULATIVE: self._cumulative}
+
+    @callback
+    def async_device_updated(self, reading: MeterReading) -> None:
+        """Update the counter from a power or cumulative reading."""
+        if reading.current:
+            self.async_integrate_power(reading.value, time.monotonic())
+        else:
+            self.async_update_total(reading.value)
+
+    @callback
+    def async_update_total(self, total: float) -> None:
+        """Update the counter from a cumulative reading, in kWh."""
+        if not self._cumulative:
+            self._cumulative = True
+            self._attr_extra_state_attributes = {ATTR_CUMULATIVE: True}
+        self._total = total
+        self._async_set_native_value(round(total, 3))
+
+    @callback
+    def async_integrate_power(self, power: float, now: float) -> None:
+        """Add the energy used since the previous power reading, in W."""
+        last_power, last_power_at = self._last_power, self._last_power_at
+        self._last_power, self._last_power_at = power, now
+        if self._cumulative or last_power is None:
+            return
+        elapsed = now - last_power_at
+        if not 0 < elapsed <= MAX_INTEGRATION_GAP:
             return
-        packet.parse_eep(0x12, 0x01)
-        if packet.parsed["DT"]["raw_value"] == 1:
-            # this packet reports the current value
-            raw_val = packet.parsed["MR"]["raw_value"]
-            divisor = packet.parsed["DIV"]["raw_value"]
-            self._attr_native_value = raw_val / (10**divisor)
-            self.schedule_update_ha_state()
+        self._total += (last_power + power) / 2 * elapsed / 3_600_000
+        self._async_set_native_value(round(self._total, 3))
 
 
-class EnOceanTemperatureSensor(EnOceanSensor):
+class EnOceanTemperatureSensor(EnOceanDeviceSensor):
     """Representation of an EnOcean temperature sensor device.
 
     EEPs (EnOcean Equipment Profiles):
     - A5-02-01 to A5-02-1B All 8 Bit Temperature Sensors of A5-02
-    - A5-10-01 to A5-10-14 (Room Operating Panels)
-    - A5-04-01 (Temp. and Humidity Sensor, Range 0°C to +40°C and 0% to 100%)
-    - A5-04-02 (Temp. and Humidity Sensor, Range -20°C to +60°C and 0% to 100%)
-    - A5-10-10 (Temp. and Humidity Sensor and Set Point)
-    - A5-10-12 (Temp. and Humidity Sensor, Set Point and Occupancy Control)
-    - 10 Bit Temp. Sensors are not supported (A5-02-20, A5-02-30)
-
-    For the following EEPs the scales must be set to "0 to 250":
-    - A5-04-01
-    - A5-04-02
-    - A5-10-10 to A5-10-14
+    - A5-02-20, A5-02-30 (10 Bit Temperature Sensors)
+    - A5-04-01 to A5-04-03 (Temp. and Humidity Sensors)
+    - A5-10-01 to A5-10-17 (Room Operating Panels)
+
+    With the eep option, the scales come from the EEP table of eep.py.
+    Otherwise the raw value of DB1 is scaled from range_from/range_to to
+    min_temp/max_temp (8 bits only). Either way the values are decoded
+    with a lookup table compiled once.
     """
 
     def __init__(
@@ -285,47 +833,66 @@ class EnOceanTemperatureSensor(EnOceanSensor):
         dev_name,
         description: EnOceanSensorEntityDescription,
         *,
+        device: EnOceanSensorDevice,
         scale_min,
         scale_max,
         range_from,
         range_to,
+        eep=None,
     ):
         """Initialize the EnOcean temperature sensor device."""
-        super().__init__(dev_id, dev_name, description)
+        super().__init__(dev_id, dev_name, description, device=device)
         self._scale_min = scale_min
         self._scale_max = scale_max
         self.range_from = range_from
         self.range_to = range_to
-
-    def value_changed(self, packet):
+        decode = linear_decoder(eep, VALUE_TEMPERATURE) if eep else None
+        if decode is None:
+            if eep:
+                _LOGGER.warning("EEP %s has no temperature, using the scales", eep)
+            decode = LinearDecoder(LinearValue(3, range_from, range_to, scale_min, scale_max))
+        device.add_decoder(VALUE_TEMPERATURE, decode)
+
+    @callback
+    def async_device_updated(self, reading: SensorReading) -> None:
         """Update the internal state of the sensor."""
-        if packet.data[0] != 0xA5:
-            return
-        temp_scale = self._scale_max - self._scale_min
-        temp_range = self.range_to - self.range_from
-        raw_val = packet.data[3]
-        temperature = temp_scale / temp_range * (raw_val - self.range_from)
-        temperature += self._scale_min
-        self._attr_native_value = round(temperature, 1)
-        self.schedule_update_ha_state()
+        self._async_set_native_value(reading.temperature)
 
 
-class EnOceanHumiditySensor(EnOceanSensor):
+class EnOceanHumiditySensor(EnOceanDeviceSensor):
     """Representation of an EnOcean humidity sensor device.
 
     EEPs (EnOcean Equipment Profiles):
     - A5-04-01 (Temp. and Humidity Sensor, Range 0°C to +40°C and 0% to 100%)
     - A5-04-02 (Temp. and Humidity Sensor, Range -20°C to +60°C and 0% to 100%)
+    - A5-04-03 (Temp. and Humidity Sensor, Range -20°C to +60°C 10bit and 0% to 100%)
     - A5-10-10 to A5-10-14 (Room Operating Panels)
+
+    Without the eep option, the humidity is decoded as A5-04-01.
     """
 
-    def value_changed(self, packet):
+    def __init__(
+        self,
+        dev_id,
+        dev_name,
+        description: EnOceanSensorEntityDescription,
+        *,
+        device: EnOceanSensorDevice,
+        eep=None,
+    ):
+        """Initialize the EnOcean humidity sensor device."""
+        super().__init__(dev_id, dev_name, description, device=device)
+        decode = linear_decoder(eep, VALUE_HUMIDITY) if eep else None
+        if decode is None:
+            if eep:
+                _LOGGER.warning("EEP %s has no humidity, using A5-04-01", eep)
+            decode = linear_decoder("A5-04-01", VALUE_HUMIDITY)
+        device.add_decoder(VALUE_HUMIDITY, decode)
+
+    @callback
+    def async_device_updated(self, reading: SensorReading) -> None:
         """Update the internal state of the sensor."""
-        if packet.rorg != 0xA5:
-            return
-        humidity = packet.data[2] * 100 / 250
-        self._attr_native_value = round(humidity, 1)
-        self.schedule_update_ha_state()
+        self._async_set_native_value(reading.humidity)
 
 
 class EnOceanWindowHandle(EnOceanSensor):
@@ -346,7 +913,7 @@ class EnOceanWindowHandle(EnOceanSensor):
         if action == 0x05:
             self._attr_native_value = "tilt"
 
-        self.schedule_update_ha_state()
+        self._async_set_native_value(self._attr_native_value)
 
 class EnOceanDoorDetector(EnOceanSensor):
     """Representation of an EnOcean window handle device.
@@ -357,12 +924,31 @@ class EnOceanDoorDetector(EnOceanSensor):
     def value_changed(self, packet):
 
         """Update the internal state of the sensor."""
-        packet.parse_eep(0x00, 0x01)
-        contact_value = packet.parsed['CO']['value']
+        contact_value = parse_eep(packet, 0x00, 0x01)['CO']['value']
 
         if contact_value == 'open':
             self._attr_native_value = STATE_OPEN
         elif contact_value == 'closed':
             self._attr_native_value = STATE_CLOSED
 
-        self.schedule_update_ha_state()
\ No newline at end of file
+        self._async_set_native_value(self._attr_native_value)
+
+
+class EnOceanDongleStatsSensor(SensorEntity):
+    """Diagnostic sensor showing a statistic of the EnOcean dongle hot paths."""
+
+    _attr_has_entity_name = True
+    entity_description: EnOceanStatsSensorEntityDescription
+
+    def __init__(self, stats: DongleStats, device_path: str, description: EnOceanStatsSensorEntityDescription):
+        """Initialize the statistics sensor of the dongle at device_path."""
+        self._stats = stats
+        self.entity_description = description
+        self._attr_unique_id = f"{device_path}-{description.key}"
+        self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, device_path)})
+
+    async def async_update(self) -> None:
+        """Read the statistic."""
+        self._attr_native_value = self.entity_description.value_fn(self._stats)
+        if self.entity_description.attributes_fn is not None:
+            self._attr_extra_state_attributes = self.entity_description.attributes_fn(self._stats)
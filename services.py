@@ -1,9 +1,11 @@
 """EnOcean services."""
 from __future__ import annotations
 
+import asyncio
 import logging
 import queue
 import time
+from typing import Any
 
 from enoceanjob import utils
 from enoceanjob.communicators import Communicator
@@ -11,11 +13,26 @@ from enoceanjob.protocol.constants import PACKET, RORG
 from enoceanjob.protocol.packet import Packet, UTETeachInPacket
 import voluptuous as vol
 import homeassistant.helpers.config_validation as cv
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.components.climate.const import (
+    PRESET_AWAY,
+    PRESET_ECO,
+    PRESET_HOME,
+    PRESET_NONE,
+    PRESET_SLEEP,
+)
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_NAME, ATTR_TEMPERATURE, WEEKDAYS
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 
-from .const import DOMAIN
+from .const import DATA_ENOCEAN, DOMAIN, ENOCEAN_DONGLE
+from .schedule import ATTR_AT, ATTR_DAYS, ATTR_PRESET, ATTR_TRANSITIONS
 from .teachin import FourBsTeachInHandler, TeachInHandler, UteTeachInHandler
-from .utils import get_communicator_reference, hex_to_list
+from .utils import get_communicator_reference, hex_to_list, swap_communicator_callback
 
 TEACH_IN_DEVICE = "teach_in_device"  # service name
 SERVICE_CALL_ATTR_TEACH_IN_SECONDS = "teach_in_time"
@@ -34,6 +51,60 @@ SERVICE_TEACHIN_MAX_RUNTIME = 600
 SERVICE_TEACHIN_STATE_VALUE_RUNNING = "RUNNING"
 SERVICE_TEACHIN_STATE = "enocean.service_teachin_state"
 
+HEATER_PRESET_MODES = [PRESET_NONE, PRESET_AWAY, PRESET_ECO, PRESET_SLEEP, PRESET_HOME]
+
+SET_HEATERS = "set_heaters"  # service name
+SERVICE_CALL_ATTR_TARGETS = "targets"
+SERVICE_CALL_ATTR_PRESET_MODE = "preset_mode"
+SERVICE_CALL_SET_HEATERS_SCHEMA = vol.Schema(
+    {
+        vol.Required(SERVICE_CALL_ATTR_TARGETS): vol.All(
+            cv.ensure_list,
+            [
+                vol.All(
+                    vol.Schema(
+                        {
+                            vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+                            vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+                            vol.Optional(SERVICE_CALL_ATTR_PRESET_MODE): vol.In(
+                                HEATER_PRESET_MODES
+                            ),
+                        }
+                    ),
+                    cv.has_at_least_one_key(ATTR_TEMPERATURE, SERVICE_CALL_ATTR_PRESET_MODE),
+                )
+            ],
+        )
+    }
+)
+EVENT_SET_HEATERS_RESULT = "enocean_set_heaters_result"
+SET_HEATERS_ACKNOWLEDGED = "acknowledged"
+SET_HEATERS_NO_ACK = "no_acknowledge"
+SET_HEATERS_UNKNOWN = "unknown_heater"
+SET_HEATERS_ERROR = "error"
+
+SET_SCHEDULE = "set_schedule"  # service name
+SERVICE_CALL_SET_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_NAME): cv.string,
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Required(ATTR_TRANSITIONS): vol.All(
+            cv.ensure_list,
+            [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_DAYS): vol.All(cv.ensure_list, [vol.In(WEEKDAYS)]),
+                        vol.Required(ATTR_AT): cv.time,
+                        vol.Required(ATTR_PRESET): vol.In(HEATER_PRESET_MODES),
+                    }
+                )
+            ],
+        ),
+    }
+)
+REMOVE_SCHEDULE = "remove_schedule"  # service name
+SERVICE_CALL_REMOVE_SCHEDULE_SCHEMA = vol.Schema({vol.Required(ATTR_NAME): cv.string})
+
 SUPPORTED_SERVICES = list(TEACH_IN_DEVICE)
 
 SERVICE_TO_SCHEMA = {
@@ -63,6 +134,104 @@ def async_setup_services(hass: HomeAssistant) -> None:
     )
     _LOGGER.debug("Request to register service %s has been sent", str(service))
 
+    async def call_set_heaters(service_call: ServiceCall) -> ServiceResponse:
+        """Call the set_heaters service."""
+        return await async_handle_set_heaters(hass, service_call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SET_HEATERS,
+        call_set_heaters,
+        schema=SERVICE_CALL_SET_HEATERS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    @callback
+    def call_set_schedule(service_call: ServiceCall) -> None:
+        """Call the set_schedule service."""
+        hass.data[DATA_ENOCEAN][ENOCEAN_DONGLE].schedule.async_set_schedule(
+            service_call.data[ATTR_NAME],
+            service_call.data[ATTR_ENTITY_ID],
+            [
+                {
+                    ATTR_DAYS: transition[ATTR_DAYS],
+                    ATTR_AT: transition[ATTR_AT].isoformat(),
+                    ATTR_PRESET: transition[ATTR_PRESET],
+                }
+                for transition in service_call.data[ATTR_TRANSITIONS]
+            ],
+        )
+
+    @callback
+    def call_remove_schedule(service_call: ServiceCall) -> None:
+        """Call the remove_schedule service."""
+        hass.data[DATA_ENOCEAN][ENOCEAN_DONGLE].schedule.async_remove_schedule(
+            service_call.data[ATTR_NAME]
+        )
+
+    hass.services.async_register(
+        DOMAIN, SET_SCHEDULE, call_set_schedule, schema=SERVICE_CALL_SET_SCHEDULE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        REMOVE_SCHEDULE,
+        call_remove_schedule,
+        schema=SERVICE_CALL_REMOVE_SCHEDULE_SCHEMA,
+    )
+
+
+async def async_handle_set_heaters(hass: HomeAssistant, service_call: ServiceCall) -> ServiceResponse:
+    """Apply setpoints and presets to several heaters at once.
+
+    All the setpoint telegrams are queued right away and their acknowledges
+    awaited concurrently, each heater retrying on its own. A heater listed
+    several times is set once, the later targets overriding the setpoint or
+    preset of the earlier ones. The outcome per heater is returned as the
+    service response and fired as an enocean_set_heaters_result event.
+    """
+    started = time.monotonic()
+    heaters = hass.data[DATA_ENOCEAN][ENOCEAN_DONGLE].heaters
+    settings: dict[str, dict[str, Any]] = {}
+    results = {}
+    for target in service_call.data[SERVICE_CALL_ATTR_TARGETS]:
+        for entity_id in target[ATTR_ENTITY_ID]:
+            if entity_id not in heaters:
+                results[entity_id] = SET_HEATERS_UNKNOWN
+                continue
+            setting = settings.setdefault(entity_id, {})
+            if ATTR_TEMPERATURE in target:
+                setting["temperature"] = target[ATTR_TEMPERATURE]
+            if SERVICE_CALL_ATTR_PRESET_MODE in target:
+                setting["preset_mode"] = target[SERVICE_CALL_ATTR_PRESET_MODE]
+
+    entity_ids = list(settings)
+    jobs = [
+        heaters[entity_id].async_set_heater(
+            temperature=setting.get("temperature"),
+            preset_mode=setting.get("preset_mode"),
+        )
+        for entity_id, setting in settings.items()
+    ]
+
+    for entity_id, result in zip(entity_ids, await asyncio.gather(*jobs, return_exceptions=True)):
+        if isinstance(result, Exception):
+            _LOGGER.error("Error while setting %s: %s", entity_id, result)
+            results[entity_id] = SET_HEATERS_ERROR
+        else:
+            results[entity_id] = SET_HEATERS_ACKNOWLEDGED if result else SET_HEATERS_NO_ACK
+
+    duration = round(time.monotonic() - started, 2)
+    failed = [entity_id for entity_id, result in results.items() if result != SET_HEATERS_ACKNOWLEDGED]
+    _LOGGER.info(
+        "set_heaters: %d heaters acknowledged in %ss, failed: %s",
+        len(results) - len(failed),
+        duration,
+        failed,
+    )
+    summary = {"results": results, "duration": duration}
+    hass.bus.async_fire(EVENT_SET_HEATERS_RESULT, summary)
+    return summary
+
 
 def get_teach_in_seconds(service_call: ServiceCall) -> int:
     """Get the time (in seconds) for how long the teach-in process should run."""
@@ -117,12 +286,7 @@ def handle_teach_in(hass: HomeAssistant, service_call: ServiceCall) -> None:
     # store the originally set callback to restore it after
     # the end of the teach-in process.
     _LOGGER.debug("Storing existing callback function")
-    # cb_to_restore = communicator.callback
-    # the "correct" way would be to add a property to the communicator
-    # to get access to the communicator. But, the enocean library seems abandoned
-    cb_to_restore = communicator._Communicator__callback
-
-    communicator._Communicator__callback = None
+    cb_to_restore = swap_communicator_callback(communicator, None)
 
     try:
         # get time to run of the teach-in process from the service call
@@ -157,7 +321,7 @@ def handle_teach_in(hass: HomeAssistant, service_call: ServiceCall) -> None:
     finally:
         # restore callback in any case
         _LOGGER.debug("Restoring callback function")
-        communicator._Communicator__callback = cb_to_restore
+        swap_communicator_callback(communicator, cb_to_restore)
         # clear the state so that the service can be called again
         hass.states.set(SERVICE_TEACHIN_STATE, "")
 
@@ -0,0 +1,59 @@
+"""Staggered startup queries of the EnOcean devices."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import random
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+STARTUP_CONCURRENCY = 4
+STARTUP_JITTER = 2.0
+
+
+class StartupScheduler:
+    """Run the initial queries of the devices without a burst at startup.
+
+    Every query starts after a random delay of up to jitter seconds and at
+    most concurrency queries (a query lasts until its reply is received or
+    timed out) run at the same time. Nothing waits for the queries: they
+    run in the background while the setup goes on.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        concurrency: int = STARTUP_CONCURRENCY,
+        jitter: float = STARTUP_JITTER,
+    ):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._jitter = jitter
+        self._tasks: set[asyncio.Task] = set()
+
+    @callback
+    def async_schedule(self, query: Callable[[], Awaitable[None]], name: str) -> None:
+        """Run query in the background, staggered with the other ones."""
+        task = self.hass.async_create_background_task(self._async_run(query), name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _async_run(self, query: Callable[[], Awaitable[None]]) -> None:
+        """Wait for the jitter delay and a free slot, then run query."""
+        await asyncio.sleep(random.uniform(0, self._jitter))
+        async with self._semaphore:
+            try:
+                await query()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error during the startup query %s", query)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel the queries not done yet."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
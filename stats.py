@@ -0,0 +1,101 @@
+"""Hot path statistics of the EnOcean dongle."""
+from __future__ import annotations
+
+from bisect import bisect_left
+import time
+
+# Upper bounds of the histogram buckets, 10 µs doubling up to ~5 s
+HISTOGRAM_BOUNDS = tuple(1e-5 * 2**index for index in range(20))
+
+
+class Histogram:
+    """Count durations in fixed logarithmic buckets."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        """Initialize the histogram."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # The last bucket counts the durations above the last bound
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def observe(self, duration: float) -> None:
+        """Count a duration in seconds."""
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.buckets[bisect_left(HISTOGRAM_BOUNDS, duration)] += 1
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                break
+        if index == len(HISTOGRAM_BOUNDS):
+            return self.max
+        return min(HISTOGRAM_BOUNDS[index], self.max)
+
+    @property
+    def summary(self) -> dict[str, float | None]:
+        """Return the count and the mean, p50, p99 and max in milliseconds."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1e3, 3),
+            "p50_ms": round(self.percentile(0.5) * 1e3, 3),
+            "p99_ms": round(self.percentile(0.99) * 1e3, 3),
+            "max_ms": round(self.max * 1e3, 3),
+        }
+
+
+class DongleStats:
+    """Counters and duration histograms of the receive and transmit paths.
+
+    - frames: ESP3 frames received from the communicator
+    - rx_wait: time the oldest packet of a batch waited in the receive buffer
+    - dispatch: routing of a radio packet to all of its listeners
+    - value_changed: handling of a packet by one entity
+    - decrypt: decryption of a secure telegram
+    - tx_wait: time a telegram waited in the transmit queue
+
+    The dongle only creates it when the "stats" option is enabled, hot paths
+    check for None and skip the measurements otherwise.
+    """
+
+    def __init__(self):
+        """Initialize the statistics."""
+        self.frames = 0
+        self.rx_wait = Histogram()
+        self.dispatch = Histogram()
+        self.value_changed = Histogram()
+        self.decrypt = Histogram()
+        self.tx_wait = Histogram()
+        self.slowest_entity: str | None = None
+        self._rate_time = time.monotonic()
+        self._rate_frames = 0
+        self.packet_rate = 0.0
+
+    def observe_value_changed(self, entity_id: str, duration: float) -> None:
+        """Count the packet handling duration of an entity."""
+        if duration > self.value_changed.max:
+            self.slowest_entity = entity_id
+        self.value_changed.observe(duration)
+
+    def update_packet_rate(self) -> float:
+        """Update and return the frames per second received since the last update."""
+        now = time.monotonic()
+        frames = self.frames
+        if now > self._rate_time:
+            self.packet_rate = (frames - self._rate_frames) / (now - self._rate_time)
+        self._rate_time = now
+        self._rate_frames = frames
+        return self.packet_rate
@@ -1,17 +1,24 @@
 """Support for EnOcean switches."""
 from __future__ import annotations
+
+import asyncio
+import logging
+
 from enoceanjob.protocol.constants import RORG
 from enoceanjob.utils import combine_hex
 import voluptuous as vol
 
 from homeassistant.components.switch import PLATFORM_SCHEMA, SwitchEntity
 from homeassistant.const import CONF_ID, CONF_NAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
 from .device import EnOceanEntity
+from .eep import parse_eep
+
+_LOGGER = logging.getLogger(__name__)
 
 CONF_CHANNEL = "channel"
 CONF_BEHAVIOR = "behavior"
@@ -19,6 +26,9 @@ CONF_AVAILABLE_BEHAVIOR = ["relay", "onoff", "push", "button"]
 DEFAULT_NAME = "EnOcean Switch"
 CONF_BASE_ID = "base_id"
 
+STATUS_TIMEOUT = 1.0
+STATUS_RETRIES = 1
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
         vol.Required(CONF_ID): vol.All(cv.ensure_list, [vol.Coerce(int)]),
@@ -58,6 +68,7 @@ class EnOceanSwitch(EnOceanEntity, SwitchEntity):
         self.behavior = behavior
         self.base_id = base_id
         self._attr_unique_id = f"{combine_hex(dev_id)}-{behavior}-{channel}"
+        self._output_task = None
 
     @property
     def is_on(self):
@@ -69,43 +80,70 @@ class EnOceanSwitch(EnOceanEntity, SwitchEntity):
         """Return the device name."""
         return self.dev_name
 
-    def turn_on(self, **kwargs):
+    async def async_turn_on(self, **kwargs):
         """Turn on the switch."""
-        if self.behavior == 'relay':
-            optional = [0x03]
-            optional.extend(self.dev_id)
-            optional.extend([0xFF, 0x00])
-            channel = self.channel & 0xFF
-            data = [RORG.VLD, 0x01]
-            data.extend([channel])
-            data.extend([0x64])
-            data.extend(self.base_id)  # append base id if given in config
-            data.extend([0x00])
-            self.send_command(
-                data=data,
-                optional=optional,
-                packet_type=0x01,
-            )
         self._on_state = True
+        self.async_schedule_state_write()
+        if self.behavior == 'relay':
+            self._async_start_set_output(0x64)
 
-    def turn_off(self, **kwargs):
+    async def async_turn_off(self, **kwargs):
         """Turn off the switch."""
+        self._on_state = False
+        self.async_schedule_state_write()
         if self.behavior == 'relay':
-            optional = [0x03]
-            optional.extend(self.dev_id)
-            optional.extend([0xFF, 0x00])
-            channel = self.channel & 0xFF
-            data = [RORG.VLD, 0x01]
-            data.extend([channel])
-            data.extend([0x00])  # value to set: 0
-            data.extend(self.base_id)
-            data.extend([0x00])
-            self.send_command(
-                data=data,
-                optional=optional,
-                packet_type=0x01,
+            self._async_start_set_output(0x00)
+
+    @callback
+    def _async_start_set_output(self, value):
+        """Set the output in the background, the status telegram confirms the state.
+
+        A command still waiting for its status is superseded.
+        """
+        if self._output_task is not None:
+            self._output_task.cancel()
+        self._output_task = self.hass.async_create_task(self._async_set_output(value))
+
+    async def async_will_remove_from_hass(self):
+        """Stop waiting for the status of the last command."""
+        if self._output_task is not None:
+            self._output_task.cancel()
+
+    async def _async_set_output(self, value):
+        """Set the actuator output value and wait for its status (D2-01 CMD 4)."""
+        optional = [0x03]
+        optional.extend(self.dev_id)
+        optional.extend([0xFF, 0x00])
+        channel = self.channel & 0xFF
+        data = [RORG.VLD, 0x01]
+        data.extend([channel])
+        data.extend([value])
+        data.extend(self.base_id)  # append base id if given in config
+        data.extend([0x00])
+        try:
+            await self.usb_dongle.correlator.async_request(
+                combine_hex(self.dev_id),
+                self._is_status_reply,
+                lambda: self.send_command(
+                    data=data,
+                    optional=optional,
+                    packet_type=0x01,
+                    coalesce_key=(combine_hex(self.dev_id), "output", self.channel),
+                ),
+                timeout=STATUS_TIMEOUT,
+                retries=STATUS_RETRIES,
             )
-        self._on_state = False
+        except asyncio.TimeoutError:
+            _LOGGER.warning("No status received from %s after switching", self.dev_name)
+
+    def _is_status_reply(self, packet) -> bool:
+        """Return True for an actuator status telegram of this channel."""
+        return (
+            packet.data[0] == RORG.VLD
+            and len(packet.data) > 3
+            and packet.data[1] & 0x0F == 4
+            and packet.data[2] & 0x1F == self.channel
+        )
 
     def value_changed(self, packet):
         """EEP: F6-02-02 - Nodon Soft Remote"""
@@ -122,24 +160,24 @@ class EnOceanSwitch(EnOceanEntity, SwitchEntity):
                 self._on_state = True
             elif self.behavior == 'button':
                 self._on_state = False
-            self.schedule_update_ha_state()
+            self.async_schedule_state_write()
         """Update the internal state of the switch."""
         if packet.data[0] == 0xA5:
             # power meter telegram, turn on if > 10 watts
-            packet.parse_eep(0x12, 0x01)
-            if packet.parsed["DT"]["raw_value"] == 1:
-                raw_val = packet.parsed["MR"]["raw_value"]
-                divisor = packet.parsed["DIV"]["raw_value"]
+            parsed = parse_eep(packet, 0x12, 0x01)
+            if parsed["DT"]["raw_value"] == 1:
+                raw_val = parsed["MR"]["raw_value"]
+                divisor = parsed["DIV"]["raw_value"]
                 watts = raw_val / (10**divisor)
                 if watts > 1:
                     self._on_state = True
-                    self.schedule_update_ha_state()
+                    self.async_schedule_state_write()
         elif packet.data[0] == 0xD2:
             # actuator status telegram
-            packet.parse_eep(0x01, 0x01)
-            if packet.parsed["CMD"]["raw_value"] == 4:
-                channel = packet.parsed["IO"]["raw_value"]
-                output = packet.parsed["OV"]["raw_value"]
+            parsed = parse_eep(packet, 0x01, 0x01)
+            if parsed["CMD"]["raw_value"] == 4:
+                channel = parsed["IO"]["raw_value"]
+                output = parsed["OV"]["raw_value"]
                 if channel == self.channel:
                     self._on_state = output > 0
-                    self.schedule_update_ha_state()
+                    self.async_schedule_state_write()
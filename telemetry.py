@@ -0,0 +1,150 @@
+"""Compact telemetry history of the heaters."""
+from __future__ import annotations
+
+from array import array
+import math
+from typing import Any
+
+# Samples kept per heater, a week at one sample every 5 minutes
+HISTORY_CAPACITY = 2016
+# Hourly buckets kept per heater
+HOURLY_BUCKETS = 168
+# Longer gaps between samples are not counted in the duty cycle
+MAX_SAMPLE_GAP = 1800.0
+
+_NAN = math.nan
+
+
+def _value(value: float) -> float | None:
+    """Return a stored value, None when it is missing."""
+    return None if math.isnan(value) else round(value, 2)
+
+
+class HeaterTelemetry:
+    """Ring buffers of the temperatures and heating flag reported by a heater.
+
+    Samples (time, current temperature, target temperature, heating flag)
+    are written in preallocated arrays, the oldest ones being overwritten
+    once capacity samples are recorded. They are also downsampled into
+    hourly buckets (min, average and max of the current temperature).
+
+    The heating duty cycle is time weighted: the interval between two
+    samples counts as heating when the first one reported heating, and is
+    credited to the hour of the second one. Intervals longer than
+    MAX_SAMPLE_GAP (the heater was not heard from) are left out.
+    """
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY, hours: int = HOURLY_BUCKETS):
+        """Allocate the buffers."""
+        self.capacity = capacity
+        self._times = array("d", [0.0]) * capacity
+        self._current = array("f", [_NAN]) * capacity
+        self._target = array("f", [_NAN]) * capacity
+        self._heating = array("B", [0]) * capacity
+        self._next = 0
+        self._count = 0
+
+        self.hours = hours
+        # Hour (since the epoch) held by each bucket, -1 when unused
+        self._hour = array("q", [-1]) * hours
+        self._hour_samples = array("I", [0]) * hours
+        self._hour_min = array("f", [_NAN]) * hours
+        self._hour_max = array("f", [_NAN]) * hours
+        self._hour_sum = array("d", [0.0]) * hours
+        self._hour_observed = array("d", [0.0]) * hours
+        self._hour_heating = array("d", [0.0]) * hours
+
+        self._last_time: float | None = None
+        self._last_heating = False
+
+    def record(
+        self, timestamp: float, current: float | None, target: float | None, heating: bool
+    ) -> None:
+        """Record a sample reported by the heater."""
+        index = self._next
+        self._times[index] = timestamp
+        self._current[index] = _NAN if current is None else current
+        self._target[index] = _NAN if target is None else target
+        self._heating[index] = heating
+        self._next = (index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+        hour = int(timestamp // 3600)
+        slot = hour % self.hours
+        if self._hour[slot] != hour:
+            self._hour[slot] = hour
+            self._hour_samples[slot] = 0
+            self._hour_min[slot] = _NAN
+            self._hour_max[slot] = _NAN
+            self._hour_sum[slot] = 0.0
+            self._hour_observed[slot] = 0.0
+            self._hour_heating[slot] = 0.0
+        if current is not None:
+            samples = self._hour_samples[slot]
+            self._hour_samples[slot] = samples + 1
+            self._hour_sum[slot] += current
+            if samples == 0:
+                self._hour_min[slot] = self._hour_max[slot] = current
+            else:
+                self._hour_min[slot] = min(self._hour_min[slot], current)
+                self._hour_max[slot] = max(self._hour_max[slot], current)
+        if self._last_time is not None:
+            elapsed = timestamp - self._last_time
+            if 0 < elapsed <= MAX_SAMPLE_GAP:
+                self._hour_observed[slot] += elapsed
+                if self._last_heating:
+                    self._hour_heating[slot] += elapsed
+        self._last_time = timestamp
+        self._last_heating = bool(heating)
+
+    def samples(self, since: float = 0.0) -> list[tuple[float, float | None, float | None, bool]]:
+        """Return the samples recorded after since, the oldest first."""
+        start = (self._next - self._count) % self.capacity
+        result = []
+        for offset in range(self._count):
+            index = (start + offset) % self.capacity
+            if self._times[index] > since:
+                result.append(
+                    (
+                        self._times[index],
+                        _value(self._current[index]),
+                        _value(self._target[index]),
+                        bool(self._heating[index]),
+                    )
+                )
+        return result
+
+    def _slots(self, since_hour: int) -> list[int]:
+        """Return the used buckets from since_hour on, the oldest first."""
+        return sorted(
+            (slot for slot in range(self.hours) if self._hour[slot] >= since_hour),
+            key=self._hour.__getitem__,
+        )
+
+    def hourly(self, since: float = 0.0) -> list[dict[str, Any]]:
+        """Return the hourly buckets starting after since, the oldest first."""
+        result = []
+        for slot in self._slots(int(since // 3600)):
+            samples = self._hour_samples[slot]
+            observed = self._hour_observed[slot]
+            result.append(
+                {
+                    "start": self._hour[slot] * 3600,
+                    "samples": samples,
+                    "min": _value(self._hour_min[slot]),
+                    "avg": round(self._hour_sum[slot] / samples, 2) if samples else None,
+                    "max": _value(self._hour_max[slot]),
+                    "duty_cycle": (
+                        round(self._hour_heating[slot] / observed, 3) if observed else None
+                    ),
+                }
+            )
+        return result
+
+    def duty_cycle(self, now: float, hours: int = 24) -> float | None:
+        """Return the heating duty cycle over the last hours, None when unknown."""
+        heating = observed = 0.0
+        for slot in self._slots(int(now // 3600) - hours + 1):
+            heating += self._hour_heating[slot]
+            observed += self._hour_observed[slot]
+        return round(heating / observed, 3) if observed else None
@@ -0,0 +1,26 @@
+"""Make the modules of the integration importable by the tests.
+
+The tests cover the modules without relative imports (esp3, chaining,
+cipher), imported as top level modules: importing the integration package
+would need Home Assistant. The tests of the other modules import them
+from the package with the integration fixture, skipped without Home
+Assistant.
+"""
+import importlib
+import os
+import sys
+
+import pytest
+
+INTEGRATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, INTEGRATION_DIR)
+
+
+@pytest.fixture(scope="session")
+def integration():
+    """Return a function importing a module of the integration package."""
+    pytest.importorskip("homeassistant")
+    pytest.importorskip("enoceanjob")
+    sys.path.insert(0, os.path.dirname(INTEGRATION_DIR))
+    package = os.path.basename(INTEGRATION_DIR)
+    return lambda name: importlib.import_module(f"{package}.{name}")
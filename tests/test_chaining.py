@@ -0,0 +1,109 @@
+"""Tests of the CDM reassembly."""
+import pytest
+
+pytest.importorskip("enoceanjob")
+
+from enoceanjob.protocol import packet as packet_module
+from enoceanjob.protocol.constants import PACKET, RORG
+from enoceanjob.protocol.packet import RadioPacket
+
+import chaining
+from chaining import ChainReassembler
+
+CDM = 0x40
+SENDER = [0x01, 0x90, 0x84, 0x3C]
+OPTIONAL = [0x01, 0xFF, 0xFF, 0xFF, 0xFF, 0x4D, 0x00]
+# Secure VLD telegram data, R-ORG first, too long for a single telegram
+UNCHAINED_DATA = [RORG.SEC_ENCAPS, *range(0x10, 0x24)]
+
+
+def _radio(data):
+    """Return a received radio packet of SENDER."""
+    packet = RadioPacket(PACKET.RADIO_ERP1, data=[*data, *SENDER, 0x00], optional=list(OPTIONAL))
+    packet.parse()
+    return packet
+
+
+def _chain(data, sequence=1, sizes=(9, 12, 12)):
+    """Split data as CDM telegrams, the first one holding LEN."""
+    parts = [_radio([CDM, sequence << 6, len(data) >> 8, len(data) & 0xFF, *data[:sizes[0]]])]
+    offset = sizes[0]
+    for index, size in enumerate(sizes[1:], 1):
+        if offset >= len(data):
+            break
+        parts.append(_radio([CDM, sequence << 6 | index, *data[offset:offset + size]]))
+        offset += size
+    return parts
+
+
+def _feed(reassembler, parts):
+    """Feed parts, return what every part returned."""
+    return [reassembler.feed(part) for part in parts]
+
+
+def test_reassembles_chain():
+    """The unchained telegram is returned with the last part only."""
+    *pending, unchained = _feed(ChainReassembler(), _chain(UNCHAINED_DATA))
+    assert pending == [None]
+    assert unchained.rorg == RORG.SEC_ENCAPS
+    assert unchained.data == [*UNCHAINED_DATA, *SENDER, 0x00]
+    assert unchained.sender == SENDER
+    assert unchained.optional == OPTIONAL
+
+
+def test_interleaved_sequences():
+    """Two chains of a sender with different SEQ do not mix."""
+    reassembler = ChainReassembler()
+    other_data = [RORG.VLD, *range(0x40, 0x50)]
+    first, second = _chain(UNCHAINED_DATA, sequence=1), _chain(other_data, sequence=2)
+    results = _feed(reassembler, [first[0], second[0], first[1], second[1]])
+    assert results[:2] == [None, None]
+    assert results[2].data[:-5] == UNCHAINED_DATA
+    assert results[3].data[:-5] == other_data
+    assert reassembler.completed == 2
+
+
+def test_missing_part_drops_chain():
+    """A part out of order drops the chain."""
+    reassembler = ChainReassembler()
+    first, *_ = _chain(UNCHAINED_DATA)
+    skipped = _radio([CDM, 1 << 6 | 2, 0x00])
+    assert _feed(reassembler, [first, skipped]) == [None, None]
+    assert reassembler.dropped == 1
+
+
+def test_expired_chain_dropped(monkeypatch):
+    """A chain not completed within the timeout is dropped."""
+    now = [1000.0]
+    monkeypatch.setattr(chaining.time, "monotonic", lambda: now[0])
+    reassembler = ChainReassembler(timeout=3.0)
+    first, second = _chain(UNCHAINED_DATA)
+    reassembler.feed(first)
+    now[0] += 3.0
+    assert reassembler.feed(second) is None
+    assert reassembler.dropped == 1
+
+
+def test_invalid_length_ignored():
+    """A first part with LEN 0 or above the maximum length starts no chain."""
+    reassembler = ChainReassembler(max_length=64)
+    assert reassembler.feed(_radio([CDM, 1 << 6, 0x00, 0x00, RORG.VLD])) is None
+    assert reassembler.feed(_radio([CDM, 1 << 6, 0x00, 0x41, RORG.VLD])) is None
+    assert reassembler.dropped == 2
+
+
+@pytest.mark.skipif(
+    not hasattr(getattr(packet_module, "ChainedMSG", None), "create_CDM"),
+    reason="enoceanjob without chained messages",
+)
+def test_round_trip_create_cdm():
+    """Telegrams chained by enoceanjob are reassembled as they were sent."""
+    original = _radio(UNCHAINED_DATA)
+    parts = packet_module.ChainedMSG.create_CDM(original, CDM_RORG=CDM)
+    assert len(parts) > 1
+    reassembler = ChainReassembler()
+    *pending, unchained = _feed(
+        reassembler, [_radio(list(part.data[:-5])) for part in parts]
+    )
+    assert pending == [None] * len(pending)
+    assert unchained.data == original.data
@@ -0,0 +1,77 @@
+"""Tests of the AES-128 operations of the secure telegrams."""
+import pytest
+
+pytest.importorskip("cryptography")
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from cipher import RLC_MASK, VAES_PUBLIC_KEY, SecureCipher
+
+# AES-CMAC test vectors of RFC 4493, section 4
+RFC4493_KEY = bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c")
+RFC4493_MESSAGE = bytes.fromhex(
+    "6bc1bee22e409f96e93d7e117393172a"
+    "ae2d8a571e03ac9c9eb76fac45af8e51"
+    "30c81c46a35ce411e5fbc1191a0a52ef"
+    "f69f2445df4f9b17ad2b417be66c3710"
+)
+RFC4493_VECTORS = [
+    (0, "bb1d6929e95937287fa37d129b756746"),
+    (16, "070a16b46b4d4144f79bdd9dd04a287c"),
+    (40, "dfa66747de9ae63030ca32611497c827"),
+    (64, "51f0bebf7e3b9d92fc49741779363cfe"),
+]
+
+DEVICE_KEY = bytes.fromhex("869fab7d296c9e48cebf1d7a5d7a3c81")
+# R-ORG and payload of a D2-33-00 telegram
+PLAIN = bytes((0xD2, 0x08, 0x02, 0x15, 0x40))
+
+
+@pytest.mark.parametrize(("length", "expected"), RFC4493_VECTORS)
+def test_cmac_rfc4493(length, expected):
+    """The CMAC matches the test vectors of RFC 4493."""
+    cipher = SecureCipher(RFC4493_KEY)
+    assert cipher.cmac(RFC4493_MESSAGE[:length], 16).hex() == expected
+
+
+def test_cmac_truncated():
+    """Secure telegrams carry the most significant bytes of the CMAC."""
+    assert SecureCipher(RFC4493_KEY).cmac(RFC4493_MESSAGE[:16]) == bytes.fromhex("070a16")
+
+
+@pytest.mark.parametrize("length", [1, 5, 16])
+def test_vaes_key_stream(length):
+    """VAES XORs the data with the AES of the public key and the left aligned rolling code."""
+    rlc = 0x123456
+    block = (VAES_PUBLIC_KEY ^ rlc << 104).to_bytes(16, "big")
+    encryptor = Cipher(algorithms.AES(DEVICE_KEY), modes.ECB()).encryptor()
+    stream = encryptor.update(block) + encryptor.finalize()
+    data = bytes(range(length))
+    expected = bytes(a ^ b for a, b in zip(data, stream))
+    cipher = SecureCipher(DEVICE_KEY)
+    assert cipher.vaes(data, rlc) == expected
+    assert cipher.vaes(expected, rlc) == data
+
+
+def test_find_rlc_in_window():
+    """The rolling code of a telegram is found ahead of the expected one."""
+    cipher = SecureCipher(DEVICE_KEY)
+    encrypted = cipher.vaes(PLAIN, 0x15)
+    mac = cipher.mac(encrypted, 0x15)
+    assert cipher.find_rlc(encrypted, mac, 0x15, 1) == 0x15
+    assert cipher.find_rlc(encrypted, mac, 0x10, 8) == 0x15
+    assert cipher.find_rlc(encrypted, mac, 0x10, 5) is None
+    assert cipher.find_rlc(encrypted, mac, 0x16, 128) is None
+
+
+def test_find_rlc_wraps():
+    """The rolling code window wraps around the 24 bits counter."""
+    cipher = SecureCipher(DEVICE_KEY)
+    encrypted = cipher.vaes(PLAIN, 1)
+    assert cipher.find_rlc(encrypted, cipher.mac(encrypted, 1), RLC_MASK, 4) == 1
+
+
+def test_mac_depends_on_rlc():
+    """The CMAC of the same data differs with the rolling code."""
+    cipher = SecureCipher(DEVICE_KEY)
+    assert cipher.mac(PLAIN, 1) != cipher.mac(PLAIN, 2)
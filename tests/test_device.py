@@ -0,0 +1,113 @@
+"""Tests of the devices shared by the entities of a sender."""
+import pytest
+
+pytest.importorskip("enoceanjob")
+
+from enoceanjob.protocol.constants import PACKET
+from enoceanjob.protocol.packet import RadioPacket
+
+SENDER = [0x01, 0x90, 0x84, 0x3C]
+# Subtelegram count, destination, dBm and security level of a received telegram
+OPTIONAL = [0x01, 0xFF, 0xFF, 0xFF, 0xFF, 0x4D, 0x00]
+
+
+class FakeDongle:
+    """Dongle keeping the listeners of the senders."""
+
+    stats = None
+
+    def __init__(self):
+        """Initialize the listeners."""
+        self.listeners = {}
+
+    def async_register_device(self, sender_id, listener):
+        """Register the listener of a sender."""
+        self.listeners[sender_id] = listener
+        return lambda: self.listeners.pop(sender_id)
+
+
+class FakeEntity:
+    """Entity recording the readings pushed by its device."""
+
+    def __init__(self, entity_id):
+        """Initialize the entity."""
+        self.entity_id = entity_id
+        self.readings = []
+
+    def async_device_updated(self, reading):
+        """Record a reading."""
+        self.readings.append(reading)
+
+
+def _telegram(value):
+    """Return a 4BS telegram of SENDER received at -77 dBm."""
+    packet = RadioPacket(
+        PACKET.RADIO_ERP1, data=[0xA5, 0x00, 0x00, value, 0x08, *SENDER, 0x00], optional=list(OPTIONAL)
+    )
+    packet.parse()
+    return packet
+
+
+@pytest.fixture
+def device_module(integration):
+    """Return the device module."""
+    return integration("device")
+
+
+@pytest.fixture
+def counting_device(device_module):
+    """Return a device counting its decodes."""
+
+    class CountingDevice(device_module.EnOceanDevice):
+        decodes = 0
+
+        def decode(self, packet):
+            self.decodes += 1
+            return packet.data[3]
+
+    return CountingDevice(SENDER, "Sensor")
+
+
+def test_telegram_updates_device_once(counting_device):
+    """One telegram is decoded and updates the device state once for all its entities."""
+    dongle = FakeDongle()
+    entities = [FakeEntity(f"sensor.value_{index}") for index in range(3)]
+    for entity in entities:
+        counting_device.async_attach(dongle, entity)
+    assert list(dongle.listeners) == [counting_device.sender_id]
+
+    counting_device.track_signal(10)
+    dongle.listeners[counting_device.sender_id](_telegram(42))
+
+    assert counting_device.decodes == 1
+    assert counting_device.packets == 1
+    assert counting_device.rssi == -0x4D
+    assert counting_device.last_seen is not None
+    assert list(counting_device.signal_window) == [(counting_device.last_seen, -0x4D)]
+    assert [entity.readings for entity in entities] == [[42]] * 3
+
+
+def test_detach_last_entity_unsubscribes(counting_device):
+    """The device unsubscribes when its last entity is detached."""
+    dongle = FakeDongle()
+    detach = [counting_device.async_attach(dongle, FakeEntity(f"sensor.value_{index}")) for index in range(2)]
+    detach[0]()
+    assert dongle.listeners
+    detach[1]()
+    assert not dongle.listeners
+
+
+def test_dispatch_stats_by_entity_id(counting_device):
+    """The handling time of every entity is reported under its entity_id."""
+    observed = []
+
+    class Stats:
+        def observe_value_changed(self, entity_id, duration):
+            observed.append(entity_id)
+
+    dongle = FakeDongle()
+    dongle.stats = Stats()
+    for index in range(2):
+        counting_device.async_attach(dongle, FakeEntity(f"sensor.value_{index}"))
+    dongle.listeners[counting_device.sender_id](_telegram(1))
+    assert observed == ["sensor.value_0", "sensor.value_1"]
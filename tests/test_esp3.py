@@ -0,0 +1,101 @@
+"""Tests of the ESP3 CRC8 and frame parser."""
+import pytest
+
+pytest.importorskip("enoceanjob")
+pytest.importorskip("serial_asyncio")
+
+from enoceanjob.protocol import crc8 as library_crc8
+from enoceanjob.protocol.constants import PACKET
+from enoceanjob.protocol.packet import RadioPacket, ResponsePacket
+
+from esp3 import ESP3FrameParser, crc8, packet_from_frame
+
+# CO_RD_VERSION common command, from the ESP3 specification
+CO_RD_VERSION_FRAME = bytes.fromhex("55000100057003" "09")
+
+
+def _frame(packet_type, data, optional=()):
+    """Return an ESP3 frame."""
+    header = bytes((len(data) >> 8, len(data) & 0xFF, len(optional), packet_type))
+    body = bytes(data) + bytes(optional)
+    return b"\x55" + header + bytes((crc8(header),)) + body + bytes((crc8(body),))
+
+
+# 4BS telegram of sender 01 80 8B 4C, with subtelegram count, destination, dBm and security
+RADIO_FRAME = _frame(
+    PACKET.RADIO_ERP1,
+    [0xA5, 0x00, 0x00, 0x55, 0x08, 0x01, 0x80, 0x8B, 0x4C, 0x00],
+    [0x01, 0xFF, 0xFF, 0xFF, 0xFF, 0x4D, 0x00],
+)
+
+
+def _parse(*chunks):
+    """Feed chunks to a parser, return the frames and the parser."""
+    frames = []
+    parser = ESP3FrameParser(lambda frame: frames.append(bytes(frame)))
+    for chunk in chunks:
+        parser.feed(chunk)
+    return frames, parser
+
+
+def test_crc8_known_frame():
+    """Header and data CRC of a frame of the specification."""
+    assert crc8(CO_RD_VERSION_FRAME[1:5]) == CO_RD_VERSION_FRAME[5]
+    assert crc8(CO_RD_VERSION_FRAME[6:7]) == CO_RD_VERSION_FRAME[7]
+
+
+def test_crc8_matches_enoceanjob():
+    """The table driven CRC8 matches the one of enoceanjob."""
+    for data in (b"", bytes(range(256)), RADIO_FRAME[6:-1], b"\x55" * 17):
+        assert crc8(data) == library_crc8.calc(list(data))
+
+
+def test_frames_in_one_chunk():
+    """Several frames received at once are all parsed."""
+    frames, parser = _parse(CO_RD_VERSION_FRAME + RADIO_FRAME)
+    assert frames == [CO_RD_VERSION_FRAME, RADIO_FRAME]
+    assert parser.crc_errors == 0
+
+
+def test_frame_received_byte_by_byte():
+    """A frame split over many reads is parsed once complete."""
+    frames, _parser = _parse(*(RADIO_FRAME[index:index + 1] for index in range(len(RADIO_FRAME))))
+    assert frames == [RADIO_FRAME]
+
+
+def test_resync_after_garbage():
+    """Bytes before a frame, including sync bytes, are skipped."""
+    frames, parser = _parse(b"\x00\x55\x12\x55\x55\x00\x01", RADIO_FRAME)
+    assert frames == [RADIO_FRAME]
+    assert parser.crc_errors > 0
+
+
+def test_resync_after_data_crc_error():
+    """A frame with a bad data CRC is dropped, the next one is parsed."""
+    corrupted = bytearray(RADIO_FRAME)
+    corrupted[8] ^= 0xFF
+    frames, parser = _parse(bytes(corrupted) + CO_RD_VERSION_FRAME)
+    assert frames == [CO_RD_VERSION_FRAME]
+    # The 0x55 data byte of the dropped frame is tried as a sync byte too
+    assert parser.crc_errors >= 1
+
+
+def test_resync_after_header_crc_error():
+    """A frame with a bad header CRC is dropped, the next one is parsed."""
+    corrupted = bytearray(RADIO_FRAME)
+    corrupted[5] ^= 0xFF
+    frames, parser = _parse(bytes(corrupted), RADIO_FRAME)
+    assert frames == [RADIO_FRAME]
+    assert parser.crc_errors >= 1
+
+
+def test_packet_from_frame():
+    """Frames get the packet classes of Packet.parse_msg."""
+    packet = packet_from_frame(memoryview(RADIO_FRAME))
+    assert isinstance(packet, RadioPacket)
+    assert packet.data == list(RADIO_FRAME[6:16])
+    assert packet.optional == list(RADIO_FRAME[16:23])
+    assert packet.sender_hex == "01:80:8B:4C"
+
+    response = packet_from_frame(memoryview(_frame(PACKET.RESPONSE, [0x00])))
+    assert isinstance(response, ResponsePacket)
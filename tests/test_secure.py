@@ -0,0 +1,108 @@
+"""Tests of the secure sessions."""
+import pytest
+
+pytest.importorskip("cryptography")
+pytest.importorskip("enoceanjob")
+
+from enoceanjob.protocol.constants import PACKET, RORG
+from enoceanjob.protocol.packet import Packet, RadioPacket
+
+DEVICE_KEY = bytes.fromhex("869fab7d296c9e48cebf1d7a5d7a3c81")
+SENDER = [0x01, 0x90, 0x84, 0x3C]
+# Subtelegram count, destination, dBm and security level of a sent telegram
+OPTIONAL = [0x03, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0x00]
+PLAIN_DATA = [RORG.VLD, 0x08, 0x02, 0x15, 0x40, *SENDER, 0x00]
+
+needs_secure_telegrams = pytest.mark.skipif(
+    not hasattr(Packet, "encrypt"), reason="enoceanjob without secure telegrams"
+)
+
+
+@pytest.fixture
+def secure(integration):
+    """Return the secure module."""
+    return integration("secure")
+
+
+def _plain():
+    """Return the telegram to encrypt."""
+    return RadioPacket(PACKET.RADIO_ERP1, data=list(PLAIN_DATA), optional=list(OPTIONAL))
+
+
+def _received(packet):
+    """Return a sent packet as received."""
+    received = RadioPacket(PACKET.RADIO_ERP1, data=list(packet.data), optional=list(packet.optional))
+    received.parse()
+    return received
+
+
+def test_round_trip(secure):
+    """A telegram encrypted by a session is decrypted by the other end."""
+    sender = secure.SecureSession(DEVICE_KEY, rlc_tx=0x10)
+    receiver = secure.SecureSession(DEVICE_KEY, rlc_rx=0x10)
+    encrypted = sender.encrypt(_plain())
+    assert encrypted.data[0] == RORG.SEC_ENCAPS
+    assert encrypted.data[-5:] == PLAIN_DATA[-5:]
+    decrypted = receiver.decrypt(_received(encrypted))
+    assert decrypted.data == PLAIN_DATA
+    assert decrypted.rorg == RORG.VLD
+
+
+def test_decrypt_after_missed_telegrams(secure):
+    """A telegram ahead of the expected rolling code resynchronizes the session."""
+    sender = secure.SecureSession(DEVICE_KEY, rlc_tx=0x15)
+    receiver = secure.SecureSession(DEVICE_KEY, rlc_rx=0x10)
+    assert receiver.decrypt(_received(sender.encrypt(_plain()))) is not None
+    assert receiver.rlc_rx == 0x16
+    assert receiver.last_skip == 5
+    assert receiver.resyncs == 1
+
+
+def test_decrypt_rejects_replay_and_out_of_window(secure):
+    """Telegrams behind the expected rolling code or beyond the window are rejected."""
+    receiver = secure.SecureSession(DEVICE_KEY, rlc_rx=0x10, window=8)
+    telegram = _received(secure.SecureSession(DEVICE_KEY, rlc_tx=0x10).encrypt(_plain()))
+    assert receiver.decrypt(telegram) is not None
+    assert receiver.decrypt(telegram) is None
+    ahead = secure.SecureSession(DEVICE_KEY, rlc_tx=0x11 + 8).encrypt(_plain())
+    assert receiver.decrypt(_received(ahead)) is None
+    assert receiver.rejected == 2
+    assert receiver.rlc_rx == 0x11
+
+
+def test_encrypt_increments_rolling_code(secure):
+    """Every telegram is encrypted with the next rolling code, wrapping at 24 bits."""
+    sender = secure.SecureSession(DEVICE_KEY, rlc_tx=0xFFFFFF)
+    receiver = secure.SecureSession(DEVICE_KEY, rlc_rx=0xFFFFFF)
+    for _ in range(2):
+        assert receiver.decrypt(_received(sender.encrypt(_plain()))) is not None
+    assert sender.rlc_tx == receiver.rlc_rx == 1
+
+
+@needs_secure_telegrams
+@pytest.mark.parametrize("rlc", [0x000000, 0x000123, 0xFFFFFF])
+def test_encrypt_matches_enoceanjob(secure, rlc):
+    """Telegrams are encrypted byte for byte as enoceanjob does."""
+    reference = _plain().encrypt(
+        bytearray(DEVICE_KEY), secure.SecureSession.rlc_to_list(rlc), SLF_TI=secure.SLF_VAES_CMAC3
+    )
+    encrypted = secure.SecureSession(DEVICE_KEY, rlc_tx=rlc).encrypt(_plain())
+    assert list(encrypted.data) == list(reference.data)
+    assert list(encrypted.optional) == list(reference.optional)
+
+
+@needs_secure_telegrams
+def test_decrypt_matches_enoceanjob(secure):
+    """Telegrams encrypted by enoceanjob are decrypted as enoceanjob does."""
+    rlc = 0x000123
+    telegram = _received(
+        _plain().encrypt(
+            bytearray(DEVICE_KEY), secure.SecureSession.rlc_to_list(rlc), SLF_TI=secure.SLF_VAES_CMAC3
+        )
+    )
+    reference, _result, _rlc = telegram.decrypt(
+        bytearray(DEVICE_KEY), secure.SecureSession.rlc_to_list(rlc), SLF_TI=secure.SLF_VAES_CMAC3
+    )
+    decrypted = secure.SecureSession(DEVICE_KEY, rlc_rx=rlc).decrypt(telegram)
+    assert decrypted.data == list(reference.data)
+    assert decrypted.optional == list(reference.optional)
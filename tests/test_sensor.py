@@ -0,0 +1,76 @@
+"""Tests of the meter sensors."""
+import logging
+
+import pytest
+
+pytest.importorskip("enoceanjob")
+
+from enoceanjob.protocol.constants import PACKET
+from enoceanjob.protocol.packet import RadioPacket
+
+METER_ID = [0x01, 0x94, 0xE3, 0xBA]
+# Subtelegram count, destination, dBm and security level of a received telegram
+OPTIONAL = [0x01, 0xFF, 0xFF, 0xFF, 0xFF, 0x4D, 0x00]
+
+
+def _meter_reading(channel, power):
+    """Return an A5-12-01 telegram of a current power reading (W) of a channel."""
+    # DB0: TI, LRN bit set (data telegram), DT 1 (current value), DIV 0
+    data = [0xA5, power >> 16 & 0xFF, power >> 8 & 0xFF, power & 0xFF, channel << 4 | 0x0C]
+    packet = RadioPacket(PACKET.RADIO_ERP1, data=[*data, *METER_ID, 0x00], optional=list(OPTIONAL))
+    packet.parse()
+    return packet
+
+
+@pytest.fixture
+def sensor(integration):
+    """Return the sensor module."""
+    return integration("sensor")
+
+
+def test_meter_decodes_channel(sensor):
+    """The channel (TI) and the value of a reading are decoded."""
+    meter = sensor.EnOceanMeter(METER_ID, "Meter")
+    assert meter.decode(_meter_reading(1, 250)) == sensor.MeterReading(1, True, 250)
+
+
+def test_unconfigured_meter_adds_new_channel(sensor):
+    """A meter without channels adds the sensors of a channel it reports."""
+    added = []
+    meter = sensor.EnOceanMeter(METER_ID, "Meter", async_add_entities=added.extend)
+    assert list(meter.power_sensors) == [0]
+
+    meter._async_message_received(_meter_reading(1, 250))
+    meter._async_message_received(_meter_reading(1, 260))
+    assert list(meter.power_sensors) == [0, 1]
+    assert added == [meter.power_sensors[1], meter.energy_sensors[1]]
+    assert added[0].unique_id.endswith("-1")
+
+
+def test_configured_meter_warns_once_per_channel(sensor, caplog):
+    """A meter ignores the channels not configured, warning once for each."""
+    added = []
+    meter = sensor.EnOceanMeter(METER_ID, "Meter", [0], async_add_entities=added.extend)
+    with caplog.at_level(logging.WARNING):
+        for channel in (1, 1, 2):
+            meter._async_message_received(_meter_reading(channel, 100))
+    assert not added
+    assert list(meter.power_sensors) == [0]
+    assert len(caplog.records) == 2
+
+
+def test_signal_sensor_reads_device(sensor, integration):
+    """The signal strength sensor publishes the window kept by the device."""
+    device = integration("device").EnOceanDevice(METER_ID, "Heater")
+    signal = sensor.EnOceanSignalSensor(METER_ID, "Heater", device=device)
+    writes = []
+    signal.async_schedule_state_write = lambda: writes.append(signal.native_value)
+
+    signal._async_publish_window()
+    assert not writes
+    for value in (100, 200):
+        device._async_message_received(_meter_reading(0, value))
+    signal._async_publish_window()
+    signal._async_publish_window()
+    assert writes == [-0x4D]
+    assert signal.extra_state_attributes["samples"] == 2
@@ -0,0 +1,234 @@
+"""Outbound telegram scheduling for the EnOcean dongle."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Hashable
+import logging
+import time
+
+from enoceanjob.protocol.packet import Packet
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    TX_PRIORITY_COMMAND,
+    TX_PRIORITY_POLL,
+    TX_PRIORITY_SECURE_ACK,
+)
+from .stats import DongleStats
+
+_LOGGER = logging.getLogger(__name__)
+
+TX_LANES = {
+    TX_PRIORITY_SECURE_ACK: "secure_ack",
+    TX_PRIORITY_COMMAND: "command",
+    TX_PRIORITY_POLL: "poll",
+}
+
+# ERP1: 125 kbit/s, 12 bits on air per data byte, ~40 bits of preamble,
+# sync and end of frame, every telegram is sent as 3 sub-telegrams.
+ERP1_BITRATE = 125000
+ERP1_BITS_PER_BYTE = 12
+ERP1_FRAME_BITS = 40
+ERP1_SUBTELEGRAMS = 3
+
+
+def estimate_airtime(packets: Packet | list[Packet] | DeferredTelegram) -> float:
+    """Return the estimated airtime in seconds of a telegram or telegram chain."""
+    if isinstance(packets, DeferredTelegram):
+        return packets.airtime
+    if not isinstance(packets, list):
+        packets = [packets]
+    return sum(telegram_airtime(len(packet.data)) for packet in packets)
+
+
+def telegram_airtime(length: int) -> float:
+    """Return the estimated airtime in seconds of a telegram of length data bytes."""
+    return (length * ERP1_BITS_PER_BYTE + ERP1_FRAME_BITS) * ERP1_SUBTELEGRAMS / ERP1_BITRATE
+
+
+class DeferredTelegram:
+    """A telegram built when it is transmitted.
+
+    Secure telegrams are queued this way, so they are encrypted with the
+    next rolling code in transmission order, whatever their priority lane.
+    airtime is the estimated airtime of the built telegram.
+    """
+
+    __slots__ = ("build", "airtime")
+
+    def __init__(self, build: Callable[[], Packet | list[Packet]], airtime: float):
+        """Initialize the deferred telegram."""
+        self.build = build
+        self.airtime = airtime
+
+
+class QueuedTelegram:
+    """A telegram (or chain of telegrams) waiting to be transmitted."""
+
+    __slots__ = ("packets", "priority", "coalesce_key", "enqueued", "airtime")
+
+    def __init__(self, packets, priority: int, coalesce_key: Hashable | None):
+        """Initialize the queued telegram."""
+        self.packets = packets
+        self.priority = priority
+        self.coalesce_key = coalesce_key
+        self.enqueued = time.monotonic()
+        self.airtime = estimate_airtime(packets)
+
+
+class TransmitScheduler:
+    """Pace, prioritise and coalesce the telegrams sent by the dongle.
+
+    - Telegrams are queued in priority lanes (secure acks, user commands,
+      polls) and the highest non empty lane is always served first.
+    - Consecutive transmissions are separated by at least min_gap seconds.
+    - The estimated airtime sent over the last window seconds is kept below
+      duty_cycle percent of the window; telegrams wait for older ones to
+      leave the window when the budget is exhausted.
+    - A telegram enqueued with the coalesce key of a telegram still waiting
+      replaces it in place (latest wins), e.g. successive cover positions.
+      Enqueued with another priority, it moves to the lane of that priority.
+    - A DeferredTelegram is built when it is transmitted: the rolling codes
+      of secure telegrams follow the transmission order.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        transmit: Callable[[Packet | list[Packet]], None],
+        *,
+        duty_cycle: float,
+        window: float,
+        min_gap: float,
+        stats: DongleStats | None = None,
+    ):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._transmit = transmit
+        self._budget = window * duty_cycle / 100
+        self._window = window
+        self._min_gap = min_gap
+        self._lanes: dict[int, deque[QueuedTelegram]] = {priority: deque() for priority in TX_LANES}
+        self._queued_by_key: dict[Hashable, QueuedTelegram] = {}
+        self._airtime_log: deque[tuple[float, float]] = deque()
+        self._airtime_used = 0.0
+        self._next_transmit = 0.0
+        self._timer = None
+        self._stats = stats
+        self.sent = 0
+        self.coalesced = 0
+        self.deferred = 0
+
+    @callback
+    def async_enqueue(
+        self,
+        packets: Packet | list[Packet] | DeferredTelegram,
+        priority: int = TX_PRIORITY_COMMAND,
+        coalesce_key: Hashable | None = None,
+    ) -> None:
+        """Queue a telegram for transmission."""
+        if coalesce_key is not None:
+            queued = self._queued_by_key.get(coalesce_key)
+            if queued is not None:
+                _LOGGER.debug("Telegram superseded for %s", coalesce_key)
+                queued.packets = packets
+                queued.airtime = estimate_airtime(packets)
+                if priority != queued.priority:
+                    self._lanes[queued.priority].remove(queued)
+                    self._lanes[priority].append(queued)
+                    queued.priority = priority
+                self.coalesced += 1
+                return
+
+        queued = QueuedTelegram(packets, priority, coalesce_key)
+        self._lanes[priority].append(queued)
+        if coalesce_key is not None:
+            self._queued_by_key[coalesce_key] = queued
+        if self._timer is None:
+            self._async_transmit_queued()
+
+    @callback
+    def _async_transmit_queued(self) -> None:
+        """Transmit the queued telegrams allowed by the gap and airtime budget."""
+        self._timer = None
+        while (lane := self._next_lane()) is not None:
+            now = time.monotonic()
+            if now < self._next_transmit:
+                self._async_schedule(self._next_transmit - now)
+                return
+
+            airtime_log = self._airtime_log
+            while airtime_log and airtime_log[0][0] <= now - self._window:
+                self._airtime_used -= airtime_log.popleft()[1]
+
+            queued = lane[0]
+            if airtime_log and self._airtime_used + queued.airtime > self._budget:
+                self.deferred += 1
+                self._async_schedule(airtime_log[0][0] + self._window - now)
+                return
+
+            lane.popleft()
+            if queued.coalesce_key is not None:
+                del self._queued_by_key[queued.coalesce_key]
+            airtime_log.append((now, queued.airtime))
+            self._airtime_used += queued.airtime
+            self._next_transmit = now + self._min_gap
+            self.sent += 1
+            if self._stats is not None:
+                self._stats.tx_wait.observe(now - queued.enqueued)
+            try:
+                packets = queued.packets
+                if isinstance(packets, DeferredTelegram):
+                    packets = packets.build()
+                self._transmit(packets)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error while transmitting %s", queued.packets)
+
+    def _next_lane(self) -> deque[QueuedTelegram] | None:
+        """Return the highest priority lane with queued telegrams."""
+        for lane in self._lanes.values():
+            if lane:
+                return lane
+        return None
+
+    @callback
+    def _async_schedule(self, delay: float) -> None:
+        """Resume the transmissions after delay seconds."""
+        self._timer = self.hass.loop.call_later(delay, self._async_transmit_queued)
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the pending transmissions."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for lane in self._lanes.values():
+            lane.clear()
+        self._queued_by_key.clear()
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of queued telegrams."""
+        return sum(len(lane) for lane in self._lanes.values())
+
+    @property
+    def estimated_delay(self) -> float:
+        """Return the minimum time in seconds a telegram enqueued now waits."""
+        return self.queue_depth * self._min_gap
+
+    @property
+    def metrics(self) -> dict[str, float]:
+        """Return the queue depths and counters of the scheduler."""
+        metrics = {
+            f"queue_{name}": len(self._lanes[priority])
+            for priority, name in TX_LANES.items()
+        }
+        metrics.update(
+            sent=self.sent,
+            coalesced=self.coalesced,
+            deferred=self.deferred,
+            airtime_used=round(self._airtime_used, 4),
+            airtime_budget=self._budget,
+        )
+        return metrics
@@ -10,6 +10,8 @@ from enoceanjob.utils import combine_hex
 import homeassistant.components.enocean as ec
 from homeassistant.core import HomeAssistant
 
+from .esp3 import AsyncSerialCommunicator
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -25,6 +27,17 @@ def get_communicator_reference(hass: HomeAssistant) -> object | Communicator:
     return communicator
 
 
+def swap_communicator_callback(communicator, callback):
+    """Set the packet callback of a communicator, return the previous one."""
+    if isinstance(communicator, AsyncSerialCommunicator):
+        previous, communicator.callback = communicator.callback, callback
+        return previous
+    # enoceanjob's Communicator has no accessor for its private callback
+    previous = communicator._Communicator__callback
+    communicator._Communicator__callback = callback
+    return previous
+
+
 def int_to_list(int_value):
     """Convert integer to list of values."""
     result = []
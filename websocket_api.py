@@ -0,0 +1,62 @@
+"""Websocket commands of the EnOcean integration."""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
+
+from .const import DATA_ENOCEAN, ENOCEAN_DONGLE
+
+WS_TYPE_HEATER_HISTORY = "enocean/heater_history"
+ATTR_SINCE = "since"
+ATTR_HOURS = "hours"
+DEFAULT_DUTY_CYCLE_HOURS = 24
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, websocket_heater_history)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_TYPE_HEATER_HISTORY,
+        vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+        vol.Optional(ATTR_SINCE, default=0.0): vol.Coerce(float),
+        vol.Optional(ATTR_HOURS, default=DEFAULT_DUTY_CYCLE_HOURS): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+    }
+)
+@callback
+def websocket_heater_history(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the telemetry history recorded for a heater.
+
+    Samples and hourly buckets are those after since (a UNIX timestamp),
+    the duty cycle covers the last hours.
+    """
+    dongle = hass.data.get(DATA_ENOCEAN, {}).get(ENOCEAN_DONGLE)
+    heater = dongle.heaters.get(msg[ATTR_ENTITY_ID]) if dongle is not None else None
+    if heater is None:
+        connection.send_error(
+            msg["id"], websocket_api.const.ERR_NOT_FOUND, "Unknown EnOcean heater"
+        )
+        return
+    telemetry = heater.telemetry
+    connection.send_result(
+        msg["id"],
+        {
+            "samples": telemetry.samples(msg[ATTR_SINCE]),
+            "hourly": telemetry.hourly(msg[ATTR_SINCE]),
+            "duty_cycle": telemetry.duty_cycle(time.time(), msg[ATTR_HOURS]),
+        },
+    )